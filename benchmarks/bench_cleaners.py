@@ -0,0 +1,89 @@
+"""Benchmark the HTML cleaner backends on cooked posts.
+
+Run with ``python benchmarks/bench_cleaners.py [topic.json]``. Without an
+argument, cooked HTML is rebuilt from the clean text in
+'data/104906_all_posts.json'.
+"""
+
+from __future__ import annotations
+
+import html
+import json
+import sys
+import timeit
+from pathlib import Path
+
+from discuss_nutshell.cleaners import CLEANERS, clean_html_bs4
+
+DATA_PATH = Path(__file__).parent.parent / "data"
+REPEAT = 5
+
+
+def load_cooked(file_path: Path | None) -> list[str]:
+    """Load the cooked HTML of every post.
+
+    Parameters
+    ----------
+    file_path : Path | None
+        Raw Discourse topic JSON. If None, HTML is generated from the
+        processed posts in the data directory.
+
+    Returns
+    -------
+    list[str]
+        Cooked HTML of each post.
+    """
+    if file_path is not None:
+        with file_path.open(encoding="utf-8") as f:
+            return [post["cooked"] for post in json.load(f)["post_stream"]["posts"]]
+
+    with (DATA_PATH / "104906_all_posts.json").open(encoding="utf-8") as f:
+        posts = json.load(f)
+    cooked = []
+    for post in posts:
+        sentences = html.escape(post["clean_content"]).split(". ")
+        paragraphs = [
+            f'<p>{s} <a href="https://peps.python.org">link</a> <code>x</code></p>'
+            for s in sentences
+        ]
+        quote = (
+            '<aside class="quote"><div class="title">'
+            f"{html.escape(post['author'])}:</div>"
+            f"<blockquote>{paragraphs[0]}</blockquote></aside>"
+        )
+        code = "<pre><code class='lang-python'>def f():\n    return 1\n</code></pre>"
+        cooked.append(quote + "".join(paragraphs) + code)
+    return cooked
+
+
+def main() -> None:
+    """Time each cleaner over all posts and check their output."""
+    cooked = load_cooked(Path(sys.argv[1]) if len(sys.argv) > 1 else None)
+    size = sum(map(len, cooked)) / 1e6
+    print(f"{len(cooked)} posts, {size:.1f} MB of HTML")
+
+    reference = [clean_html_bs4(text) for text in cooked]
+    timings = {}
+    # Time the reference first so that speedups can be reported
+    for name, cleaner in sorted(CLEANERS.items(), key=lambda item: item[0] != "bs4"):
+        try:
+            timings[name] = min(
+                timeit.repeat(
+                    lambda cleaner=cleaner: [cleaner(text) for text in cooked],
+                    number=1,
+                    repeat=REPEAT,
+                )
+            )
+        except ImportError as e:
+            print(f"{name:>10}: skipped ({e})")
+            continue
+        same = [cleaner(text) for text in cooked] == reference
+        print(
+            f"{name:>10}: {timings[name] * 1000:8.1f} ms"
+            f"  {timings['bs4'] / timings[name]:5.1f}x bs4"
+            f"  same output as bs4: {same}"
+        )
+
+
+if __name__ == "__main__":
+    main()
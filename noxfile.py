@@ -52,6 +52,14 @@ def tests(session: nox.Session) -> None:
     session.run("python", "-m", "pytest", *session.posargs)
 
 
+@nox.session(default=False)
+def bench(session: nox.Session) -> None:
+    """Run the benchmarks."""
+    session.install("-e.", "lxml")
+    for script in sorted(DIR.joinpath("benchmarks").glob("bench_*.py")):
+        session.run("python", str(script), *session.posargs)
+
+
 @nox.session(reuse_venv=True, default=False)
 def docs(session: nox.Session) -> None:
     """Make or serve the docs. Pass --non-interactive to avoid serving."""
@@ -0,0 +1,205 @@
+"""Run many questions across many files concurrently."""
+
+import asyncio
+import json
+import random
+import time
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+from discuss_nutshell.models import TextModel
+
+# The standard prompts of the README
+STANDARD_PROMPTS = [
+    "Does this message support or refute the proposed PEP?",
+    "What are key topics found in the message?",
+    "How many times has a person posted?",
+    "You are a Python expert. Summarize this message.",
+    "You are an intermediate Python user. Summarize this message.",
+    "You are a manager not a developer. Summarize this message.",
+]
+MAX_CONCURRENCY = 8
+MAX_RETRIES = 5
+BACKOFF = 1.0  # seconds before the first retry, doubled on each retry
+# Rate limited or temporarily unavailable
+RETRY_STATUS = frozenset({429, 500, 503})
+RESULT_COLUMNS = ["file", "prompt", "status", "attempts", "seconds", "response"]
+
+
+def load_manifest(file_path: str | Path) -> tuple[list[Path], list[str]]:
+    """Read the files and prompts of a batch.
+
+    Parameters
+    ----------
+    file_path : str | Path
+        JSON manifest such as ``{"files": ["data/*_all_posts.json"],
+        "prompts": ["..."]}``. Files are paths or glob patterns relative to
+        the manifest. `STANDARD_PROMPTS` are used if "prompts" is missing.
+
+    Returns
+    -------
+    tuple[list[Path], list[str]]
+        The files, in manifest order without duplicates, and the prompts.
+
+    Raises
+    ------
+    ValueError
+        If the manifest matches no file or has no prompt.
+    """
+    path = Path(file_path)
+    with path.open(encoding="utf-8") as f:
+        manifest = json.load(f)
+    files: list[Path] = []
+    for pattern in manifest.get("files", []):
+        if Path(pattern).is_absolute():
+            matches = [Path(pattern)] if Path(pattern).exists() else []
+        else:
+            matches = sorted(path.parent.glob(pattern))
+        files.extend(matches)
+    prompts = list(manifest.get("prompts", STANDARD_PROMPTS))
+    if not files or not prompts:
+        msg = f"Manifest {path} has no files or no prompts"
+        raise ValueError(msg)
+    return list(dict.fromkeys(files)), prompts
+
+
+def is_retryable(error: Exception) -> bool:
+    """Tell whether a failed model call should be retried.
+
+    Parameters
+    ----------
+    error : Exception
+        Error raised by the model.
+
+    Returns
+    -------
+    bool
+        True for rate limits and temporary server errors, read from the
+        ``code`` (google-genai) or ``status_code`` attribute.
+    """
+    code = getattr(error, "code", None) or getattr(error, "status_code", None)
+    return code in RETRY_STATUS
+
+
+class BatchRunner:
+    """Ask a model many questions concurrently.
+
+    Parameters
+    ----------
+    model : TextModel
+        Model shared by every request, so that they share its client.
+    concurrency : int, optional
+        Maximum number of requests in flight.
+    max_retries : int, optional
+        Number of retries of a rate limited request.
+    backoff : float, optional
+        Seconds before the first retry. Each retry waits twice as long,
+        with random jitter.
+
+    Notes
+    -----
+    Blocking model calls run in worker threads so that the event loop can
+    keep `concurrency` of them in flight. A request waiting for a retry
+    does not hold a slot.
+    """
+
+    def __init__(
+        self,
+        model: TextModel,
+        concurrency: int = MAX_CONCURRENCY,
+        max_retries: int = MAX_RETRIES,
+        backoff: float = BACKOFF,
+    ) -> None:
+        if concurrency < 1:
+            msg = f"Invalid concurrency: {concurrency}"
+            raise ValueError(msg)
+        self.model = model
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def _run_one(self, file: str, text: str, prompt: str) -> dict[str, Any]:
+        """Ask one question about one file, retrying on rate limits."""
+        start = time.perf_counter()
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                async with self._semaphore:
+                    response = await asyncio.to_thread(
+                        self.model.generate, [text, prompt]
+                    )
+                status = "ok"
+            except Exception as e:  # noqa: BLE001
+                if is_retryable(e) and attempts <= self.max_retries:
+                    delay = self.backoff * 2 ** (attempts - 1)
+                    await asyncio.sleep(delay * (1 + random.random()))
+                    continue
+                response, status = str(e), "error"
+            return {
+                "file": file,
+                "prompt": prompt,
+                "status": status,
+                "attempts": attempts,
+                "seconds": time.perf_counter() - start,
+                "response": response,
+            }
+
+    async def run(
+        self, texts: Mapping[str, str], prompts: Sequence[str]
+    ) -> pd.DataFrame:
+        """Ask every prompt about every file.
+
+        Parameters
+        ----------
+        texts : Mapping[str, str]
+            Text of each file, by file name.
+        prompts : Sequence[str]
+            Questions asked about each file.
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per file and prompt, in that order, with columns
+            `RESULT_COLUMNS`. Failed requests have status "error" and the
+            error message as response.
+        """
+        rows = await asyncio.gather(
+            *(
+                self._run_one(file, text, prompt)
+                for file, text in texts.items()
+                for prompt in prompts
+            )
+        )
+        return pd.DataFrame(rows, columns=RESULT_COLUMNS)
+
+
+def results_table(results: pd.DataFrame, width: int = 60) -> str:
+    """Format batch results for the terminal.
+
+    Parameters
+    ----------
+    results : pd.DataFrame
+        Results of `BatchRunner.run`.
+    width : int, optional
+        Maximum length of the prompt and response columns.
+
+    Returns
+    -------
+    str
+        A plain text table, responses on one line and shortened.
+    """
+    if results.empty:
+        return "No results."
+    table = results.assign(
+        file=results["file"].map(lambda file: Path(file).name),
+        prompt=results["prompt"].str.slice(0, width),
+        seconds=results["seconds"].round(1),
+        response=results["response"]
+        .str.replace(r"\s+", " ", regex=True)
+        .str.slice(0, width),
+    )
+    return table.to_string(index=False)
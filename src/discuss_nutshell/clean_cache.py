@@ -0,0 +1,168 @@
+"""Persistent cache of cleaned post HTML keyed by content hash."""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from pathlib import Path
+
+from discuss_nutshell.cleaners import CLEANER_VERSION
+
+current_path = Path.cwd()
+data_path = current_path / "data"
+CACHE_FILE = data_path / "clean_cache.db"
+MAX_ENTRIES = 200_000
+BATCH_SIZE = 500  # keys per query, below SQLite's bound parameter limit
+
+_cache: "CleanCache | None" = None
+
+
+class CleanCache:
+    """SQLite cache mapping a hash of cooked HTML to its cleaned text.
+
+    Parameters
+    ----------
+    db_file : str | Path, optional
+        Path of the SQLite database.
+    max_entries : int, optional
+        Number of entries kept. The least recently used entries are
+        evicted beyond it.
+
+    Notes
+    -----
+    Keys include the cleaner name and `CLEANER_VERSION`, so changing the
+    cleaning logic never serves stale text.
+    """
+
+    def __init__(
+        self, db_file: str | Path = CACHE_FILE, max_entries: int = MAX_ENTRIES
+    ) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS clean_cache (
+                              key TEXT PRIMARY KEY,
+                              clean_text TEXT,
+                              last_used REAL)""")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS clean_cache_last_used "
+            "ON clean_cache (last_used)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def key(html_text: str, cleaner: str) -> str:
+        """Return the cache key of an HTML string.
+
+        Parameters
+        ----------
+        html_text : str
+            Cooked HTML.
+        cleaner : str
+            Name of the cleaner backend.
+
+        Returns
+        -------
+        str
+            SHA-256 hex digest of the cleaner, its version and the HTML.
+        """
+        digest = hashlib.sha256(f"{cleaner}:{CLEANER_VERSION}\0".encode())
+        digest.update(html_text.encode())
+        return digest.hexdigest()
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, str]:
+        """Look up cleaned texts and mark them as recently used.
+
+        Parameters
+        ----------
+        keys : Iterable[str]
+            Cache keys.
+
+        Returns
+        -------
+        dict[str, str]
+            Cleaned text of each key found in the cache.
+        """
+        unique = list(dict.fromkeys(keys))
+        found: dict[str, str] = {}
+        with self._lock:
+            for i in range(0, len(unique), BATCH_SIZE):
+                batch = unique[i : i + BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    "SELECT key, clean_text FROM clean_cache "
+                    f"WHERE key IN ({placeholders})",
+                    batch,
+                )
+                found.update(rows)
+            now = time.time()
+            self._conn.executemany(
+                "UPDATE clean_cache SET last_used = ? WHERE key = ?",
+                ((now, key) for key in found),
+            )
+            self._conn.commit()
+        return found
+
+    def put_many(self, items: dict[str, str]) -> None:
+        """Store cleaned texts and evict the least recently used entries.
+
+        Parameters
+        ----------
+        items : dict[str, str]
+            Cleaned text by cache key.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO clean_cache VALUES (?, ?, ?)",
+                ((key, text, now) for key, text in items.items()),
+            )
+            self._conn.execute(
+                """DELETE FROM clean_cache WHERE key IN (
+                       SELECT key FROM clean_cache
+                       ORDER BY last_used DESC LIMIT -1 OFFSET ?)""",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM clean_cache").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
+
+
+def enable_clean_cache(
+    db_file: str | Path = CACHE_FILE, max_entries: int = MAX_ENTRIES
+) -> CleanCache:
+    """Turn on the cleaned text cache used by `get_clean_cache`.
+
+    Parameters
+    ----------
+    db_file : str | Path, optional
+        Path of the SQLite database.
+    max_entries : int, optional
+        Number of entries kept.
+
+    Returns
+    -------
+    CleanCache
+        The process-wide cache.
+    """
+    global _cache  # noqa: PLW0603
+    _cache = CleanCache(db_file, max_entries)
+    return _cache
+
+
+def get_clean_cache() -> CleanCache | None:
+    """Return the process-wide cleaned text cache, or None if it is disabled.
+
+    Returns
+    -------
+    CleanCache | None
+        Cache set by `enable_clean_cache`.
+    """
+    return _cache
@@ -0,0 +1,297 @@
+"""HTML-to-text cleaners for cooked Discourse posts."""
+
+import re
+from collections.abc import Callable
+from html.parser import HTMLParser
+
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import html as lxml_html
+except ImportError:  # pragma: no cover - optional dependency
+    lxml_html = None
+
+# Bump when the output of a cleaner changes, to invalidate cached results
+CLEANER_VERSION = 1
+DEFAULT_CLEANER = "stream"
+
+# Tags whose strings BeautifulSoup leaves out of get_text()
+SKIPPED_TAGS = frozenset({"script", "style", "template", "rt", "rp"})
+BLOCK_TAGS = frozenset(
+    {
+        "address", "article", "aside", "blockquote", "br", "dd", "details",
+        "div", "dl", "dt", "figcaption", "figure", "footer", "h1", "h2", "h3",
+        "h4", "h5", "h6", "header", "hr", "li", "ol", "p", "section",
+        "summary", "table", "td", "th", "tr", "ul",
+    }
+)  # fmt: skip
+WHITESPACE = re.compile(r"\s+")
+
+
+class _TextExtractor(HTMLParser):
+    """Collect the stripped text nodes of an HTML fragment without a tree."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.strings: list[str] = []
+        self._buffer: list[str] = []
+        self._skip_depth = 0
+
+    def _flush(self) -> None:
+        if self._buffer:
+            text = "".join(self._buffer).strip()
+            if text and not self._skip_depth:
+                self.strings.append(text)
+            self._buffer = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:  # noqa: ARG002
+        self._flush()
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag: str) -> None:
+        self._flush()
+        if tag in SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data: str) -> None:
+        self._buffer.append(data)
+
+    def handle_comment(self, data: str) -> None:  # noqa: ARG002
+        self._flush()
+
+    def handle_decl(self, decl: str) -> None:  # noqa: ARG002
+        self._flush()
+
+    def handle_pi(self, data: str) -> None:  # noqa: ARG002
+        self._flush()
+
+    def unknown_decl(self, data: str) -> None:
+        self._flush()
+        if data.upper().startswith("CDATA["):
+            self._buffer.append(data[len("CDATA[") :])
+            self._flush()
+
+    def close(self) -> None:
+        super().close()
+        self._flush()
+
+
+class _StructuredExtractor(HTMLParser):
+    """Render an HTML fragment as plain text that keeps its structure.
+
+    Paragraphs and list items go on their own lines, code blocks are fenced
+    with triple backticks, quotes are prefixed with '> ' and external links
+    are followed by their URL in parentheses.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.lines: list[str] = []
+        self._inline: list[str] = []
+        self._code: list[str] | None = None
+        self._quote_depth = 0
+        self._skip_depth = 0
+        self._links: list[str | None] = []
+        self._link_text: list[int] = []
+        self._bullet = False
+
+    @property
+    def _prefix(self) -> str:
+        return "> " * self._quote_depth
+
+    def _flush(self) -> None:
+        text = WHITESPACE.sub(" ", "".join(self._inline)).strip()
+        self._inline = []
+        if text:
+            bullet = "- " if self._bullet else ""
+            self.lines.append(f"{self._prefix}{bullet}{text}")
+            self._bullet = False
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif self._code is not None:
+            return
+        elif tag == "pre":
+            self._flush()
+            self._code = []
+        elif tag == "code":
+            self._inline.append("`")
+        elif tag == "a":
+            self._links.append(dict(attrs).get("href"))
+            self._link_text.append(len(self._inline))
+        elif tag == "img":
+            alt = dict(attrs).get("alt")
+            if alt:
+                self._inline.append(f" {alt} ")
+        elif tag in BLOCK_TAGS:
+            self._flush()
+            if tag == "blockquote":
+                self._quote_depth += 1
+            elif tag == "li":
+                self._bullet = True
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in SKIPPED_TAGS:
+            self._skip_depth = max(self._skip_depth - 1, 0)
+        elif tag == "pre" and self._code is not None:
+            code = "".join(self._code).strip("\n")
+            self._code = None
+            for line in ["```", *code.split("\n"), "```"]:
+                self.lines.append(f"{self._prefix}{line}".rstrip())
+        elif self._code is not None:
+            return
+        elif tag == "code":
+            self._inline.append("`")
+        elif tag == "a" and self._links:
+            href = self._links.pop()
+            start = self._link_text.pop()
+            text = "".join(self._inline[start:]).strip()
+            if href and href.startswith(("http://", "https://")) and href != text:
+                self._inline.append(f" ({href})")
+        elif tag in BLOCK_TAGS:
+            self._flush()
+            if tag == "blockquote" and self._quote_depth:
+                self._quote_depth -= 1
+
+    def handle_data(self, data: str) -> None:
+        if self._skip_depth:
+            return
+        if self._code is not None:
+            self._code.append(data)
+        else:
+            self._inline.append(data)
+
+    def close(self) -> None:
+        super().close()
+        self._flush()
+
+
+def clean_html_bs4(html_text: str) -> str:
+    """Remove HTML tags with BeautifulSoup.
+
+    Parameters
+    ----------
+    html_text : str
+        HTML text to clean.
+
+    Returns
+    -------
+    str
+        Stripped text nodes joined by single spaces.
+
+    Notes
+    -----
+    This is the reference implementation; it builds a full parse tree.
+    """
+    soup = BeautifulSoup(html_text, "html.parser")
+    return soup.get_text(separator=" ", strip=True)
+
+
+def clean_html_stream(html_text: str) -> str:
+    """Remove HTML tags in a single streaming pass.
+
+    Parameters
+    ----------
+    html_text : str
+        HTML text to clean.
+
+    Returns
+    -------
+    str
+        Stripped text nodes joined by single spaces, the same output as
+        `clean_html_bs4`, without building a tree.
+
+    Notes
+    -----
+    The one known difference is that an unknown entity such as '&foo;'
+    keeps its semicolon, where BeautifulSoup drops it. Discourse escapes
+    '&' in cooked posts, so this does not happen in practice.
+    """
+    parser = _TextExtractor()
+    parser.feed(html_text)
+    parser.close()
+    return " ".join(parser.strings)
+
+
+def clean_html_lxml(html_text: str) -> str:
+    """Remove HTML tags with lxml.
+
+    Parameters
+    ----------
+    html_text : str
+        HTML text to clean.
+
+    Returns
+    -------
+    str
+        Stripped text nodes joined by single spaces.
+
+    Raises
+    ------
+    ImportError
+        If lxml is not installed.
+    """
+    if lxml_html is None:
+        msg = "The 'lxml' cleaner requires lxml: pip install lxml"
+        raise ImportError(msg)
+    if not html_text.strip():
+        return ""
+    root = lxml_html.fragment_fromstring(html_text, create_parent="div")
+    skipped = " or ".join(f"ancestor::{tag}" for tag in sorted(SKIPPED_TAGS))
+    strings = (text.strip() for text in root.xpath(f"//text()[not({skipped})]"))
+    return " ".join(text for text in strings if text)
+
+
+def clean_html_structured(html_text: str) -> str:
+    """Convert HTML to text that keeps code blocks, quotes and links.
+
+    Parameters
+    ----------
+    html_text : str
+        HTML text to clean.
+
+    Returns
+    -------
+    str
+        One line per paragraph or list item, fenced code blocks, quotes
+        prefixed with '> ' and external links followed by their URL.
+    """
+    parser = _StructuredExtractor()
+    parser.feed(html_text)
+    parser.close()
+    return "\n".join(parser.lines)
+
+
+CLEANERS: dict[str, Callable[[str], str]] = {
+    "stream": clean_html_stream,
+    "bs4": clean_html_bs4,
+    "lxml": clean_html_lxml,
+    "structured": clean_html_structured,
+}
+
+
+def get_cleaner(name: str = DEFAULT_CLEANER) -> Callable[[str], str]:
+    """Return a cleaner function by name.
+
+    Parameters
+    ----------
+    name : str, optional
+        One of the keys of `CLEANERS`.
+
+    Returns
+    -------
+    Callable[[str], str]
+        Function converting an HTML string to text.
+
+    Raises
+    ------
+    ValueError
+        If the cleaner is unknown.
+    """
+    try:
+        return CLEANERS[name]
+    except KeyError:
+        msg = f"Unknown cleaner {name!r}, choose one of {sorted(CLEANERS)}"
+        raise ValueError(msg) from None
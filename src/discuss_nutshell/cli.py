@@ -1,39 +1,190 @@
 """Command-line interface for discuss-nutshell."""
 
+import asyncio
+from collections.abc import Iterator
 from pathlib import Path
+from typing import Annotated
 
+import pandas as pd
 import typer
-from google import genai
 
-from discuss_nutshell.data_loader import load_topic
-from discuss_nutshell.data_logger import init_db, log_interaction
-from discuss_nutshell.visualize import create_visualization_app
+from discuss_nutshell.batch import MAX_CONCURRENCY as BATCH_CONCURRENCY
+from discuss_nutshell.batch import BatchRunner, load_manifest, results_table
+from discuss_nutshell.clean_cache import enable_clean_cache
+from discuss_nutshell.columnar import PARQUET_COLUMNS, read_posts_parquet
+from discuss_nutshell.data_loader import load_topic, process_topic_file
+from discuss_nutshell.data_logger import (
+    CODEC,
+    SEARCH_LIMIT,
+    enable_interaction_logger,
+    log_interaction,
+    log_interactions,
+    log_metrics,
+    migrate_db,
+    read_metrics,
+    search_interactions,
+)
+from discuss_nutshell.ingest import MAX_CONCURRENCY, REQUESTS_PER_SECOND
+from discuss_nutshell.ingest import ingest as ingest_many
+from discuss_nutshell.llm_cache import CachedModel, enable_llm_cache, get_llm_cache
+from discuss_nutshell.metrics import CallMetrics, metrics_stats
+from discuss_nutshell.models import (
+    DEFAULT_MODEL,
+    GeminiEmbedder,
+    StreamingModel,
+    get_model,
+)
+from discuss_nutshell.post_store import STORE_FILE, PostStore
+from discuss_nutshell.post_summaries import PostSummarizer, SummaryCache
+from discuss_nutshell.posts_txt import (
+    FIELDS,
+    parse_post_range,
+    read_post_blocks,
+    render_posts_txt,
+)
+from discuss_nutshell.preprocessor import CLEAN_CHUNK_SIZE, POST_BATCH_SIZE
+from discuss_nutshell.retrieval import retrieve_posts
+from discuss_nutshell.session import enable_cache
+from discuss_nutshell.summarize import (
+    CHUNK_TOKENS,
+    CONCURRENCY,
+    DEFAULT_QUERY,
+    FAN_OUT,
+    Summarizer,
+    load_post_blocks,
+)
+from discuss_nutshell.sync import RECHECK_POSTS, sync_topic
+from discuss_nutshell.visualize import PAGE_SIZE, create_visualization_app
 
 app = typer.Typer()
 
 current_path = Path.cwd()
 data_path = current_path / "data"
 DB_FILE = data_path / "posts_qa_logs.db"
+HTTP_CACHE_DIR = data_path / "http_cache"
+CLEAN_CACHE_FILE = data_path / "clean_cache.db"
+EMBEDDINGS_SUFFIX = ".emb.npz"
 
 
-def extract_text_from_file(file_path: str | Path) -> str:
+def extract_text_from_file(file_path: str | Path, posts: str | None = None) -> str:
     """Extract text from a file.
 
     Parameters
     ----------
     file_path : str | Path
         Path to the file to read.
+    posts : str | None, optional
+        Only extract this range of post numbers, e.g. '200-260', from a
+        posts text file or a Parquet file.
 
     Returns
     -------
     str
-        The contents of the file as a string.
+        The contents of the file as a string. A '{topic_id}_posts.parquet'
+        file is rendered in the layout of '{topic_id}_posts.txt'.
     """
+    post_range = parse_post_range(posts) if posts is not None else None
+    if Path(file_path).suffix == ".parquet":
+        names = {column: name for name, column in PARQUET_COLUMNS.items()}
+        columns = [column for _label, column in FIELDS]
+        df = read_posts_parquet(file_path, columns=[names[c] for c in columns])
+        if post_range is not None:
+            df = df[df["number"].between(*post_range)]
+        return render_posts_txt(df.rename(columns=PARQUET_COLUMNS))
+    if post_range is not None:
+        return "".join(read_post_blocks(file_path, *post_range))
     with Path(file_path).open(encoding="utf-8") as f:
         return f.read()
 
 
-def query_file(file: str | Path, query: str, model: str = "gemini-2.5-flash") -> str:
+def text_model(model: str = DEFAULT_MODEL, no_cache: bool = False) -> StreamingModel:
+    """Return a model, behind the response cache if it is enabled.
+
+    Parameters
+    ----------
+    model : str, optional
+        The model to use, e.g. 'gemini-2.5-flash', 'gpt-4.1-mini' or
+        'anthropic:claude-sonnet-4-5', see `models.model_backend`.
+    no_cache : bool, optional
+        Bypass the cache: always call the model and refresh the cached
+        response.
+
+    Returns
+    -------
+    StreamingModel
+        The model to call.
+
+    Notes
+    -----
+    Models share the process-wide client pool, so every query reuses one
+    client, and its open connections, per backend.
+    """
+    base = get_model(model)
+    cache = get_llm_cache()
+    if cache is None:
+        return base
+    return CachedModel(base, cache, model, bypass=no_cache)
+
+
+def query_context(
+    file: str | Path,
+    query: str,
+    posts: str | None = None,
+    top_k: int | None = None,
+    embeddings: bool = False,
+) -> list[str]:
+    """Build the prompt of a query about a file.
+
+    Parameters
+    ----------
+    file : str | Path
+        Path to the file to query.
+    query : str
+        The question or query about the file content.
+    posts : str | None, optional
+        Only send this range of post numbers, e.g. '200-260'.
+    top_k : int | None, optional
+        Only send the `top_k` posts most relevant to the query, ranked with
+        BM25. The whole file (or range) is sent if None.
+    embeddings : bool, optional
+        Rank posts by Gemini embedding similarity instead of BM25. The
+        embeddings are cached next to the file, in '*.emb.npz'.
+
+    Returns
+    -------
+    list[str]
+        The file text followed by the query.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the file does not exist.
+    """
+    file_path = Path(file)
+    if not file_path.exists():
+        msg = f"File not found: {file}"
+        raise FileNotFoundError(msg)
+
+    if top_k is None:
+        file_text = extract_text_from_file(file_path, posts)
+    else:
+        post_range = parse_post_range(posts) if posts is not None else None
+        blocks = load_post_blocks(file_path, post_range)
+        embedder = GeminiEmbedder() if embeddings else None
+        index_file = file_path.with_suffix(EMBEDDINGS_SUFFIX) if embeddings else None
+        file_text = "".join(retrieve_posts(blocks, query, top_k, embedder, index_file))
+    return [file_text, query]
+
+
+def query_file(
+    file: str | Path,
+    query: str,
+    model: str = DEFAULT_MODEL,
+    posts: str | None = None,
+    no_cache: bool = False,
+    top_k: int | None = None,
+    embeddings: bool = False,
+) -> str:
     """Query the file and return the response.
 
     Parameters
@@ -43,69 +194,536 @@ def query_file(file: str | Path, query: str, model: str = "gemini-2.5-flash") ->
     query : str
         The question or query about the file content.
     model : str, optional
-        The Gemini model to use. Default is "gemini-2.5-flash".
+        The model to use, see `text_model`.
+    posts : str | None, optional
+        Only send this range of post numbers, e.g. '200-260'.
+    no_cache : bool, optional
+        Bypass the response cache.
+    top_k : int | None, optional
+        Only send the `top_k` posts most relevant to the query.
+    embeddings : bool, optional
+        Rank posts by Gemini embedding similarity instead of BM25.
 
     Returns
     -------
     str
-        The response from the Gemini model.
+        The response from the model.
 
     Notes
     -----
-    Uses the Gemini API to generate responses. All interactions
-    are logged to the SQLite database.
+    The model reuses the pooled client of its backend. Repeated questions
+    about an unchanged file are answered from the response cache when it
+    is enabled. All interactions are logged to the SQLite database, with
+    the time spent reading, querying and logging and the tokens used.
+    """
+    metrics = CallMetrics(model, Path(file).name)
+    with metrics.stage("read"):
+        context = query_context(file, query, posts, top_k, embeddings)
+
+    with metrics.stage("model"):
+        response_text = text_model(model, no_cache).generate(context)
+    with metrics.stage("log"):
+        interaction_id = log_interaction(
+            filename=Path(file).name,
+            query=query,
+            context=context[0],
+            response=response_text,
+        )
+    log_metrics(interaction_id, metrics)
+
+    return response_text
+
+
+def stream_query_file(
+    file: str | Path,
+    query: str,
+    model: str = DEFAULT_MODEL,
+    posts: str | None = None,
+    no_cache: bool = False,
+    top_k: int | None = None,
+    embeddings: bool = False,
+) -> Iterator[str]:
+    """Query the file, yielding the response as it is generated.
+
+    Parameters
+    ----------
+    file : str | Path
+        Path to the file to query.
+    query : str
+        The question or query about the file content.
+    model : str, optional
+        The model to use, see `text_model`.
+    posts : str | None, optional
+        Only send this range of post numbers, e.g. '200-260'.
+    no_cache : bool, optional
+        Bypass the response cache.
+    top_k : int | None, optional
+        Only send the `top_k` posts most relevant to the query.
+    embeddings : bool, optional
+        Rank posts by Gemini embedding similarity instead of BM25.
+
+    Yields
+    ------
+    str
+        Consecutive pieces of the response.
+
+    Notes
+    -----
+    The whole response is logged once, after the last piece, with its
+    metrics. The model time excludes the time spent by the caller between
+    pieces.
+    """
+    metrics = CallMetrics(model, Path(file).name)
+    with metrics.stage("read"):
+        context = query_context(file, query, posts, top_k, embeddings)
+
+    pieces = []
+    for piece in metrics.stream(text_model(model, no_cache).stream(context)):
+        pieces.append(piece)
+        yield piece
+    with metrics.stage("log"):
+        interaction_id = log_interaction(
+            filename=Path(file).name,
+            query=query,
+            context=context[0],
+            response="".join(pieces),
+        )
+    log_metrics(interaction_id, metrics)
+
+
+def open_store(output: str | Path, store: bool) -> PostStore | None:
+    """Open the post store of an output directory.
+
+    Parameters
+    ----------
+    output : str | Path
+        Directory holding the processed files.
+    store : bool
+        Whether the post store is used at all.
+
+    Returns
+    -------
+    PostStore | None
+        Store saved as 'posts.db' in `output`, or None if `store` is False.
+    """
+    if not store:
+        return None
+    Path(output).mkdir(parents=True, exist_ok=True)
+    return PostStore(Path(output) / STORE_FILE.name)
+
+
+def post_summarizer(
+    output: str | Path, summaries: bool, model: str = DEFAULT_MODEL
+) -> PostSummarizer | None:
+    """Return the per-post summarizer of an output directory.
+
+    Parameters
+    ----------
+    output : str | Path
+        Directory holding the processed files.
+    summaries : bool
+        Whether posts are summarized at all.
+    model : str, optional
+        The model to use, see `text_model`.
+
+    Returns
+    -------
+    PostSummarizer | None
+        Summarizer keeping its summaries in the 'posts.db' of `output`, or
+        None if `summaries` is False.
+    """
+    if not summaries:
+        return None
+    Path(output).mkdir(parents=True, exist_ok=True)
+    cache = SummaryCache(Path(output) / STORE_FILE.name)
+    return PostSummarizer(text_model(model), cache, model)
+
+
+@app.command()
+def query(
+    file: str,
+    query: str,
+    model: str = DEFAULT_MODEL,
+    posts: str | None = None,
+    no_cache: bool = False,
+    top_k: int | None = None,
+    embeddings: bool = False,
+    stream: bool = False,
+) -> None:
+    """Query a file.
+
+    --model takes Gemini, OpenAI and Anthropic models, e.g. gpt-4.1-mini
+    or anthropic:claude-sonnet-4-5. Use --posts 200-260 to only send a
+    range of posts of a '{topic_id}_posts.txt' or a Parquet file, and
+    --no-cache to ask the model again instead of reusing a cached answer.
+    Use --top-k 20 to only send the 20 posts most relevant to the query,
+    ranked with BM25 or, with --embeddings, with Gemini embeddings. Use
+    --stream to print the answer as it is generated.
+    """
+    args = (file, query, model, posts, no_cache, top_k, embeddings)
+    if not stream:
+        print(query_file(*args))
+        return
+    for piece in stream_query_file(*args):
+        print(piece, end="", flush=True)
+    print()
+
+
+def summarize_file(
+    file: str | Path,
+    query: str = DEFAULT_QUERY,
+    model: str = DEFAULT_MODEL,
+    posts: str | None = None,
+    summarizer: Summarizer | None = None,
+) -> str:
+    """Answer a query about a long thread with chunked map-reduce.
+
+    Parameters
+    ----------
+    file : str | Path
+        A '{topic_id}_posts.txt', a '{topic_id}_posts.parquet' or a
+        '{topic_id}_all_posts.json' file.
+    query : str, optional
+        The question to answer about the thread.
+    model : str, optional
+        The model to use when `summarizer` is None.
+    posts : str | None, optional
+        Only summarize this range of post numbers, e.g. '200-260'.
+    summarizer : Summarizer | None, optional
+        Summarizer to use. One with default settings is created if None.
+
+    Returns
+    -------
+    str
+        The final summary.
+
+    Notes
+    -----
+    Unlike `query_file`, no model call receives the whole thread, see
+    `Summarizer`. The interaction is logged to the SQLite database.
     """
     file_path = Path(file)
     if not file_path.exists():
         msg = f"File not found: {file}"
         raise FileNotFoundError(msg)
 
-    filename = file_path.name
-    file_text = extract_text_from_file(file_path)
-    context = [file_text, query]
-
-    client = genai.Client()
-    response = client.models.generate_content(
-        model=model,
-        contents=context,
-    )
-
-    response_text = str(response.text)
+    post_range = parse_post_range(posts) if posts is not None else None
+    blocks = load_post_blocks(file_path, post_range)
+    summarizer = summarizer or Summarizer(text_model(model))
+    response_text = summarizer.summarize(blocks, query)
     log_interaction(
-        filename=filename,
+        filename=file_path.name,
         query=query,
-        full_context=context[0] + context[1],
+        context="".join(blocks),
         response=response_text,
     )
-
     return response_text
 
 
 @app.command()
-def query(file: str, query: str, model: str = "gemini-2.5-flash") -> None:
-    """Query a file."""
-    response = query_file(file, query, model)
-    print(response)
+def summarize(
+    file: str,
+    query: str = DEFAULT_QUERY,
+    model: str = DEFAULT_MODEL,
+    posts: str | None = None,
+    chunk_tokens: int = CHUNK_TOKENS,
+    max_posts: int | None = None,
+    fan_out: int = FAN_OUT,
+    concurrency: int = CONCURRENCY,
+    no_cache: bool = False,
+) -> None:
+    """Summarize a long thread in token-budgeted chunks.
+
+    Use --max-posts 10 to query in chunks of at most 10 posts.
+    """
+    summarizer = Summarizer(
+        text_model(model, no_cache), chunk_tokens, fan_out, concurrency, max_posts
+    )
+    print(summarize_file(file, query, model, posts, summarizer))
+
+
+def batch_files(
+    manifest: str | Path,
+    model: str = DEFAULT_MODEL,
+    concurrency: int = BATCH_CONCURRENCY,
+    no_cache: bool = False,
+) -> pd.DataFrame:
+    """Ask every prompt of a manifest about every file of it.
+
+    Parameters
+    ----------
+    manifest : str | Path
+        JSON manifest of files and prompts, see `load_manifest`.
+    model : str, optional
+        The model to use, see `text_model`.
+    concurrency : int, optional
+        Maximum number of requests in flight.
+    no_cache : bool, optional
+        Bypass the response cache.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per file and prompt, see `BatchRunner.run`.
+
+    Notes
+    -----
+    Every request goes through one model and client. The successful
+    interactions are logged to the SQLite database in one transaction.
+    """
+    files, prompts = load_manifest(manifest)
+    texts = {str(file): extract_text_from_file(file) for file in files}
+    runner = BatchRunner(text_model(model, no_cache), concurrency)
+    results = asyncio.run(runner.run(texts, prompts))
+    ok = results[results["status"] == "ok"]
+    log_interactions(
+        (Path(file).name, prompt, texts[file], response)
+        for file, prompt, response in zip(
+            ok["file"], ok["prompt"], ok["response"], strict=True
+        )
+    )
+    return results
 
 
 @app.command()
-def visualize(json_file: str = "104906_all_posts.json") -> None:
-    """Visualize Discourse posts as cards."""
-    app = create_visualization_app(json_file)
+def batch(
+    manifest: str,
+    model: str = DEFAULT_MODEL,
+    concurrency: int = BATCH_CONCURRENCY,
+    no_cache: bool = False,
+    output: str | None = None,
+) -> None:
+    """Ask many questions about many files concurrently.
+
+    The manifest is a JSON file such as {"files": ["*_all_posts.json"],
+    "prompts": ["..."]}, the standard prompts being used if "prompts" is
+    missing. Use --output results.csv to save the full responses.
+    """
+    results = batch_files(manifest, model, concurrency, no_cache)
+    if output is not None:
+        results.to_csv(output, index=False)
+    print(results_table(results))
+
+
+@app.command()
+def visualize(
+    json_file: str = "104906_all_posts.json", page_size: int = PAGE_SIZE
+) -> None:
+    """Visualize Discourse posts as cards, a page at a time."""
+    app = create_visualization_app(json_file, page_size)
     app.launch()
 
 
 @app.command()
 def load(
-    topic_id: int, output: str = "data", process: bool = False, verbose: bool = False
+    topic_id: int,
+    output: str = "data",
+    process: bool = False,
+    verbose: bool = False,
+    workers: int = 1,
+    chunk_size: int = CLEAN_CHUNK_SIZE,
+    store: bool = False,
+    post_files: bool = True,
+    parquet: bool = False,
+    summaries: bool = False,
+    model: str = DEFAULT_MODEL,
+) -> None:
+    """Load a Discourse topic.
+
+    Use --workers 0 to clean posts on every core, and --store to also save
+    processed posts to the 'posts.db' post store. With --process, use
+    --summaries to summarize new and edited posts into
+    '{topic_id}_summaries.txt'.
+    """
+    load_topic(
+        topic_id,
+        output,
+        process,
+        verbose,
+        workers or None,
+        chunk_size=chunk_size,
+        store=open_store(output, store),
+        post_files=post_files,
+        parquet=parquet,
+        summarizer=post_summarizer(output, summaries, model),
+    )
+
+
+@app.command()
+def process(
+    file: str,
+    topic_id: int,
+    output: str = "data",
+    verbose: bool = False,
+    workers: int = 1,
+    chunk_size: int = CLEAN_CHUNK_SIZE,
+    batch_size: int = POST_BATCH_SIZE,
+    store: bool = False,
+    post_files: bool = True,
+    parquet: bool = False,
+    summaries: bool = False,
+    model: str = DEFAULT_MODEL,
+) -> None:
+    """Process a saved topic or posts file, streaming it from disk.
+
+    Use --summaries to also summarize new and edited posts into
+    '{topic_id}_summaries.txt', a compact context for the query command.
+    """
+    count = process_topic_file(
+        file,
+        topic_id,
+        output,
+        verbose,
+        workers or None,
+        chunk_size,
+        batch_size,
+        store=open_store(output, store),
+        post_files=post_files,
+        parquet=parquet,
+        summarizer=post_summarizer(output, summaries, model),
+    )
+    print(f"Processed {count} posts")
+
+
+@app.command()
+def ingest(
+    topic_ids: Annotated[list[int] | None, typer.Argument()] = None,
+    category: str | None = None,
+    tag: str | None = None,
+    output: str = "data",
+    process: bool = True,
+    rate: float = REQUESTS_PER_SECOND,
+    concurrency: int = MAX_CONCURRENCY,
+    verbose: bool = False,
+    store: bool = False,
+    post_files: bool = True,
+    parquet: bool = False,
 ) -> None:
-    """Load a Discourse topic."""
-    load_topic(topic_id, output, process, verbose)
+    """Load many Discourse topics, or a whole category or tag, concurrently."""
+    results = asyncio.run(
+        ingest_many(
+            topic_ids,
+            category,
+            tag,
+            output,
+            process,
+            rate,
+            concurrency,
+            verbose,
+            store=open_store(output, store),
+            post_files=post_files,
+            parquet=parquet,
+        )
+    )
+    print(f"Ingested {sum(results.values())} posts from {len(results)} topics")
+
+
+@app.command()
+def sync(
+    topic_id: int,
+    output: str = "data",
+    recheck: int = RECHECK_POSTS,
+    verbose: bool = False,
+    store: bool = False,
+    post_files: bool = True,
+    parquet: bool = False,
+    summaries: bool = False,
+    model: str = DEFAULT_MODEL,
+) -> None:
+    """Fetch and process only new and edited posts of a Discourse topic.
+
+    Use --parquet to also keep '{topic_id}_posts.parquet' up to date, and
+    --summaries to summarize new and edited posts into
+    '{topic_id}_summaries.txt'.
+    """
+    sync_topic(
+        topic_id,
+        output,
+        recheck=recheck,
+        verbose=verbose,
+        store=open_store(output, store),
+        post_files=post_files,
+        parquet=parquet,
+        summarizer=post_summarizer(output, summaries, model),
+    )
+
+
+@app.command()
+def export_posts(
+    topic_id: int | None = None, output: str = "data", store_dir: str = "data"
+) -> None:
+    """Write 'post_{id}.txt' files from the post store."""
+    post_store = PostStore(Path(store_dir) / STORE_FILE.name)
+    count = post_store.export_post_files(output, topic_id)
+    print(f"Exported {count} posts to {output}")
+
+
+@app.command()
+def search(
+    text: str,
+    file: str | None = None,
+    since: str | None = None,
+    limit: int = SEARCH_LIMIT,
+    width: int = 80,
+) -> None:
+    """Search past queries and responses, best matches first.
+
+    Use --file 104906_posts.txt to only search questions about one file, and
+    --since 2025-11-01 to skip older ones.
+    """
+    results = search_interactions(DB_FILE, text, limit, file, since)
+    if results.empty:
+        print("No matching interactions.")
+        return
+    table = results.assign(
+        timestamp=results["timestamp"].str.slice(0, 16),
+        query=results["query"].str.slice(0, width),
+        response=results["response"]
+        .str.replace(r"\s+", " ", regex=True)
+        .str.slice(0, width),
+    )
+    print(table.to_string(index=False))
+
+
+@app.command()
+def stats(since: str | None = None) -> None:
+    """Report latency and token percentiles per model and per file.
+
+    Latencies are in seconds: 'total' from reading the file to logging the
+    answer, and 'first_token' for streamed answers. Use --since 2025-11-01
+    to skip older queries.
+    """
+    metrics = read_metrics(DB_FILE, since)
+    if metrics.empty:
+        print("No recorded queries.")
+        return
+    for by, title in (("model", "Per model"), ("post_name", "Per file")):
+        print(f"{title}:")
+        print(metrics_stats(metrics, by).round(2).to_string())
+        print()
+
+
+@app.command()
+def migrate_logs(db_file: str = str(DB_FILE), codec: str = CODEC) -> None:
+    """Store the contexts of logged interactions once each, compressed.
+
+    Converts a log database written with the full context of every
+    interaction and vacuums it. Use --codec zstd, zlib or none.
+    """
+    size = Path(db_file).stat().st_size
+    count = migrate_db(db_file, codec)
+    print(
+        f"Migrated {count} interactions: "
+        f"{size:,} -> {Path(db_file).stat().st_size:,} bytes"
+    )
 
 
 def main() -> None:
     """Discuss Nutshell CLI."""
-    init_db()
+    enable_interaction_logger(DB_FILE)
+    enable_cache(HTTP_CACHE_DIR)
+    enable_clean_cache(CLEAN_CACHE_FILE)
+    enable_llm_cache(DB_FILE)
     app()
 
 
@@ -0,0 +1,242 @@
+"""Columnar Parquet output of processed posts."""
+
+import os
+import tempfile
+from collections.abc import Sequence
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Self
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = ds = pq = None
+
+PARQUET_SUFFIX = "_posts.parquet"
+COMPRESSION = "zstd"
+
+# Processed frame column of each Parquet column, same names as the JSON output
+PARQUET_COLUMNS = {
+    "id": "id",
+    "topic_id": "topic_id",
+    "number": "post_number",
+    "author": "name",
+    "created_at": "created_at",
+    "clean_content": "clean_cooked",
+}
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        msg = "Parquet output requires pyarrow: pip install discuss-nutshell[parquet]"
+        raise ImportError(msg)
+
+
+def _schema() -> Any:
+    return pa.schema(
+        [
+            ("id", pa.int64()),
+            ("topic_id", pa.int64()),
+            ("number", pa.int64()),
+            ("author", pa.string()),
+            ("created_at", pa.string()),
+            ("clean_content", pa.string()),
+        ]
+    )
+
+
+def parquet_path(topic_id: int, output_path: str | Path) -> Path:
+    """Return the path of the Parquet file of a topic.
+
+    Parameters
+    ----------
+    topic_id : int
+        ID of the topic.
+    output_path : str | Path
+        Directory holding the processed files.
+
+    Returns
+    -------
+    Path
+        Path of '{topic_id}_posts.parquet'.
+    """
+    return Path(output_path) / f"{topic_id}{PARQUET_SUFFIX}"
+
+
+def posts_table(df: pd.DataFrame, topic_id: int) -> Any:
+    """Convert processed posts to an Arrow table.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame containing posts with columns: id, name, created_at,
+        post_number, and clean_cooked.
+    topic_id : int
+        ID of the topic, stored in every row.
+
+    Returns
+    -------
+    pyarrow.Table
+        Table with the columns of `PARQUET_COLUMNS`.
+    """
+    _require_pyarrow()
+    columns = {
+        name: df[column]
+        for name, column in PARQUET_COLUMNS.items()
+        if name != "topic_id"
+    }
+    frame = pd.DataFrame(columns).assign(topic_id=topic_id)
+    return pa.Table.from_pandas(frame, schema=_schema(), preserve_index=False)
+
+
+class PostsParquetWriter:
+    """Write processed posts to a Parquet file one batch at a time.
+
+    Parameters
+    ----------
+    topic_id : int
+        ID of the topic.
+    output_path : str | Path
+        Directory where '{topic_id}_posts.parquet' should be written.
+
+    Notes
+    -----
+    Each batch becomes a row group, compressed with zstd. The file is
+    written under a temporary name and replaces the previous one when the
+    context exits without an error.
+    """
+
+    def __init__(self, topic_id: int, output_path: str | Path) -> None:
+        _require_pyarrow()
+        self.topic_id = topic_id
+        self.path = parquet_path(topic_id, output_path)
+        self._tmp_path: Path | None = None
+        self._writer: Any = None
+
+    def __enter__(self) -> Self:
+        fd, tmp_name = tempfile.mkstemp(
+            dir=self.path.parent, prefix=f".{self.path.name}."
+        )
+        os.close(fd)
+        self._tmp_path = Path(tmp_name)
+        self._writer = pq.ParquetWriter(
+            self._tmp_path, _schema(), compression=COMPRESSION
+        )
+        return self
+
+    def write(self, df: pd.DataFrame) -> None:
+        """Append processed posts as a row group.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            DataFrame containing posts with columns: id, name, created_at,
+            post_number, and clean_cooked.
+        """
+        if self._writer is None:
+            msg = "PostsParquetWriter must be used as a context manager"
+            raise RuntimeError(msg)
+        if not df.empty:
+            self._writer.write_table(posts_table(df, self.topic_id))
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if self._writer is None or self._tmp_path is None:
+            return
+        self._writer.close()
+        self._writer = None
+        if exc_type is None:
+            self._tmp_path.replace(self.path)
+        else:
+            self._tmp_path.unlink(missing_ok=True)
+
+
+def write_posts_parquet(df: pd.DataFrame, topic_id: int, output_path: Path) -> Path:
+    """Write all posts from a topic to a Parquet file.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame containing posts with columns: id, name, created_at,
+        post_number, and clean_cooked.
+    topic_id : int
+        ID of the topic.
+    output_path : Path
+        Directory where the Parquet file should be written.
+
+    Returns
+    -------
+    Path
+        Path of '{topic_id}_posts.parquet'.
+    """
+    with PostsParquetWriter(topic_id, output_path) as writer:
+        writer.write(df)
+    return writer.path
+
+
+def read_posts_parquet(
+    file_path: str | Path, columns: Sequence[str] | None = None
+) -> pd.DataFrame:
+    """Read processed posts from a Parquet file.
+
+    Parameters
+    ----------
+    file_path : str | Path
+        Path of a '{topic_id}_posts.parquet' file.
+    columns : Sequence[str] | None, optional
+        Columns to read, e.g. ``["number", "clean_content"]``. Every column
+        is read if None.
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame with the requested columns of `PARQUET_COLUMNS`.
+
+    Notes
+    -----
+    The file is memory-mapped and only the requested columns are decoded.
+    """
+    _require_pyarrow()
+    columns = list(columns) if columns is not None else None
+    table = pq.read_table(file_path, columns=columns, memory_map=True)
+    return table.to_pandas()
+
+
+def read_all_posts_parquet(
+    output_path: str | Path, columns: Sequence[str] | None = None
+) -> pd.DataFrame:
+    """Read the processed posts of every topic in a directory.
+
+    Parameters
+    ----------
+    output_path : str | Path
+        Directory holding '{topic_id}_posts.parquet' files.
+    columns : Sequence[str] | None, optional
+        Columns to read. Every column is read if None.
+
+    Returns
+    -------
+    pd.DataFrame
+        Posts of all topics, one file after the other.
+
+    Notes
+    -----
+    The files are read as one Arrow dataset, in parallel, decoding only
+    the requested columns.
+    """
+    _require_pyarrow()
+    files = sorted(str(path) for path in Path(output_path).glob(f"*{PARQUET_SUFFIX}"))
+    if not files:
+        names = list(columns) if columns is not None else list(PARQUET_COLUMNS)
+        return pd.DataFrame(columns=names)
+    dataset = ds.dataset(files, format="parquet", schema=_schema())
+    columns = list(columns) if columns is not None else None
+    return dataset.to_table(columns=columns).to_pandas()
@@ -1,32 +1,52 @@
 """Load data from Discourse"""
 
 import os
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
+from typing import Any
 
 import requests
 
+from discuss_nutshell.columnar import PostsParquetWriter, write_posts_parquet
+from discuss_nutshell.json_stream import iter_posts
+from discuss_nutshell.post_store import PostStore
+from discuss_nutshell.post_summaries import (
+    PostSummarizer,
+    summaries_writer,
+    write_summaries_txt,
+)
+from discuss_nutshell.posts_txt import PostsTxtWriter, posts_txt_path
 from discuss_nutshell.preprocessor import (
-    clean_cooked_posts,
-    create_dataframe,
-    drop_columns,
+    CLEAN_CHUNK_SIZE,
+    POST_BATCH_SIZE,
     extract_posts,
-    format_created_at,
-    read_json,
+    iter_processed_posts,
+    post_records,
+    process_posts,
+    write_json,
+    write_json_items,
     write_post_files,
     write_posts_json,
     write_posts_txt,
 )
-from discuss_nutshell.utils import display_dataframe
+from discuss_nutshell.session import fetch_json, get_cache, get_session
+from discuss_nutshell.utils import atomic_open, display_dataframe
 
 token = os.environ.get("DISCOURSE_API_KEY")
 headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
 REQUEST_TIMEOUT = 30  # seconds
 
+BASE_URL = "https://discuss.python.org"
+POSTS_PER_REQUEST = 20  # Discourse's own chunk size for post_stream pages
+MAX_WORKERS = 8
+
 current_path = Path.cwd()
 data_path = current_path / "data"
 
 
-def load_topic(topic, filename):
+def get_topic(topic, filename):
     """Get a topic from Discourse API and save to JSON file.
 
     Parameters
@@ -38,10 +58,11 @@ def load_topic(topic, filename):
 
     Notes
     -----
-    The topic_id parameter is currently hardcoded to 104906 in the function body.
+    This makes a single request, so Discourse only returns the first page
+    of posts. Use `fetch_topic` to retrieve every post of a long topic.
     """
     response = requests.get(
-        f"https://discuss.python.org/t/{topic}.json?print=true",
+        f"{BASE_URL}/t/{topic}.json?print=true",
         headers=headers,
         timeout=REQUEST_TIMEOUT,
     )
@@ -51,25 +72,430 @@ def load_topic(topic, filename):
         f.write(response.text)
 
 
-if __name__ == "__main__":
-    TOPIC_ID = 104906
+def get_json(url: str, params: dict[str, Any] | None = None) -> dict[str, Any]:
+    """Get a JSON document from the Discourse API.
+
+    Parameters
+    ----------
+    url : str
+        URL of the endpoint.
+    params : dict[str, Any] | None, optional
+        Query string parameters.
+
+    Returns
+    -------
+    dict[str, Any]
+        Parsed JSON response.
+
+    Raises
+    ------
+    requests.HTTPError
+        If the response has an error status code.
+
+    Notes
+    -----
+    Requests share one pooled session. When the response cache is enabled,
+    unchanged documents are revalidated with a conditional request and
+    served from the cache.
+    """
+    return fetch_json(
+        get_session(),
+        url,
+        params,
+        cache=get_cache(),
+        headers=headers,
+        timeout=REQUEST_TIMEOUT,
+    )
+
+
+def missing_post_ids(data: dict[str, Any]) -> list[int]:
+    """List the post ids in the topic stream that have not been loaded yet.
+
+    Parameters
+    ----------
+    data : dict[str, Any]
+        Discourse topic data containing post_stream.
+
+    Returns
+    -------
+    list[int]
+        Post ids from ``post_stream.stream`` missing from
+        ``post_stream.posts``, in stream order.
+    """
+    post_stream = data["post_stream"]
+    loaded = {post["id"] for post in post_stream["posts"]}
+    return [
+        post_id for post_id in post_stream.get("stream", []) if post_id not in loaded
+    ]
+
+
+def chunk_ids(post_ids: list[int], size: int) -> list[list[int]]:
+    """Split post ids into chunks.
+
+    Parameters
+    ----------
+    post_ids : list[int]
+        Post ids to split.
+    size : int
+        Maximum number of ids per chunk.
+
+    Returns
+    -------
+    list[list[int]]
+        Consecutive chunks of at most `size` ids.
+    """
+    if size < 1:
+        msg = f"Chunk size must be positive, got {size}"
+        raise ValueError(msg)
+    return [post_ids[i : i + size] for i in range(0, len(post_ids), size)]
+
+
+def merge_posts(
+    data: dict[str, Any], posts: Iterable[dict[str, Any]]
+) -> dict[str, Any]:
+    """Merge fetched posts into the topic's post stream.
+
+    Parameters
+    ----------
+    data : dict[str, Any]
+        Discourse topic data containing post_stream.
+    posts : Iterable[dict[str, Any]]
+        Additional posts to merge.
+
+    Returns
+    -------
+    dict[str, Any]
+        A copy of the topic data with ``post_stream.posts`` holding every
+        known post in stream order. `data` itself is left untouched.
+    """
+    post_stream = data["post_stream"]
+    by_id = {post["id"]: post for post in post_stream["posts"]}
+    by_id.update({post["id"]: post for post in posts})
+    stream = post_stream.get("stream") or sorted(
+        by_id, key=lambda post_id: by_id[post_id]["post_number"]
+    )
+    merged = [by_id[post_id] for post_id in stream if post_id in by_id]
+    return {**data, "post_stream": {**post_stream, "posts": merged}}
+
+
+def fetch_posts(
+    topic: int, post_ids: list[int], base_url: str = BASE_URL
+) -> list[dict[str, Any]]:
+    """Fetch a batch of posts of a topic by id.
+
+    Parameters
+    ----------
+    topic : int
+        The ID of the topic.
+    post_ids : list[int]
+        Ids of the posts to fetch.
+    base_url : str, optional
+        Base URL of the Discourse instance.
+
+    Returns
+    -------
+    list[dict[str, Any]]
+        The requested posts.
+    """
+    data = get_json(f"{base_url}/t/{topic}/posts.json", params={"post_ids[]": post_ids})
+    return extract_posts(data)
+
 
-    current_path = Path.cwd()
-    data_path = current_path / "data"
-    file_path = data_path / f"topic_{TOPIC_ID}.json"
+def fetch_post_batches(
+    topic: int,
+    post_ids: list[int],
+    base_url: str = BASE_URL,
+    chunk_size: int = POSTS_PER_REQUEST,
+    max_workers: int = MAX_WORKERS,
+) -> list[dict[str, Any]]:
+    """Fetch posts of a topic in batches over a thread pool.
 
-    # Write a json file for a topic with all the posts
-    load_topic(TOPIC_ID, file_path)
+    Parameters
+    ----------
+    topic : int
+        The ID of the topic.
+    post_ids : list[int]
+        Ids of the posts to fetch.
+    base_url : str, optional
+        Base URL of the Discourse instance.
+    chunk_size : int, optional
+        Number of posts requested per call to ``/t/{topic}/posts.json``.
+    max_workers : int, optional
+        Maximum number of concurrent requests.
+
+    Returns
+    -------
+    list[dict[str, Any]]
+        The fetched posts, in the order of `post_ids`.
+    """
+    chunks = chunk_ids(post_ids, chunk_size)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        batches = executor.map(
+            lambda chunk: fetch_posts(topic, chunk, base_url), chunks
+        )
+        return [post for batch in batches for post in batch]
+
+
+def fetch_topic(
+    topic: int,
+    base_url: str = BASE_URL,
+    chunk_size: int = POSTS_PER_REQUEST,
+    max_workers: int = MAX_WORKERS,
+) -> dict[str, Any]:
+    """Fetch a topic with all of its posts.
+
+    Parameters
+    ----------
+    topic : int
+        The ID of the topic to retrieve.
+    base_url : str, optional
+        Base URL of the Discourse instance.
+    chunk_size : int, optional
+        Number of posts requested per call to ``/t/{topic}/posts.json``.
+    max_workers : int, optional
+        Maximum number of concurrent requests.
+
+    Returns
+    -------
+    dict[str, Any]
+        Discourse topic data whose ``post_stream.posts`` contains every post
+        listed in ``post_stream.stream``, in order.
+
+    Notes
+    -----
+    The topic endpoint only returns the first page of posts together with the
+    ids of all posts. The remaining posts are fetched in batches over a
+    thread pool and merged back in stream order.
+    """
+    data = get_json(f"{base_url}/t/{topic}.json", params={"print": "true"})
+    posts = fetch_post_batches(
+        topic, missing_post_ids(data), base_url, chunk_size, max_workers
+    )
+    return merge_posts(data, posts)
+
+
+def process_topic(
+    data: dict[str, Any],
+    topic_id: int,
+    output_path: Path,
+    verbose: bool = False,
+    workers: int | None = 1,
+    chunk_size: int = CLEAN_CHUNK_SIZE,
+    store: PostStore | None = None,
+    post_files: bool = True,
+    parquet: bool = False,
+    summarizer: PostSummarizer | None = None,
+) -> None:
+    """Run the preprocessing pipeline on a topic and write the outputs.
+
+    Parameters
+    ----------
+    data : dict[str, Any]
+        Discourse topic data containing post_stream.
+    topic_id : int
+        ID of the topic.
+    output_path : Path
+        Directory where the processed files should be written.
+    verbose : bool, optional
+        Display the processed dataframe.
+    workers : int | None, optional
+        Number of processes cleaning the HTML. None uses every core.
+    chunk_size : int, optional
+        Number of posts sent to a worker process at once.
+    store : PostStore | None, optional
+        Also write the posts to this store.
+    post_files : bool, optional
+        Write one 'post_{id}.txt' file per post.
+    parquet : bool, optional
+        Also write the posts to '{topic_id}_posts.parquet'.
+    summarizer : PostSummarizer | None, optional
+        Also summarize each new or edited post and write the summaries to
+        '{topic_id}_summaries.txt'.
+    """
+    df = process_posts(extract_posts(data), workers=workers, chunk_size=chunk_size)
+    if summarizer is not None:
+        df = summarizer.summarize_posts(df)
+    if verbose:
+        display_dataframe(df)
 
-    data = read_json(file_path)
-    posts = extract_posts(data)
+    if store is not None:
+        store.write(df)
+    if post_files:
+        write_post_files(df, output_path)
+    write_posts_json(df, topic_id, output_path)
+    write_posts_txt(df, topic_id, output_path)
+    if parquet:
+        write_posts_parquet(df, topic_id, output_path)
+    if summarizer is not None:
+        write_summaries_txt(df, topic_id, output_path)
 
-    df = create_dataframe(posts)
-    df = drop_columns(df)
-    df = format_created_at(df)
-    df = clean_cooked_posts(df)
-    display_dataframe(df)
 
-    write_post_files(df, data_path)
-    write_posts_json(df, TOPIC_ID, data_path)
-    write_posts_txt(df, data_path)
+def process_topic_file(
+    file_path: str | Path,
+    topic_id: int,
+    output_path: str | Path,
+    verbose: bool = False,
+    workers: int | None = 1,
+    chunk_size: int = CLEAN_CHUNK_SIZE,
+    batch_size: int = POST_BATCH_SIZE,
+    store: PostStore | None = None,
+    post_files: bool = True,
+    parquet: bool = False,
+    summarizer: PostSummarizer | None = None,
+) -> int:
+    """Run the preprocessing pipeline on a topic file of any size.
+
+    Parameters
+    ----------
+    file_path : str | Path
+        Raw Discourse topic, list of raw posts, or '{topic_id}_all_posts.json'
+        list of processed records, which is not cleaned again.
+    topic_id : int
+        ID used to name '{topic_id}_all_posts.json'.
+    output_path : str | Path
+        Directory where the processed files should be written.
+    verbose : bool, optional
+        Print progress information.
+    workers : int | None, optional
+        Number of processes cleaning the HTML. None uses every core.
+    chunk_size : int, optional
+        Number of posts sent to a worker process at once.
+    batch_size : int, optional
+        Number of posts read and processed together.
+    store : PostStore | None, optional
+        Also write the posts to this store.
+    post_files : bool, optional
+        Write one 'post_{id}.txt' file per post.
+    parquet : bool, optional
+        Also write the posts to '{topic_id}_posts.parquet', one row group
+        per batch.
+    summarizer : PostSummarizer | None, optional
+        Also summarize each new or edited post and write the summaries to
+        '{topic_id}_summaries.txt'.
+
+    Returns
+    -------
+    int
+        Number of posts processed.
+
+    Notes
+    -----
+    Unlike `process_topic`, the file is never loaded whole: posts are
+    streamed from disk, processed in batches, and each batch is written
+    to every output before the next one is read. Memory use is bounded by
+    `batch_size`, so exports of hundreds of MB fit in small containers.
+    '{topic_id}_all_posts.json' replaces the previous file only once every
+    post is written, so the file written by a previous run can be
+    processed again in place.
+    """
+    output_path = Path(output_path)
+    output_path.mkdir(parents=True, exist_ok=True)
+    json_file = output_path / f"{topic_id}_all_posts.json"
+    count = 0
+    with (
+        PostsTxtWriter(posts_txt_path(topic_id, output_path)) as txt_writer,
+        atomic_open(json_file) as f,
+        (
+            PostsParquetWriter(topic_id, output_path) if parquet else nullcontext()
+        ) as parquet_writer,
+        (
+            summaries_writer(topic_id, output_path)
+            if summarizer is not None
+            else nullcontext()
+        ) as summaries_txt_writer,
+    ):
+        f.write("[")
+        empty = True
+        for batch in iter_processed_posts(
+            iter_posts(file_path), batch_size, workers, chunk_size
+        ):
+            df = batch if summarizer is None else summarizer.summarize_posts(batch)
+            if store is not None:
+                store.write(df)
+            if post_files:
+                write_post_files(df, output_path)
+            txt_writer.write(df)
+            if parquet_writer is not None:
+                parquet_writer.write(df)
+            if summaries_txt_writer is not None:
+                summaries_txt_writer.write(df)
+            empty = write_json_items(f, post_records(df), empty)
+            count += len(df)
+            if verbose:
+                print(f"Processed {count} posts")
+        f.write("]" if empty else "\n]")
+    return count
+
+
+def load_topic(
+    topic_id: int,
+    output: str | Path = "data",
+    process: bool = False,
+    verbose: bool = False,
+    workers: int | None = 1,
+    chunk_size: int = CLEAN_CHUNK_SIZE,
+    store: PostStore | None = None,
+    post_files: bool = True,
+    parquet: bool = False,
+    summarizer: PostSummarizer | None = None,
+) -> dict[str, Any]:
+    """Fetch a complete topic and save it to a JSON file.
+
+    Parameters
+    ----------
+    topic_id : int
+        The ID of the topic to retrieve.
+    output : str | Path, optional
+        Directory where 'topic_{topic_id}.json' should be saved.
+    process : bool, optional
+        Also run the preprocessing pipeline and write the post files.
+    verbose : bool, optional
+        Print progress information.
+    workers : int | None, optional
+        Number of processes cleaning the HTML. None uses every core.
+    chunk_size : int, optional
+        Number of posts sent to a worker process at once.
+    store : PostStore | None, optional
+        Also write the processed posts to this store.
+    post_files : bool, optional
+        Write one 'post_{id}.txt' file per processed post.
+    parquet : bool, optional
+        Also write the processed posts to '{topic_id}_posts.parquet'.
+    summarizer : PostSummarizer | None, optional
+        Also summarize the processed posts into '{topic_id}_summaries.txt'.
+
+    Returns
+    -------
+    dict[str, Any]
+        Discourse topic data with all posts.
+    """
+    output_path = Path(output)
+    output_path.mkdir(parents=True, exist_ok=True)
+    file_path = output_path / f"topic_{topic_id}.json"
+
+    data = fetch_topic(topic_id)
+    write_json(data, file_path)
+    if verbose:
+        print(f"Saved {len(extract_posts(data))} posts to {file_path}")
+
+    if process:
+        process_topic(
+            data,
+            topic_id,
+            output_path,
+            verbose,
+            workers,
+            chunk_size,
+            store=store,
+            post_files=post_files,
+            parquet=parquet,
+            summarizer=summarizer,
+        )
+    return data
+
+
+if __name__ == "__main__":
+    TOPIC_ID = 104906
+
+    # Write a json file for a topic with all the posts and process it
+    load_topic(TOPIC_ID, data_path, process=True, verbose=True)
@@ -1,13 +1,357 @@
 """Log data to SQLite database."""
 
+import atexit
+import hashlib
+import logging
+import queue
 import sqlite3
+import threading
 import uuid
+import zlib
+from collections.abc import Iterable
 from datetime import UTC, datetime
 from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+from discuss_nutshell.metrics import CallMetrics
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
 
 current_path = Path.cwd()
 data_path = current_path / "data"
 DB_FILE = data_path / "posts_qa_logs.db"
+BATCH_SIZE = 500  # rows written per transaction at most
+CODEC = "zlib"
+CODECS = ("none", "zlib", "zstd")
+SEARCH_LIMIT = 20
+SCHEMA_VERSION = 1  # PRAGMA user_version of a database with every table
+
+CREATE_TABLES = [
+    """CREATE TABLE IF NOT EXISTS contexts (
+       hash TEXT PRIMARY KEY,
+       codec TEXT,
+       size INTEGER,
+       data BLOB)""",
+    """CREATE TABLE IF NOT EXISTS interactions (
+       id TEXT PRIMARY KEY,
+       timestamp TEXT,
+       post_name TEXT,
+       query TEXT,
+       context_hash TEXT REFERENCES contexts (hash),
+       response TEXT)""",
+    "CREATE INDEX IF NOT EXISTS interactions_timestamp ON interactions (timestamp)",
+    """CREATE INDEX IF NOT EXISTS interactions_post_name
+       ON interactions (post_name, timestamp)""",
+    # Full-text index of the interactions, kept in sync by the triggers
+    """CREATE VIRTUAL TABLE IF NOT EXISTS interactions_fts USING fts5(
+       query, response, content='interactions', content_rowid='rowid')""",
+    """CREATE TRIGGER IF NOT EXISTS interactions_ai AFTER INSERT ON interactions
+       BEGIN
+           INSERT INTO interactions_fts (rowid, query, response)
+           VALUES (new.rowid, new.query, new.response);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS interactions_ad AFTER DELETE ON interactions
+       BEGIN
+           INSERT INTO interactions_fts (interactions_fts, rowid, query, response)
+           VALUES ('delete', old.rowid, old.query, old.response);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS interactions_au AFTER UPDATE ON interactions
+       BEGIN
+           INSERT INTO interactions_fts (interactions_fts, rowid, query, response)
+           VALUES ('delete', old.rowid, old.query, old.response);
+           INSERT INTO interactions_fts (rowid, query, response)
+           VALUES (new.rowid, new.query, new.response);
+       END""",
+    """CREATE TABLE IF NOT EXISTS metrics (
+       interaction_id TEXT REFERENCES interactions (id),
+       timestamp TEXT,
+       post_name TEXT,
+       model TEXT,
+       cached INTEGER,
+       read_seconds REAL,
+       model_seconds REAL,
+       log_seconds REAL,
+       total_seconds REAL,
+       first_token_seconds REAL,
+       input_tokens INTEGER,
+       output_tokens INTEGER)""",
+    "CREATE INDEX IF NOT EXISTS metrics_timestamp ON metrics (timestamp)",
+]
+INSERT = "INSERT INTO interactions VALUES (?, ?, ?, ?, ?, ?)"
+INSERT_METRICS = "INSERT INTO metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+_logger: "InteractionLogger | None" = None
+_STOP = None  # queue item ending the writer thread
+
+
+def context_hash(context: str) -> str:
+    """Return the key of a context in the contexts table.
+
+    Parameters
+    ----------
+    context : str
+        Context sent with a query, e.g. the file text.
+
+    Returns
+    -------
+    str
+        SHA-256 hex digest of the context.
+    """
+    return hashlib.sha256(context.encode()).hexdigest()
+
+
+def encode_context(context: str, codec: str = CODEC) -> tuple[str, bytes]:
+    """Compress a context for storage.
+
+    Parameters
+    ----------
+    context : str
+        Context sent with a query.
+    codec : str, optional
+        One of `CODECS`. 'zstd' needs the zstandard package.
+
+    Returns
+    -------
+    tuple[str, bytes]
+        Codec actually used and the stored bytes. Contexts that do not
+        shrink are stored as they are, with codec 'none'.
+
+    Raises
+    ------
+    ValueError
+        If the codec is unknown.
+    ImportError
+        If 'zstd' is requested without zstandard installed.
+    """
+    data = context.encode()
+    if codec == "zlib":
+        compressed = zlib.compress(data)
+    elif codec == "zstd":
+        if zstandard is None:
+            msg = (
+                "zstd compression requires zstandard: "
+                "pip install discuss-nutshell[zstd]"
+            )
+            raise ImportError(msg)
+        compressed = zstandard.compress(data)
+    elif codec == "none":
+        return "none", data
+    else:
+        msg = f"Unknown codec: {codec}, expected one of {CODECS}"
+        raise ValueError(msg)
+    if len(compressed) >= len(data):
+        return "none", data
+    return codec, compressed
+
+
+def decode_context(codec: str, data: bytes) -> str:
+    """Decompress a stored context.
+
+    Parameters
+    ----------
+    codec : str
+        Codec the context was stored with.
+    data : bytes
+        Stored bytes.
+
+    Returns
+    -------
+    str
+        The context.
+    """
+    if codec == "zlib":
+        data = zlib.decompress(data)
+    elif codec == "zstd":
+        if zstandard is None:
+            msg = "zstd contexts require zstandard: pip install discuss-nutshell[zstd]"
+            raise ImportError(msg)
+        data = zstandard.decompress(data)
+    return data.decode()
+
+
+def store_interactions(
+    conn: sqlite3.Connection,
+    rows: Iterable[tuple[str, str, str, str, str, str]],
+    codec: str = CODEC,
+) -> int:
+    """Insert interactions, storing each distinct context once.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Connection to a database with the tables of `ensure_schema`.
+    rows : Iterable[tuple[str, str, str, str, str, str]]
+        Rows from `interaction_row`, holding the context itself.
+    codec : str, optional
+        Codec of the contexts not stored yet.
+
+    Returns
+    -------
+    int
+        Number of interactions inserted.
+
+    Notes
+    -----
+    The caller commits. Contexts already in the table are neither
+    compressed nor written again.
+    """
+    interactions = []
+    for interaction_id, timestamp, filename, query, context, response in rows:
+        digest = context_hash(context)
+        known = conn.execute(
+            "SELECT 1 FROM contexts WHERE hash = ?", (digest,)
+        ).fetchone()
+        if known is None:
+            used, data = encode_context(context, codec)
+            conn.execute(
+                "INSERT INTO contexts VALUES (?, ?, ?, ?)",
+                (digest, used, len(context), data),
+            )
+        interactions.append(
+            (interaction_id, timestamp, filename, query, digest, response)
+        )
+    conn.executemany(INSERT, interactions)
+    return len(interactions)
+
+
+def store_rows(
+    conn: sqlite3.Connection,
+    items: Iterable[tuple[str, tuple[Any, ...]]],
+    codec: str = CODEC,
+) -> None:
+    """Insert interaction and metrics rows, in their logging order.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Connection to a database with the tables of `ensure_schema`.
+    items : Iterable[tuple[str, tuple[Any, ...]]]
+        Table name, 'interactions' or 'metrics', and row of each item.
+    codec : str, optional
+        Codec of the contexts not stored yet.
+    """
+    items = list(items)
+    store_interactions(
+        conn, [row for table, row in items if table == "interactions"], codec
+    )
+    conn.executemany(
+        INSERT_METRICS, [row for table, row in items if table == "metrics"]
+    )
+
+
+def migrate_interactions(conn: sqlite3.Connection, codec: str = CODEC) -> int:
+    """Move the contexts of an old interactions table to the contexts table.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Connection to the interactions database.
+    codec : str, optional
+        Codec of the stored contexts.
+
+    Returns
+    -------
+    int
+        Number of interactions migrated, 0 if the table already has the
+        current layout.
+
+    Notes
+    -----
+    Old rows stored the file text followed by the query in 'full_context';
+    the query is removed so that questions about the same file share one
+    context. The migration runs in a single transaction.
+    """
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(interactions)")]
+    if "full_context" not in columns:
+        return 0
+    conn.execute("BEGIN")
+    try:
+        conn.execute("ALTER TABLE interactions RENAME TO interactions_old")
+        for statement in CREATE_TABLES:
+            conn.execute(statement)
+        cursor = conn.execute(
+            "SELECT id, timestamp, post_name, query, full_context, response "
+            "FROM interactions_old"
+        )
+        count = 0
+        while batch := cursor.fetchmany(BATCH_SIZE):
+            count += store_interactions(
+                conn,
+                (
+                    (id_, timestamp, name, query, full.removesuffix(query), response)
+                    for id_, timestamp, name, query, full, response in batch
+                ),
+                codec,
+            )
+        conn.execute("DROP TABLE interactions_old")
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+    return count
+
+
+def recompress_contexts(conn: sqlite3.Connection, codec: str = CODEC) -> int:
+    """Store every context with the given codec.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Connection to the interactions database.
+    codec : str, optional
+        Codec of the stored contexts.
+
+    Returns
+    -------
+    int
+        Number of contexts rewritten.
+    """
+    rows = conn.execute(
+        "SELECT hash, codec, data FROM contexts WHERE codec != ?",
+        (codec,),
+    ).fetchall()
+    with conn:
+        for digest, used, data in rows:
+            conn.execute(
+                "UPDATE contexts SET codec = ?, data = ? WHERE hash = ?",
+                (*encode_context(decode_context(used, data), codec), digest),
+            )
+    return len(rows)
+
+
+def ensure_schema(conn: sqlite3.Connection) -> None:
+    """Create the logging tables, migrating an old interactions table.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Connection to the interactions database.
+
+    Notes
+    -----
+    The database records `SCHEMA_VERSION` in its user_version once the
+    tables exist, so later calls, e.g. on every search, return at once.
+    """
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+        return
+    migrate_interactions(conn)
+    indexed = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'interactions_fts'"
+    ).fetchone()
+    for statement in CREATE_TABLES:
+        conn.execute(statement)
+    if indexed is None:
+        # Index the interactions logged before full-text search existed
+        conn.execute(
+            "INSERT INTO interactions_fts (interactions_fts) VALUES ('rebuild')"
+        )
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.commit()
 
 
 def init_db() -> None:
@@ -16,24 +360,411 @@ def init_db() -> None:
     Notes
     -----
     Creates a table named 'interactions' if it doesn't exist with columns:
-    id, timestamp, post_name, query, full_context, and response.
+    id, timestamp, post_name, query, context_hash, and response. The
+    context sent with each query is stored once per distinct text in the
+    'contexts' table, keyed by its hash. Interactions are indexed by
+    timestamp and post_name, and their queries and responses by the
+    'interactions_fts' full-text table.
     """
     conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("""CREATE TABLE IF NOT EXISTS interactions (
-                 id TEXT PRIMARY KEY,
-                 timestamp TEXT,
-                 post_name TEXT,
-                 query TEXT,
-                 full_context TEXT,
-                 response TEXT)""")
-    conn.commit()
+    ensure_schema(conn)
     conn.close()
 
 
-def log_interaction(
-    filename: str, query: str, full_context: str, response: str
-) -> None:
+def migrate_db(db_file: str | Path = DB_FILE, codec: str = CODEC) -> int:
+    """Convert an interactions database to deduplicated contexts.
+
+    Parameters
+    ----------
+    db_file : str | Path, optional
+        Path of the SQLite database.
+    codec : str, optional
+        Codec of the stored contexts.
+
+    Returns
+    -------
+    int
+        Number of interactions migrated.
+
+    Notes
+    -----
+    Contexts already stored with another codec are recompressed, and the
+    database is vacuumed afterwards, so that the file shrinks to the size
+    of its unique content. VACUUM may renumber the rowids of the
+    interactions, which the full-text index refers to, so the index is
+    rebuilt after it.
+    """
+    conn = sqlite3.connect(db_file)
+    try:
+        count = migrate_interactions(conn, codec)
+        ensure_schema(conn)
+        recompress_contexts(conn, codec)
+        conn.execute("VACUUM")
+        conn.execute(
+            "INSERT INTO interactions_fts (interactions_fts) VALUES ('rebuild')"
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return count
+
+
+def read_context(db_file: str | Path, digest: str) -> str | None:
+    """Read a stored context.
+
+    Parameters
+    ----------
+    db_file : str | Path
+        Path of the SQLite database.
+    digest : str
+        The 'context_hash' of an interaction.
+
+    Returns
+    -------
+    str | None
+        The context, or None if it is not stored.
+    """
+    conn = sqlite3.connect(db_file)
+    row = conn.execute(
+        "SELECT codec, data FROM contexts WHERE hash = ?", (digest,)
+    ).fetchone()
+    conn.close()
+    return decode_context(*row) if row is not None else None
+
+
+def fts_query(text: str) -> str:
+    """Return an FTS5 query matching every word of a text.
+
+    Parameters
+    ----------
+    text : str
+        Words to search, e.g. 'PEP 765'.
+
+    Returns
+    -------
+    str
+        The words quoted, so that punctuation is not read as FTS5 syntax.
+    """
+    return " ".join('"{}"'.format(word.replace('"', '""')) for word in text.split())
+
+
+def search_interactions(
+    db_file: str | Path,
+    text: str,
+    limit: int = SEARCH_LIMIT,
+    post_name: str | None = None,
+    since: str | None = None,
+) -> pd.DataFrame:
+    """Search the logged queries and responses.
+
+    Parameters
+    ----------
+    db_file : str | Path
+        Path of the SQLite database.
+    text : str
+        Words that must all appear in the query or the response.
+    limit : int, optional
+        Maximum number of interactions returned.
+    post_name : str | None, optional
+        Only search interactions about this file.
+    since : str | None, optional
+        Only search interactions from this ISO date or time on.
+
+    Returns
+    -------
+    pd.DataFrame
+        Timestamp, post_name, query and response of the best matches,
+        best first.
+    """
+    sql = """SELECT i.timestamp, i.post_name, i.query, i.response
+             FROM interactions_fts
+             JOIN interactions AS i ON i.rowid = interactions_fts.rowid
+             WHERE interactions_fts MATCH ?"""
+    params: list[str | int] = [fts_query(text)]
+    if post_name is not None:
+        sql += " AND i.post_name = ?"
+        params.append(post_name)
+    if since is not None:
+        sql += " AND i.timestamp >= ?"
+        params.append(since)
+    sql += " ORDER BY bm25(interactions_fts) LIMIT ?"
+    params.append(limit)
+    conn = sqlite3.connect(db_file)
+    try:
+        ensure_schema(conn)
+        rows = conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+    return pd.DataFrame(rows, columns=["timestamp", "post_name", "query", "response"])
+
+
+def read_metrics(db_file: str | Path, since: str | None = None) -> pd.DataFrame:
+    """Read the metrics of the logged queries.
+
+    Parameters
+    ----------
+    db_file : str | Path
+        Path of the SQLite database.
+    since : str | None, optional
+        Only read metrics from this ISO date or time on.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per query, with the columns of the metrics table.
+    """
+    conn = sqlite3.connect(db_file)
+    try:
+        ensure_schema(conn)
+        return pd.read_sql_query(
+            "SELECT * FROM metrics WHERE timestamp >= ?", conn, params=(since or "",)
+        )
+    finally:
+        conn.close()
+
+
+def metrics_row(interaction_id: str, metrics: CallMetrics) -> tuple[Any, ...]:
+    """Return the metrics row of a query.
+
+    Parameters
+    ----------
+    interaction_id : str
+        Id of the logged interaction, from `log_interaction`.
+    metrics : CallMetrics
+        Measurements of the query.
+
+    Returns
+    -------
+    tuple[Any, ...]
+        Row of the metrics table, the total time being measured now.
+    """
+    return (
+        interaction_id,
+        datetime.now(UTC).isoformat(),
+        metrics.post_name,
+        metrics.model,
+        int(metrics.cached),
+        metrics.seconds["read"],
+        metrics.seconds["model"],
+        metrics.seconds["log"],
+        metrics.elapsed(),
+        metrics.first_token,
+        metrics.input_tokens,
+        metrics.output_tokens,
+    )
+
+
+def interaction_row(
+    filename: str, query: str, context: str, response: str
+) -> tuple[str, str, str, str, str, str]:
+    """Return the row of an interaction, with a new id and timestamp.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the file that was queried.
+    query : str
+        The user's query/question.
+    context : str
+        The context sent to the model with the query, e.g. the file text.
+    response : str
+        The response from the model.
+
+    Returns
+    -------
+    tuple[str, str, str, str, str, str]
+        Id, timestamp, filename, query, context and response.
+    """
+    interaction_id = str(uuid.uuid4())
+    timestamp = datetime.now(UTC).isoformat()
+    return (interaction_id, timestamp, filename, query, context, response)
+
+
+class InteractionLogger:
+    """Write interactions from a background thread in batched transactions.
+
+    Parameters
+    ----------
+    db_file : str | Path, optional
+        Path of the SQLite database.
+    batch_size : int, optional
+        Maximum number of rows written per transaction.
+    codec : str, optional
+        Codec of the stored contexts, see `encode_context`.
+
+    Raises
+    ------
+    ValueError
+        If the codec is unknown.
+    ImportError
+        If 'zstd' is requested without zstandard installed.
+
+    Notes
+    -----
+    The logger keeps one connection for the life of the process, with
+    write-ahead logging, so readers such as datasette never block it.
+    `log` only puts the row on a queue: the writer thread inserts every
+    row queued meanwhile in one transaction, so many concurrent requests
+    share one commit. Query metrics go through the same queue. Hashing
+    and compressing contexts also happens on the writer thread. If a
+    batch fails, its rows are written one per transaction and only the
+    failing rows are dropped. Pending rows are flushed by `close`, which
+    runs at interpreter exit.
+    """
+
+    def __init__(
+        self,
+        db_file: str | Path = DB_FILE,
+        batch_size: int = BATCH_SIZE,
+        codec: str = CODEC,
+    ) -> None:
+        if codec not in CODECS:
+            msg = f"Unknown codec: {codec}, expected one of {CODECS}"
+            raise ValueError(msg)
+        if codec == "zstd" and zstandard is None:
+            msg = (
+                "zstd compression requires zstandard: "
+                "pip install discuss-nutshell[zstd]"
+            )
+            raise ImportError(msg)
+        self.batch_size = batch_size
+        self.codec = codec
+        self._queue: queue.Queue[tuple[str, tuple[Any, ...]] | None] = queue.Queue()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only syncs at checkpoints and stays crash-safe
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        ensure_schema(self._conn)
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name="interaction-logger", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            items = [item for item in batch if item is not None]
+            if items:
+                self._write(items)
+            for _item in batch:
+                self._queue.task_done()
+            if len(items) < len(batch):
+                break
+        self._conn.close()
+
+    def _write(self, items: list[tuple[str, tuple[Any, ...]]]) -> None:
+        try:
+            with self._conn:
+                store_rows(self._conn, items, self.codec)
+        except Exception:  # the thread must live on for `flush`
+            if len(items) == 1:
+                logging.getLogger(__name__).exception(
+                    "Failed to log a row of %s", items[0][0]
+                )
+                return
+            # Retry one row per transaction, so that a bad row only loses itself
+            for item in items:
+                self._write([item])
+
+    def log(self, filename: str, query: str, context: str, response: str) -> None:
+        """Queue an interaction for writing.
+
+        Parameters
+        ----------
+        filename : str
+            Name of the file that was queried.
+        query : str
+            The user's query/question.
+        context : str
+            The context sent to the model with the query, e.g. the file
+            text.
+        response : str
+            The response from the model.
+        """
+        self.log_rows([interaction_row(filename, query, context, response)])
+
+    def log_rows(
+        self, rows: Iterable[tuple[Any, ...]], table: str = "interactions"
+    ) -> None:
+        """Queue rows for writing.
+
+        Parameters
+        ----------
+        rows : Iterable[tuple[Any, ...]]
+            Rows from `interaction_row`, or `metrics_row`.
+        table : str, optional
+            Table of the rows, 'interactions' or 'metrics'.
+
+        Raises
+        ------
+        RuntimeError
+            If the logger is closed.
+        """
+        if self._closed:
+            msg = "InteractionLogger is closed"
+            raise RuntimeError(msg)
+        for row in rows:
+            self._queue.put((table, row))
+
+    def flush(self) -> None:
+        """Wait until every queued interaction is written."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Write the queued interactions and close the connection."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        atexit.unregister(self.close)
+
+
+def enable_interaction_logger(
+    db_file: str | Path = DB_FILE, batch_size: int = BATCH_SIZE, codec: str = CODEC
+) -> InteractionLogger:
+    """Turn on the background logger used by `log_interaction`.
+
+    Parameters
+    ----------
+    db_file : str | Path, optional
+        Path of the SQLite database.
+    batch_size : int, optional
+        Maximum number of rows written per transaction.
+    codec : str, optional
+        Codec of the stored contexts.
+
+    Returns
+    -------
+    InteractionLogger
+        The process-wide logger. A previous one is closed first.
+    """
+    global _logger  # noqa: PLW0603
+    if _logger is not None:
+        _logger.close()
+    _logger = InteractionLogger(db_file, batch_size, codec)
+    return _logger
+
+
+def get_interaction_logger() -> InteractionLogger | None:
+    """Return the process-wide logger, or None if it is disabled.
+
+    Returns
+    -------
+    InteractionLogger | None
+        Logger set by `enable_interaction_logger`.
+    """
+    return _logger
+
+
+def log_interaction(filename: str, query: str, context: str, response: str) -> str:
     """Log the interaction to SQLite database.
 
     Parameters
@@ -42,23 +773,75 @@ def log_interaction(
         Name of the file that was queried.
     query : str
         The user's query/question.
-    full_context : str
-        The full context (file content + query) sent to the model.
+    context : str
+        The context sent to the model with the query, e.g. the file text.
     response : str
         The response from the model.
 
+    Returns
+    -------
+    str
+        Id of the interaction.
+
     Notes
     -----
     Generates a unique UUID for each interaction and records the current
-    timestamp in UTC.
+    timestamp in UTC. With the process-wide logger enabled, the row is
+    written in the background; otherwise it is written before returning.
+    """
+    row = interaction_row(filename, query, context, response)
+    write_rows([row], "interactions")
+    return row[0]
+
+
+def log_interactions(interactions: Iterable[tuple[str, str, str, str]]) -> int:
+    """Log many interactions to SQLite database in one transaction.
+
+    Parameters
+    ----------
+    interactions : Iterable[tuple[str, str, str, str]]
+        Filename, query, context and response of each interaction, as for
+        `log_interaction`.
+
+    Returns
+    -------
+    int
+        Number of interactions logged.
+    """
+    rows = [interaction_row(*interaction) for interaction in interactions]
+    write_rows(rows, "interactions")
+    return len(rows)
+
+
+def log_metrics(interaction_id: str, metrics: CallMetrics) -> None:
+    """Log the metrics of a query to SQLite database.
+
+    Parameters
+    ----------
+    interaction_id : str
+        Id of the logged interaction, from `log_interaction`.
+    metrics : CallMetrics
+        Measurements of the query, up to and including its logging.
+    """
+    write_rows([metrics_row(interaction_id, metrics)], "metrics")
+
+
+def write_rows(rows: list[tuple[Any, ...]], table: str) -> None:
+    """Write rows through the process-wide logger, or directly.
+
+    Parameters
+    ----------
+    rows : list[tuple[Any, ...]]
+        Rows of the table.
+    table : str
+        Table of the rows, 'interactions' or 'metrics'.
     """
+    logger = get_interaction_logger()
+    if logger is not None:
+        logger.log_rows(rows, table)
+        return
     conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    interaction_id = str(uuid.uuid4())
-    timestamp = datetime.now(UTC).isoformat()
-    c.execute(
-        "INSERT INTO interactions VALUES (?, ?, ?, ?, ?, ?)",
-        (interaction_id, timestamp, filename, query, full_context, response),
-    )
-    conn.commit()
+    ensure_schema(conn)
+    with conn:
+        store_rows(conn, [(table, row) for row in rows])
     conn.close()
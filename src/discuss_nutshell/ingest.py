@@ -0,0 +1,444 @@
+"""Ingest many Discourse topics concurrently."""
+
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlparse
+
+import requests
+
+from discuss_nutshell.data_loader import (
+    BASE_URL,
+    POSTS_PER_REQUEST,
+    REQUEST_TIMEOUT,
+    chunk_ids,
+    headers,
+    merge_posts,
+    missing_post_ids,
+    process_topic,
+)
+from discuss_nutshell.post_store import PostStore
+from discuss_nutshell.preprocessor import extract_posts, write_json
+from discuss_nutshell.session import ResponseCache, fetch_json, get_cache, get_session
+
+# Discourse allows 200 requests per minute and 50 per 10 seconds per IP by
+# default, so stay a little below the sustained rate.
+REQUESTS_PER_SECOND = 3.0
+BURST = 10
+MAX_CONCURRENCY = 8
+MAX_RETRIES = 5
+
+
+class TokenBucket:
+    """Token bucket limiting the rate of requests to one host.
+
+    Parameters
+    ----------
+    rate : float
+        Tokens added per second.
+    capacity : float
+        Maximum number of tokens, i.e. the allowed burst.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        if rate <= 0 or capacity < 1:
+            msg = f"Invalid token bucket: rate={rate}, capacity={capacity}"
+            raise ValueError(msg)
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for a while.
+
+        Parameters
+        ----------
+        seconds : float
+            How long to wait before the next request, e.g. from Retry-After.
+        """
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        self._tokens = 0
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    self._updated = time.monotonic()
+                    continue
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class RateLimiter:
+    """Per-host token buckets.
+
+    Parameters
+    ----------
+    rate : float, optional
+        Requests per second allowed for each host.
+    burst : int, optional
+        Number of requests a host may receive at once.
+    """
+
+    def __init__(self, rate: float = REQUESTS_PER_SECOND, burst: int = BURST) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._buckets: dict[str, TokenBucket] = {}
+
+    def bucket(self, url: str) -> TokenBucket:
+        """Return the token bucket of the host of a URL.
+
+        Parameters
+        ----------
+        url : str
+            URL of the request.
+
+        Returns
+        -------
+        TokenBucket
+            Bucket shared by every request to that host.
+        """
+        host = urlparse(url).netloc
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.rate, self.burst)
+        return self._buckets[host]
+
+
+def retry_after(response: requests.Response, default: float) -> float:
+    """Read how long to wait after a 429 response.
+
+    Parameters
+    ----------
+    response : requests.Response
+        The rate limited response.
+    default : float
+        Delay used when the response does not say.
+
+    Returns
+    -------
+    float
+        Seconds to wait, from the Retry-After header (seconds or HTTP date)
+        or from Discourse's ``extras.wait_seconds`` in the body.
+    """
+    value = response.headers.get("Retry-After")
+    if value:
+        if value.strip().isdigit():
+            return float(value)
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return default
+    try:
+        return float(response.json()["extras"]["wait_seconds"])
+    except (ValueError, KeyError, TypeError):
+        return default
+
+
+class Ingestor:
+    """Fetch Discourse resources concurrently within rate limits.
+
+    Parameters
+    ----------
+    session : requests.Session | None, optional
+        Session used for every request. The shared session is used if None.
+    limiter : RateLimiter | None, optional
+        Per-host rate limiter.
+    concurrency : int, optional
+        Maximum number of requests in flight.
+    base_url : str, optional
+        Base URL of the Discourse instance.
+    cache : ResponseCache | None, optional
+        Response cache. The process-wide cache is used if None.
+
+    Notes
+    -----
+    Blocking requests run in worker threads so that the event loop can
+    schedule many topics at once while sharing one connection pool.
+    """
+
+    def __init__(
+        self,
+        session: requests.Session | None = None,
+        limiter: RateLimiter | None = None,
+        concurrency: int = MAX_CONCURRENCY,
+        base_url: str = BASE_URL,
+        cache: ResponseCache | None = None,
+    ) -> None:
+        self.session = session or get_session()
+        self.limiter = limiter or RateLimiter()
+        self.base_url = base_url
+        self.cache = cache or get_cache()
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def get_json(
+        self, url: str, params: dict[str, Any] | None = None
+    ) -> dict[str, Any]:
+        """Get a JSON document, honoring rate limits and 429 responses.
+
+        Parameters
+        ----------
+        url : str
+            URL of the endpoint.
+        params : dict[str, Any] | None, optional
+            Query string parameters.
+
+        Returns
+        -------
+        dict[str, Any]
+            Parsed JSON response.
+
+        Raises
+        ------
+        requests.HTTPError
+            If the response has an error status code, or is still rate
+            limited after `MAX_RETRIES` retries.
+        """
+        bucket = self.limiter.bucket(url)
+        attempt = 0
+        while True:
+            await bucket.acquire()
+            try:
+                async with self._semaphore:
+                    return await asyncio.to_thread(
+                        fetch_json,
+                        self.session,
+                        url,
+                        params,
+                        cache=self.cache,
+                        headers=headers,
+                        timeout=REQUEST_TIMEOUT,
+                    )
+            except requests.HTTPError as e:
+                response = e.response
+                if (
+                    response is None
+                    or response.status_code != 429
+                    or attempt == MAX_RETRIES
+                ):
+                    raise
+                bucket.pause(retry_after(response, default=2.0**attempt))
+                attempt += 1
+
+    async def fetch_topic(
+        self, topic: int, chunk_size: int = POSTS_PER_REQUEST
+    ) -> dict[str, Any]:
+        """Fetch a topic with all of its posts.
+
+        Parameters
+        ----------
+        topic : int
+            The ID of the topic to retrieve.
+        chunk_size : int, optional
+            Number of posts requested per call to ``/t/{topic}/posts.json``.
+
+        Returns
+        -------
+        dict[str, Any]
+            Discourse topic data with every post, in stream order.
+        """
+        data = await self.get_json(
+            f"{self.base_url}/t/{topic}.json", params={"print": "true"}
+        )
+        batches = await asyncio.gather(
+            *(
+                self.get_json(
+                    f"{self.base_url}/t/{topic}/posts.json",
+                    params={"post_ids[]": chunk},
+                )
+                for chunk in chunk_ids(missing_post_ids(data), chunk_size)
+            )
+        )
+        return merge_posts(
+            data, [post for batch in batches for post in extract_posts(batch)]
+        )
+
+    async def list_topics(
+        self, category: str | None = None, tag: str | None = None
+    ) -> list[int]:
+        """List the ids of the topics in a category or with a tag.
+
+        Parameters
+        ----------
+        category : str | None, optional
+            Category slug or id.
+        tag : str | None, optional
+            Tag name.
+
+        Returns
+        -------
+        list[int]
+            Topic ids, following every page of the topic list.
+        """
+        if (category is None) == (tag is None):
+            msg = "Give exactly one of category or tag"
+            raise ValueError(msg)
+        url = (
+            f"{self.base_url}/c/{category}.json"
+            if category is not None
+            else f"{self.base_url}/tag/{tag}.json"
+        )
+        topic_ids: list[int] = []
+        page = 0
+        while True:
+            data = await self.get_json(url, params={"page": page})
+            topic_list = data["topic_list"]
+            topic_ids.extend(topic["id"] for topic in topic_list["topics"])
+            if not topic_list["topics"] or not topic_list.get("more_topics_url"):
+                return topic_ids
+            page += 1
+
+
+async def ingest_topics(
+    topic_ids: list[int],
+    output: str | Path = "data",
+    process: bool = True,
+    ingestor: Ingestor | None = None,
+    verbose: bool = False,
+    store: PostStore | None = None,
+    post_files: bool = True,
+    parquet: bool = False,
+) -> dict[int, int]:
+    """Fetch many topics concurrently and process each one as it arrives.
+
+    Parameters
+    ----------
+    topic_ids : list[int]
+        IDs of the topics to ingest.
+    output : str | Path, optional
+        Directory where 'topic_{topic_id}.json' and processed files go.
+    process : bool, optional
+        Run the preprocessing pipeline on each topic.
+    ingestor : Ingestor | None, optional
+        Ingestor used for the requests. A default one is created if None.
+    verbose : bool, optional
+        Print progress information.
+    store : PostStore | None, optional
+        Also write the processed posts to this store.
+    post_files : bool, optional
+        Write one 'post_{id}.txt' file per processed post.
+    parquet : bool, optional
+        Also write each topic to '{topic_id}_posts.parquet'.
+
+    Returns
+    -------
+    dict[int, int]
+        Number of posts ingested per topic. Topics that failed are left out.
+
+    Notes
+    -----
+    Topics are processed one at a time in a worker thread, in the order
+    their downloads complete, while the remaining downloads continue. A
+    topic that fails to download or to process is reported and skipped.
+    """
+    output_path = Path(output)
+    output_path.mkdir(parents=True, exist_ok=True)
+    ingestor = ingestor or Ingestor()
+
+    async def fetch(topic_id: int) -> tuple[int, dict[str, Any] | None]:
+        try:
+            return topic_id, await ingestor.fetch_topic(topic_id)
+        except Exception as e:  # noqa: BLE001 - one bad topic must not stop the rest
+            print(f"Failed to fetch topic {topic_id}: {e}")
+            return topic_id, None
+
+    results: dict[int, int] = {}
+    for task in asyncio.as_completed([fetch(topic_id) for topic_id in topic_ids]):
+        topic_id, data = await task
+        if data is None:
+            continue
+        try:
+            write_json(data, output_path / f"topic_{topic_id}.json")
+            if process:
+                await asyncio.to_thread(
+                    process_topic,
+                    data,
+                    topic_id,
+                    output_path,
+                    store=store,
+                    post_files=post_files,
+                    parquet=parquet,
+                )
+        except Exception as e:  # noqa: BLE001 - one bad topic must not stop the rest
+            print(f"Failed to process topic {topic_id}: {e}")
+            continue
+        results[topic_id] = len(extract_posts(data))
+        if verbose:
+            print(f"Topic {topic_id}: {results[topic_id]} posts")
+    return results
+
+
+async def ingest(
+    topic_ids: list[int] | None = None,
+    category: str | None = None,
+    tag: str | None = None,
+    output: str | Path = "data",
+    process: bool = True,
+    rate: float = REQUESTS_PER_SECOND,
+    concurrency: int = MAX_CONCURRENCY,
+    verbose: bool = False,
+    store: PostStore | None = None,
+    post_files: bool = True,
+    parquet: bool = False,
+) -> dict[int, int]:
+    """Ingest a list of topics and every topic of a category or tag.
+
+    Parameters
+    ----------
+    topic_ids : list[int] | None, optional
+        IDs of the topics to ingest.
+    category : str | None, optional
+        Also ingest every topic of this category (slug or id).
+    tag : str | None, optional
+        Also ingest every topic with this tag.
+    output : str | Path, optional
+        Directory where the topic files go.
+    process : bool, optional
+        Run the preprocessing pipeline on each topic.
+    rate : float, optional
+        Requests per second allowed per host.
+    concurrency : int, optional
+        Maximum number of requests in flight.
+    verbose : bool, optional
+        Print progress information.
+    store : PostStore | None, optional
+        Also write the processed posts to this store.
+    post_files : bool, optional
+        Write one 'post_{id}.txt' file per processed post.
+    parquet : bool, optional
+        Also write each topic to '{topic_id}_posts.parquet'.
+
+    Returns
+    -------
+    dict[int, int]
+        Number of posts ingested per topic.
+    """
+    ingestor = Ingestor(limiter=RateLimiter(rate, BURST), concurrency=concurrency)
+    ids = list(topic_ids or [])
+    if category is not None:
+        ids.extend(await ingestor.list_topics(category=category))
+    if tag is not None:
+        ids.extend(await ingestor.list_topics(tag=tag))
+    return await ingest_topics(
+        list(dict.fromkeys(ids)),
+        output,
+        process,
+        ingestor,
+        verbose,
+        store=store,
+        post_files=post_files,
+        parquet=parquet,
+    )
@@ -0,0 +1,242 @@
+"""Streaming reader for large JSON files of Discourse posts."""
+
+import json
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any, TextIO
+
+CHUNK_SIZE = 1 << 16  # characters read from the file at once
+WHITESPACE = " \t\n\r"
+# Characters ending a number, literal or the whole document
+DELIMITERS = frozenset(WHITESPACE + ",]}")
+
+_decoder = json.JSONDecoder()
+
+
+class _Scanner:
+    """Incremental JSON tokenizer over a text file.
+
+    Only the part of the file that is being decoded is held in memory: the
+    consumed start of the buffer is dropped before reading more.
+    """
+
+    def __init__(self, f: TextIO, chunk_size: int = CHUNK_SIZE) -> None:
+        self._file = f
+        self._chunk_size = chunk_size
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, size: int | None = None) -> bool:
+        if self._eof:
+            return False
+        if self._pos > self._chunk_size:
+            self._buffer = self._buffer[self._pos :]
+            self._pos = 0
+        chunk = self._file.read(size or self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer += chunk
+        return True
+
+    def _error(self, msg: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(msg, self._buffer, self._pos)
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character, '' at the end of file."""
+        while True:
+            while self._pos < len(self._buffer):
+                char = self._buffer[self._pos]
+                if char not in WHITESPACE:
+                    return char
+                self._pos += 1
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        """Consume the next non-whitespace character, which must be `char`."""
+        if self.peek() != char:
+            msg = f"Expecting {char!r}"
+            raise self._error(msg)
+        self._pos += 1
+
+    def decode(self) -> Any:
+        """Decode the next value, reading more of the file as needed."""
+        self.peek()
+        while self._complete_end() is None:
+            # The value is cut at the end of the buffer: read as much again,
+            # so a large value costs O(size) rather than O(size**2)
+            if not self._fill(max(self._chunk_size, len(self._buffer) - self._pos)):
+                break
+        value, self._pos = _decoder.raw_decode(self._buffer, self._pos)
+        return value
+
+    def _complete_end(self) -> int | None:
+        """Return the end of the buffered value if it cannot continue."""
+        end = self._skip_end(self._pos)
+        if end is None:
+            return None
+        # A number or literal may go on in the next chunk
+        if end == len(self._buffer) and self._buffer[self._pos] not in '"[{':
+            return None
+        return end
+
+    def _skip_end(self, pos: int) -> int | None:
+        """Find where the value starting at `pos` ends, None if unbuffered."""
+        buffer = self._buffer
+        if pos >= len(buffer):
+            return None
+        char = buffer[pos]
+        if char == '"':
+            pos += 1
+            while True:
+                quote = buffer.find('"', pos)
+                if quote == -1:
+                    return None
+                backslashes = 0
+                while buffer[quote - 1 - backslashes] == "\\":
+                    backslashes += 1
+                if backslashes % 2 == 0:
+                    return quote + 1
+                pos = quote + 1
+        if char in "[{":
+            depth = 0
+            while pos < len(buffer):
+                char = buffer[pos]
+                if char == '"':
+                    end = self._skip_end(pos)
+                    if end is None:
+                        return None
+                    pos = end
+                    continue
+                if char in "[{":
+                    depth += 1
+                elif char in "]}":
+                    depth -= 1
+                    if depth == 0:
+                        return pos + 1
+                pos += 1
+            return None
+        while pos < len(buffer):
+            if buffer[pos] in DELIMITERS:
+                return pos
+            pos += 1
+        return None
+
+    def skip(self) -> None:
+        """Skip the next value without decoding it."""
+        self.peek()
+        while (end := self._complete_end()) is None:
+            if not self._fill(max(self._chunk_size, len(self._buffer) - self._pos)):
+                # Only a number or literal ending the file is complete here
+                end = self._skip_end(self._pos)
+                if end is None:
+                    msg = "Unterminated value"
+                    raise self._error(msg)
+                break
+        self._pos = end
+
+    def items(self) -> Iterator[Any]:
+        """Decode the elements of the array starting at the cursor."""
+        self.expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self.decode()
+            if self.peek() == "]":
+                self._pos += 1
+                return
+            self.expect(",")
+
+    def find(self, key: str) -> bool:
+        """Move the cursor to the value of `key` in the object at the cursor.
+
+        Returns False, with the object consumed, if the key is missing.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return False
+        while True:
+            name = self.decode()
+            self.expect(":")
+            if name == key:
+                return True
+            self.skip()
+            if self.peek() == "}":
+                self._pos += 1
+                return False
+            self.expect(",")
+
+
+def _descend(scanner: _Scanner, keys: tuple[str, ...]) -> None:
+    """Move the scanner to the value at the end of a path of keys."""
+    for key in keys:
+        if not scanner.find(key):
+            raise KeyError(key)
+
+
+def iter_array(
+    file_path: str | Path, keys: tuple[str, ...] = (), chunk_size: int = CHUNK_SIZE
+) -> Iterator[Any]:
+    """Yield the elements of a JSON array one at a time.
+
+    Parameters
+    ----------
+    file_path : str | Path
+        Path to the JSON file.
+    keys : tuple[str, ...], optional
+        Keys leading from the top-level object to the array. The top-level
+        value itself is the array if empty.
+    chunk_size : int, optional
+        Number of characters read from the file at once.
+
+    Yields
+    ------
+    Any
+        Each element of the array, decoded with `json`.
+
+    Raises
+    ------
+    KeyError
+        If one of `keys` is missing.
+    json.JSONDecodeError
+        If the file is not valid JSON up to the last element read.
+
+    Notes
+    -----
+    Memory use is bounded by the largest element, not by the file size.
+    Values outside the path to the array are skipped without decoding.
+    """
+    with Path(file_path).open(encoding="utf-8") as f:
+        scanner = _Scanner(f, chunk_size)
+        _descend(scanner, keys)
+        yield from scanner.items()
+
+
+def iter_posts(file_path: str | Path, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """Yield the posts of a topic or posts file one at a time.
+
+    Parameters
+    ----------
+    file_path : str | Path
+        Path to either a raw Discourse topic, whose posts are read from
+        ``post_stream.posts``, or a list of posts such as
+        '{topic_id}_all_posts.json'.
+    chunk_size : int, optional
+        Number of characters read from the file at once.
+
+    Yields
+    ------
+    dict[str, Any]
+        Each post, in file order, with the keys of the file: processed
+        records keep their 'author', 'number' and 'clean_content' keys,
+        see `preprocessor.iter_processed_posts` to process either format.
+    """
+    with Path(file_path).open(encoding="utf-8") as f:
+        scanner = _Scanner(f, chunk_size)
+        if scanner.peek() == "{":
+            _descend(scanner, ("post_stream", "posts"))
+        yield from scanner.items()
@@ -1,45 +1,31 @@
 """Get a file and query it using Gemini API and Gradio UI."""
 
-import sqlite3
-import uuid
-from datetime import UTC, datetime
+from collections.abc import Iterator
 from pathlib import Path
 
 import gradio as gr
-from google import genai
+
+from discuss_nutshell.data_logger import (
+    enable_interaction_logger,
+    log_interaction,
+    log_metrics,
+)
+from discuss_nutshell.llm_cache import CachedModel, LLMCache
+from discuss_nutshell.metrics import CallMetrics
+from discuss_nutshell.models import get_model
 
 current_path = Path.cwd()
 data_path = current_path / "data"
 
 DB_FILE = data_path / "posts_qa_logs.db"
 
+# one connection and background writer shared by every user of the app
+enable_interaction_logger(DB_FILE)
 
-def init_db() -> None:
-    """Initialize the SQLite database with interactions table.
-
-    Notes
-    -----
-    Creates a table named 'interactions' if it doesn't exist with columns:
-    id, timestamp, post_name, query, full_context, and response.
-    """
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("""CREATE TABLE IF NOT EXISTS interactions (
-                 id TEXT PRIMARY KEY,
-                 timestamp TEXT,
-                 post_name TEXT,
-                 query TEXT,
-                 full_context TEXT,
-                 response TEXT)""")
-    conn.commit()
-    conn.close()
-
-
-init_db()
-
-
-# initialize the Gemini client
-client = genai.Client()
+# the model shares the process-wide client pool with every other query
+MODEL = "gemini-2.5-flash"
+model = get_model(MODEL)
+llm_cache = LLMCache(DB_FILE)
 
 
 def extract_text_from_file(file_path: str | Path) -> str:
@@ -59,91 +45,69 @@ def extract_text_from_file(file_path: str | Path) -> str:
         return f.read()
 
 
-def log_interaction(
-    filename: str, query: str, full_context: str, response: str
-) -> None:
-    """Log the interaction to SQLite database.
-
-    Parameters
-    ----------
-    filename : str
-        Name of the file that was queried.
-    query : str
-        The user's query/question.
-    full_context : str
-        The full context (file content + query) sent to the model.
-    response : str
-        The response from the model.
-
-    Notes
-    -----
-    Generates a unique UUID for each interaction and records the current
-    timestamp in UTC.
-    """
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    interaction_id = str(uuid.uuid4())
-    timestamp = datetime.now(UTC).isoformat()
-    c.execute(
-        "INSERT INTO interactions VALUES (?, ?, ?, ?, ?, ?)",
-        (interaction_id, timestamp, filename, query, full_context, response),
-    )
-    conn.commit()
-    conn.close()
-
-
-def query_file(file: str | None, query: str) -> str:
-    """Query the file and return the response.
+def query_file(
+    file: str | None, query: str, bypass_cache: bool = False
+) -> Iterator[str]:
+    """Query the file, yielding the response as it is generated.
 
     Parameters
     ----------
     file : str | None
-        Path to the file to query. If None, returns an error message.
+        Path to the file to query. If None, yields an error message.
     query : str
         The question or query about the file content.
+    bypass_cache : bool, optional
+        Ask the model again instead of reusing a cached answer.
 
-    Returns
-    -------
+    Yields
+    ------
     str
-        The response from the Gemini model, or an error message if no file
-        is provided.
+        The response received so far, so that Gradio fills in the answer
+        box progressively, or an error message if no file is provided.
 
     Notes
     -----
-    Uses the Gemini 2.5 Flash model to generate responses. All interactions
-    are logged to the SQLite database.
+    Uses the Gemini 2.5 Flash model to generate responses. Repeated
+    questions about an unchanged file are answered from the response
+    cache. All interactions are logged to the SQLite database once the
+    response is complete, with their latency and token metrics.
     """
     if file is None:
-        return "Please upload a file."
+        yield "Please upload a file."
+        return
 
     filename = Path(file).name
-    file_text = extract_text_from_file(file)
+    metrics = CallMetrics(MODEL, filename)
+    with metrics.stage("read"):
+        file_text = extract_text_from_file(file)
     context = [file_text, query]
 
-    response = client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=context,
-    )
-
-    response_text = str(response.text)
-    log_interaction(
-        filename=filename,
-        query=query,
-        full_context=context[0] + context[1],
-        response=response_text,
-    )
-
-    return response_text
+    cached_model = CachedModel(model, llm_cache, MODEL, bypass=bypass_cache)
+    response_text = ""
+    for piece in metrics.stream(cached_model.stream(context)):
+        response_text += piece
+        yield response_text
+    with metrics.stage("log"):
+        interaction_id = log_interaction(
+            filename=filename,
+            query=query,
+            context=context[0],
+            response=response_text,
+        )
+    log_metrics(interaction_id, metrics)
 
 
 # Gradio interface setup
 with gr.Blocks() as app:
     file_upload = gr.File(label="Upload file", type="filepath")
     query_input = gr.Textbox(label="Ask a question about the post")
+    bypass_input = gr.Checkbox(label="Ask again (skip cached answers)")
     query_button = gr.Button("Submit")
     output = gr.Textbox(label="Answer", lines=10)
 
-    query_button.click(query_file, inputs=[file_upload, query_input], outputs=output)
+    query_button.click(
+        query_file, inputs=[file_upload, query_input, bypass_input], outputs=output
+    )
 
 if __name__ == "__main__":
     app.launch()
@@ -0,0 +1,296 @@
+"""Persistent cache of model responses in the interactions database."""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from collections.abc import Generator
+from pathlib import Path
+
+from discuss_nutshell.metrics import record_cache_hit
+from discuss_nutshell.models import StreamingModel
+
+current_path = Path.cwd()
+data_path = current_path / "data"
+DB_FILE = data_path / "posts_qa_logs.db"
+TTL = 7 * 24 * 3600  # seconds a response stays valid
+MAX_ENTRIES = 10_000
+
+_cache: "LLMCache | None" = None
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query so that trivially different wordings share a key.
+
+    Parameters
+    ----------
+    query : str
+        The user's question.
+
+    Returns
+    -------
+    str
+        The query case-folded, with runs of whitespace collapsed.
+    """
+    return " ".join(query.split()).casefold()
+
+
+class LLMCache:
+    """SQLite cache of model responses with TTL and LRU eviction.
+
+    Parameters
+    ----------
+    db_file : str | Path, optional
+        Path of the SQLite database, by default the interactions database.
+    ttl : float, optional
+        Seconds after which a response is stale.
+    max_entries : int, optional
+        Number of responses kept. The least recently used ones are evicted
+        beyond it.
+
+    Notes
+    -----
+    Entries are keyed by the model name, a SHA-256 hash of the context
+    (e.g. the file text) and the normalized query. The model name and the
+    query are stored in clear, to be browsed with datasette.
+    """
+
+    def __init__(
+        self,
+        db_file: str | Path = DB_FILE,
+        ttl: float = TTL,
+        max_entries: int = MAX_ENTRIES,
+    ) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS llm_cache (
+                              key TEXT PRIMARY KEY,
+                              model TEXT,
+                              query TEXT,
+                              response TEXT,
+                              created_at REAL,
+                              last_used REAL)""")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache (last_used)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def key(model: str, context: str, query: str) -> str:
+        """Return the cache key of a request.
+
+        Parameters
+        ----------
+        model : str
+            Name of the model.
+        context : str
+            Context sent with the query, e.g. the file text.
+        query : str
+            The user's question.
+
+        Returns
+        -------
+        str
+            SHA-256 hex digest of the model, context hash and query.
+        """
+        context_hash = hashlib.sha256(context.encode()).hexdigest()
+        parts = [model, context_hash, normalize_query(query)]
+        return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+    def get(self, model: str, context: str, query: str) -> str | None:
+        """Return a cached response that is still fresh.
+
+        Parameters
+        ----------
+        model : str
+            Name of the model.
+        context : str
+            Context sent with the query.
+        query : str
+            The user's question.
+
+        Returns
+        -------
+        str | None
+            The response, or None if it is not cached or has expired.
+        """
+        key = self.key(model, context, query)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM llm_cache WHERE key = ? AND created_at > ?",
+                (key, now - self.ttl),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+        return row[0]
+
+    def put(self, model: str, context: str, query: str, response: str) -> None:
+        """Store a response and evict expired and least recently used ones.
+
+        Parameters
+        ----------
+        model : str
+            Name of the model.
+        context : str
+            Context sent with the query.
+        query : str
+            The user's question.
+        response : str
+            The model's response.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?, ?)",
+                (self.key(model, context, query), model, query, response, now, now),
+            )
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE created_at <= ?", (now - self.ttl,)
+            )
+            self._conn.execute(
+                """DELETE FROM llm_cache WHERE key IN (
+                       SELECT key FROM llm_cache
+                       ORDER BY last_used DESC LIMIT -1 OFFSET ?)""",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
+
+
+class CachedModel:
+    """Model wrapper answering repeated requests from an `LLMCache`.
+
+    Parameters
+    ----------
+    model : StreamingModel
+        Model called on cache misses.
+    cache : LLMCache
+        Cache of responses.
+    name : str
+        Name of the model, part of the cache key.
+    bypass : bool, optional
+        Always call the model, refreshing the cached response.
+
+    Notes
+    -----
+    The last prompt part is taken as the query and the other parts as the
+    context, matching the ``[file_text, query]`` prompts of the CLI and the
+    app. Empty responses are not cached, so the question is asked again
+    next time.
+    """
+
+    def __init__(
+        self, model: StreamingModel, cache: LLMCache, name: str, bypass: bool = False
+    ) -> None:
+        self.model = model
+        self.cache = cache
+        self.name = name
+        self.bypass = bypass
+
+    def generate(self, contents: list[str]) -> str:
+        """Return the cached response, or generate and cache it.
+
+        Parameters
+        ----------
+        contents : list[str]
+            Prompt parts, e.g. the context followed by the question.
+
+        Returns
+        -------
+        str
+            Text of the response.
+        """
+        context, query = self._split(contents)
+        if not self.bypass:
+            cached = self.cache.get(self.name, context, query)
+            if cached is not None:
+                record_cache_hit()
+                return cached
+        response = self.model.generate(contents)
+        if response:
+            self.cache.put(self.name, context, query, response)
+        return response
+
+    def stream(self, contents: list[str]) -> Generator[str, None, None]:
+        """Yield the cached response, or stream and cache it.
+
+        Parameters
+        ----------
+        contents : list[str]
+            Prompt parts, e.g. the context followed by the question.
+
+        Yields
+        ------
+        str
+            The whole cached response at once, or consecutive pieces of
+            the generated one. A response is only cached once complete,
+            so closing the generator early caches nothing.
+        """
+        context, query = self._split(contents)
+        if not self.bypass:
+            cached = self.cache.get(self.name, context, query)
+            if cached is not None:
+                record_cache_hit()
+                yield cached
+                return
+        pieces = []
+        for piece in self.model.stream(contents):
+            pieces.append(piece)
+            yield piece
+        response = "".join(pieces)
+        if response:
+            self.cache.put(self.name, context, query, response)
+
+    @staticmethod
+    def _split(contents: list[str]) -> tuple[str, str]:
+        """Split prompt parts into the context and the query."""
+        return "\0".join(contents[:-1]), contents[-1] if contents else ""
+
+
+def enable_llm_cache(
+    db_file: str | Path = DB_FILE, ttl: float = TTL, max_entries: int = MAX_ENTRIES
+) -> LLMCache:
+    """Turn on the response cache used by `get_llm_cache`.
+
+    Parameters
+    ----------
+    db_file : str | Path, optional
+        Path of the SQLite database.
+    ttl : float, optional
+        Seconds after which a response is stale.
+    max_entries : int, optional
+        Number of responses kept.
+
+    Returns
+    -------
+    LLMCache
+        The process-wide cache.
+    """
+    global _cache  # noqa: PLW0603
+    _cache = LLMCache(db_file, ttl, max_entries)
+    return _cache
+
+
+def get_llm_cache() -> LLMCache | None:
+    """Return the process-wide response cache, or None if it is disabled.
+
+    Returns
+    -------
+    LLMCache | None
+        Cache set by `enable_llm_cache`.
+    """
+    return _cache
@@ -0,0 +1,173 @@
+"""Time the stages of model queries and collect their token usage."""
+
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import pandas as pd
+
+STAGES = ("read", "model", "log")
+PERCENTILES = (0.5, 0.95, 0.99)
+# Metrics columns summarized by `metrics_stats`, with their short names
+STATS_COLUMNS = {
+    "total_seconds": "total",
+    "first_token_seconds": "first_token",
+    "input_tokens": "tokens_in",
+    "output_tokens": "tokens_out",
+}
+
+_current: ContextVar["CallMetrics | None"] = ContextVar("call_metrics", default=None)
+
+
+class CallMetrics:
+    """Measurements of one query, from reading its context to logging it.
+
+    Parameters
+    ----------
+    model : str
+        Name of the model queried.
+    post_name : str
+        Name of the file queried.
+
+    Notes
+    -----
+    Models report token usage, and the response cache its hits, to the
+    metrics of the stage running in the current thread, see
+    `record_usage`. The stage is only active while a model call runs, so
+    the metrics never leak into the code consuming a stream.
+    """
+
+    def __init__(self, model: str, post_name: str) -> None:
+        self.model = model
+        self.post_name = post_name
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+        self.first_token: float | None = None
+        self.input_tokens: int | None = None
+        self.output_tokens: int | None = None
+        self.cached = False
+        self._start = time.perf_counter()
+
+    def elapsed(self) -> float:
+        """Return the seconds since the metrics were created.
+
+        Returns
+        -------
+        float
+            Wall time of the query so far.
+        """
+        return time.perf_counter() - self._start
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a stage of the query.
+
+        Parameters
+        ----------
+        name : str
+            Name of the stage, one of `STAGES`. Repeated stages add up.
+
+        Yields
+        ------
+        None
+            While the stage runs, with these metrics receiving the usage
+            reported by models.
+        """
+        start = time.perf_counter()
+        token = _current.set(self)
+        try:
+            yield
+        finally:
+            _current.reset(token)
+            self.seconds[name] += time.perf_counter() - start
+
+    def stream(self, pieces: Iterable[str], name: str = "model") -> Iterator[str]:
+        """Time a stream, only counting the time spent producing pieces.
+
+        Parameters
+        ----------
+        pieces : Iterable[str]
+            Response pieces, e.g. from a model's ``stream``.
+        name : str, optional
+            Name of the stage.
+
+        Yields
+        ------
+        str
+            The pieces. The time to the first one is kept as
+            `first_token`.
+        """
+        iterator = iter(pieces)
+        while True:
+            with self.stage(name):
+                piece = next(iterator, None)
+            if piece is None:
+                return
+            if self.first_token is None:
+                self.first_token = self.elapsed()
+            yield piece
+
+    def add_usage(self, input_tokens: int | None, output_tokens: int | None) -> None:
+        """Add the tokens of a model response.
+
+        Parameters
+        ----------
+        input_tokens : int | None
+            Tokens of the prompt, None if the backend did not report them.
+        output_tokens : int | None
+            Tokens of the response, None if not reported.
+        """
+        if input_tokens is not None:
+            self.input_tokens = (self.input_tokens or 0) + input_tokens
+        if output_tokens is not None:
+            self.output_tokens = (self.output_tokens or 0) + output_tokens
+
+
+def record_usage(input_tokens: int | None, output_tokens: int | None) -> None:
+    """Report the tokens of a model response to the current metrics.
+
+    Parameters
+    ----------
+    input_tokens : int | None
+        Tokens of the prompt.
+    output_tokens : int | None
+        Tokens of the response.
+    """
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.add_usage(input_tokens, output_tokens)
+
+
+def record_cache_hit() -> None:
+    """Report that the current query was answered from the response cache."""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.cached = True
+
+
+def metrics_stats(metrics: pd.DataFrame, by: str) -> pd.DataFrame:
+    """Summarize latency and token percentiles of the logged queries.
+
+    Parameters
+    ----------
+    metrics : pd.DataFrame
+        Metrics table of the interactions database.
+    by : str
+        Column to group by, e.g. 'model' or 'post_name'.
+
+    Returns
+    -------
+    pd.DataFrame
+        Number of queries, cache hits and the `PERCENTILES` of each of
+        `STATS_COLUMNS` per group, e.g. 'total_p95' in seconds.
+    """
+    groups = metrics.groupby(by)
+    stats = pd.DataFrame({"queries": groups.size(), "cached": groups["cached"].sum()})
+    # Columns without any value, e.g. no streamed answers, are read as objects
+    values = metrics[list(STATS_COLUMNS)].astype(float).groupby(metrics[by])
+    for column, short in STATS_COLUMNS.items():
+        for percentile in PERCENTILES:
+            stats[f"{short}_p{round(percentile * 100)}"] = values[column].quantile(
+                percentile
+            )
+    return stats
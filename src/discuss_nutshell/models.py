@@ -0,0 +1,561 @@
+"""Text generation models used to query and summarize posts."""
+
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any, Protocol
+
+from google import genai
+
+from discuss_nutshell.metrics import record_usage
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+EMBEDDING_MODEL = "gemini-embedding-001"
+MAX_TOKENS = 8192  # response limit required by the Anthropic API
+
+# Default number of requests in flight per backend
+CONNECTION_LIMITS = {"gemini": 8, "openai": 8, "anthropic": 8}
+# Backend of a model name without a 'backend:' prefix, by name prefix
+MODEL_PREFIXES = {
+    "gemini": "gemini",
+    "gpt": "openai",
+    "o1": "openai",
+    "o3": "openai",
+    "o4": "openai",
+    "claude": "anthropic",
+}
+
+_pool: "ClientPool | None" = None
+_pool_lock = threading.Lock()
+
+
+class TextModel(Protocol):
+    """A model turning a list of prompt parts into a text response.
+
+    Implementations must be safe to call from several threads at once.
+    """
+
+    def generate(self, contents: list[str]) -> str:
+        """Generate a response.
+
+        Parameters
+        ----------
+        contents : list[str]
+            Prompt parts, e.g. the context followed by the question.
+
+        Returns
+        -------
+        str
+            Text of the response.
+        """
+        ...
+
+
+class StreamingModel(TextModel, Protocol):
+    """A text model that can also return its response as it is generated."""
+
+    def stream(self, contents: list[str]) -> Iterator[str]:
+        """Generate a response piece by piece.
+
+        Parameters
+        ----------
+        contents : list[str]
+            Prompt parts, e.g. the context followed by the question.
+
+        Yields
+        ------
+        str
+            Consecutive pieces of the response text.
+        """
+        ...
+
+
+class Embedder(Protocol):
+    """A model turning texts into embedding vectors."""
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        """Embed texts.
+
+        Parameters
+        ----------
+        texts : list[str]
+            Texts to embed, e.g. posts or a query.
+
+        Returns
+        -------
+        list[list[float]]
+            One vector per text, all of the same length.
+        """
+        ...
+
+
+def _gemini_client() -> Any:
+    return genai.Client()
+
+
+def _openai_client() -> Any:
+    # Imported on first use, so that other backends do not pay for it
+    import openai  # noqa: PLC0415
+
+    return openai.OpenAI()
+
+
+def _anthropic_client() -> Any:
+    import anthropic  # noqa: PLC0415
+
+    return anthropic.Anthropic()
+
+
+CLIENT_FACTORIES: dict[str, Callable[[], Any]] = {
+    "gemini": _gemini_client,
+    "openai": _openai_client,
+    "anthropic": _anthropic_client,
+}
+
+
+class ClientPool:
+    """One lazily created client per backend, shared by every model.
+
+    Parameters
+    ----------
+    limits : dict[str, int] | None, optional
+        Maximum number of requests in flight per backend, overriding
+        `CONNECTION_LIMITS`.
+    factories : dict[str, Callable[[], Any]] | None, optional
+        Function creating the client of each backend, by default
+        `CLIENT_FACTORIES`.
+
+    Notes
+    -----
+    Clients read their API keys from the environment and keep their HTTP
+    connections open, so connection setup and authentication are paid once
+    per process instead of once per query. The clients are thread-safe;
+    the limits are enforced with one semaphore per backend.
+    """
+
+    def __init__(
+        self,
+        limits: dict[str, int] | None = None,
+        factories: dict[str, Callable[[], Any]] | None = None,
+    ) -> None:
+        self.factories = CLIENT_FACTORIES if factories is None else factories
+        self.limits = {**CONNECTION_LIMITS, **(limits or {})}
+        for backend, limit in self.limits.items():
+            if limit < 1:
+                msg = f"Invalid connection limit for {backend}: {limit}"
+                raise ValueError(msg)
+        self._semaphores = {
+            backend: threading.BoundedSemaphore(limit)
+            for backend, limit in self.limits.items()
+        }
+        self._clients: dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def client(self, backend: str) -> Any:
+        """Return the client of a backend, creating it on first use.
+
+        Parameters
+        ----------
+        backend : str
+            Name of the backend, a key of `factories`.
+
+        Returns
+        -------
+        Any
+            The shared client.
+
+        Raises
+        ------
+        ValueError
+            If the backend is unknown.
+        """
+        if backend not in self.factories:
+            msg = f"Unknown model backend: {backend}"
+            raise ValueError(msg)
+        with self._lock:
+            if backend not in self._clients:
+                self._clients[backend] = self.factories[backend]()
+            return self._clients[backend]
+
+    @contextmanager
+    def limit(self, backend: str) -> Iterator[None]:
+        """Hold one of the connection slots of a backend.
+
+        Parameters
+        ----------
+        backend : str
+            Name of the backend.
+
+        Yields
+        ------
+        None
+            While the slot is held, after waiting for a free one.
+        """
+        semaphore = self._semaphores.get(backend)
+        if semaphore is None:
+            yield
+            return
+        with semaphore:
+            yield
+
+
+def configure_clients(limits: dict[str, int] | None = None) -> ClientPool:
+    """Replace the process-wide client pool returned by `get_client_pool`.
+
+    Parameters
+    ----------
+    limits : dict[str, int] | None, optional
+        Maximum number of requests in flight per backend.
+
+    Returns
+    -------
+    ClientPool
+        The new pool.
+    """
+    global _pool  # noqa: PLW0603
+    with _pool_lock:
+        _pool = ClientPool(limits)
+    return _pool
+
+
+def get_client_pool() -> ClientPool:
+    """Return the process-wide client pool, creating it on first use.
+
+    Returns
+    -------
+    ClientPool
+        Pool shared by every model that is not given its own.
+    """
+    global _pool  # noqa: PLW0603
+    with _pool_lock:
+        if _pool is None:
+            _pool = ClientPool()
+        return _pool
+
+
+class GeminiModel:
+    """Gemini model called through the google-genai client.
+
+    Parameters
+    ----------
+    model : str, optional
+        Name of the Gemini model.
+    pool : ClientPool | None, optional
+        Pool providing the client and connection limit. The process-wide
+        pool is used if None.
+    """
+
+    backend = "gemini"
+
+    def __init__(
+        self, model: str = DEFAULT_MODEL, pool: ClientPool | None = None
+    ) -> None:
+        self.model = model
+        self.pool = get_client_pool() if pool is None else pool
+
+    def generate(self, contents: list[str]) -> str:
+        """Generate a response with Gemini.
+
+        Parameters
+        ----------
+        contents : list[str]
+            Prompt parts, e.g. the context followed by the question.
+
+        Returns
+        -------
+        str
+            Text of the response.
+        """
+        client = self.pool.client(self.backend)
+        with self.pool.limit(self.backend):
+            response = client.models.generate_content(
+                model=self.model, contents=contents
+            )
+        self._record_usage(response.usage_metadata)
+        return str(response.text)
+
+    def stream(self, contents: list[str]) -> Iterator[str]:
+        """Generate a response with Gemini, yielding text as it arrives.
+
+        Parameters
+        ----------
+        contents : list[str]
+            Prompt parts, e.g. the context followed by the question.
+
+        Yields
+        ------
+        str
+            Consecutive pieces of the response text.
+        """
+        client = self.pool.client(self.backend)
+        usage = None
+        with self.pool.limit(self.backend):
+            for chunk in client.models.generate_content_stream(
+                model=self.model, contents=contents
+            ):
+                # Every chunk reports the usage of the response so far
+                usage = chunk.usage_metadata or usage
+                if chunk.text:
+                    yield chunk.text
+        self._record_usage(usage)
+
+    @staticmethod
+    def _record_usage(usage: Any) -> None:
+        if usage is not None:
+            record_usage(usage.prompt_token_count, usage.candidates_token_count)
+
+
+class OpenAIModel:
+    """OpenAI chat model called through the openai client.
+
+    Parameters
+    ----------
+    model : str
+        Name of the OpenAI model, e.g. 'gpt-4.1-mini'.
+    pool : ClientPool | None, optional
+        Pool providing the client and connection limit.
+
+    Notes
+    -----
+    The prompt parts are sent as one user message, separated by blank
+    lines.
+    """
+
+    backend = "openai"
+
+    def __init__(self, model: str, pool: ClientPool | None = None) -> None:
+        self.model = model
+        self.pool = get_client_pool() if pool is None else pool
+
+    @staticmethod
+    def _messages(contents: list[str]) -> list[dict[str, str]]:
+        return [{"role": "user", "content": "\n\n".join(contents)}]
+
+    def generate(self, contents: list[str]) -> str:
+        """Generate a response with OpenAI.
+
+        Parameters
+        ----------
+        contents : list[str]
+            Prompt parts, e.g. the context followed by the question.
+
+        Returns
+        -------
+        str
+            Text of the response.
+        """
+        client = self.pool.client(self.backend)
+        with self.pool.limit(self.backend):
+            response = client.chat.completions.create(
+                model=self.model, messages=self._messages(contents)
+            )
+        self._record_usage(response.usage)
+        return str(response.choices[0].message.content or "")
+
+    def stream(self, contents: list[str]) -> Iterator[str]:
+        """Generate a response with OpenAI, yielding text as it arrives.
+
+        Parameters
+        ----------
+        contents : list[str]
+            Prompt parts, e.g. the context followed by the question.
+
+        Yields
+        ------
+        str
+            Consecutive pieces of the response text.
+        """
+        client = self.pool.client(self.backend)
+        with self.pool.limit(self.backend):
+            for chunk in client.chat.completions.create(
+                model=self.model,
+                messages=self._messages(contents),
+                stream=True,
+                stream_options={"include_usage": True},
+            ):
+                # The usage comes in a last chunk without choices
+                self._record_usage(chunk.usage)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+    @staticmethod
+    def _record_usage(usage: Any) -> None:
+        if usage is not None:
+            record_usage(usage.prompt_tokens, usage.completion_tokens)
+
+
+class AnthropicModel:
+    """Claude model called through the anthropic client.
+
+    Parameters
+    ----------
+    model : str
+        Name of the Claude model.
+    pool : ClientPool | None, optional
+        Pool providing the client and connection limit.
+    max_tokens : int, optional
+        Maximum length of a response.
+
+    Notes
+    -----
+    The prompt parts are sent as one user message, separated by blank
+    lines.
+    """
+
+    backend = "anthropic"
+
+    def __init__(
+        self, model: str, pool: ClientPool | None = None, max_tokens: int = MAX_TOKENS
+    ) -> None:
+        self.model = model
+        self.pool = get_client_pool() if pool is None else pool
+        self.max_tokens = max_tokens
+
+    def _request(self, contents: list[str]) -> dict[str, Any]:
+        return {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "messages": [{"role": "user", "content": "\n\n".join(contents)}],
+        }
+
+    def generate(self, contents: list[str]) -> str:
+        """Generate a response with Claude.
+
+        Parameters
+        ----------
+        contents : list[str]
+            Prompt parts, e.g. the context followed by the question.
+
+        Returns
+        -------
+        str
+            Text of the response.
+        """
+        client = self.pool.client(self.backend)
+        with self.pool.limit(self.backend):
+            response = client.messages.create(**self._request(contents))
+        self._record_usage(response.usage)
+        return "".join(block.text for block in response.content if block.type == "text")
+
+    def stream(self, contents: list[str]) -> Iterator[str]:
+        """Generate a response with Claude, yielding text as it arrives.
+
+        Parameters
+        ----------
+        contents : list[str]
+            Prompt parts, e.g. the context followed by the question.
+
+        Yields
+        ------
+        str
+            Consecutive pieces of the response text.
+        """
+        client = self.pool.client(self.backend)
+        with (
+            self.pool.limit(self.backend),
+            client.messages.stream(**self._request(contents)) as stream,
+        ):
+            yield from stream.text_stream
+            self._record_usage(stream.get_final_message().usage)
+
+    @staticmethod
+    def _record_usage(usage: Any) -> None:
+        record_usage(usage.input_tokens, usage.output_tokens)
+
+
+MODEL_CLASSES: dict[str, Callable[[str, ClientPool | None], StreamingModel]] = {
+    "gemini": GeminiModel,
+    "openai": OpenAIModel,
+    "anthropic": AnthropicModel,
+}
+
+
+def model_backend(name: str) -> tuple[str, str]:
+    """Split a model name into its backend and the backend's model name.
+
+    Parameters
+    ----------
+    name : str
+        Model name, either 'backend:model' (e.g. 'openai:gpt-4.1-mini') or
+        a bare name starting with a prefix of `MODEL_PREFIXES`.
+
+    Returns
+    -------
+    tuple[str, str]
+        The backend and the model name.
+
+    Raises
+    ------
+    ValueError
+        If the backend cannot be told from the name.
+    """
+    backend, sep, model = name.partition(":")
+    if sep:
+        if backend not in MODEL_CLASSES:
+            msg = f"Unknown model backend: {backend}"
+            raise ValueError(msg)
+        return backend, model
+    for prefix, backend in MODEL_PREFIXES.items():
+        if name.startswith(prefix):
+            return backend, name
+    msg = f"Cannot tell the backend of model {name!r}, use 'backend:model'"
+    raise ValueError(msg)
+
+
+def get_model(
+    name: str = DEFAULT_MODEL, pool: ClientPool | None = None
+) -> StreamingModel:
+    """Return a model of any backend, sharing the pooled clients.
+
+    Parameters
+    ----------
+    name : str, optional
+        Model name, see `model_backend`.
+    pool : ClientPool | None, optional
+        Pool providing the clients. The process-wide pool is used if None.
+
+    Returns
+    -------
+    StreamingModel
+        The model.
+    """
+    backend, model = model_backend(name)
+    return MODEL_CLASSES[backend](model, pool)
+
+
+class GeminiEmbedder:
+    """Gemini embedding model called through the google-genai client.
+
+    Parameters
+    ----------
+    model : str, optional
+        Name of the Gemini embedding model.
+    pool : ClientPool | None, optional
+        Pool providing the client and connection limit.
+    """
+
+    backend = "gemini"
+
+    def __init__(
+        self, model: str = EMBEDDING_MODEL, pool: ClientPool | None = None
+    ) -> None:
+        self.model = model
+        self.pool = get_client_pool() if pool is None else pool
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        """Embed texts with Gemini.
+
+        Parameters
+        ----------
+        texts : list[str]
+            Texts to embed.
+
+        Returns
+        -------
+        list[list[float]]
+            One vector per text.
+        """
+        client = self.pool.client(self.backend)
+        with self.pool.limit(self.backend):
+            response = client.models.embed_content(model=self.model, contents=texts)
+        return [list(embedding.values or []) for embedding in response.embeddings or []]
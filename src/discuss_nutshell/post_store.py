@@ -0,0 +1,202 @@
+"""SQLite store holding the processed posts of every topic."""
+
+import sqlite3
+import threading
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+from discuss_nutshell.preprocessor import write_post_files
+
+current_path = Path.cwd()
+data_path = current_path / "data"
+STORE_FILE = data_path / "posts.db"
+
+STORE_COLUMNS = [
+    "id",
+    "topic_id",
+    "post_number",
+    "author",
+    "created_at",
+    "clean_content",
+]
+
+
+class PostStore:
+    """Processed posts of all topics in one indexed SQLite table.
+
+    Parameters
+    ----------
+    db_file : str | Path, optional
+        Path of the SQLite database.
+
+    Notes
+    -----
+    Posts are keyed by id, with a unique index on (topic_id, post_number),
+    so both lookups are a single index probe. This replaces the thousands
+    of 'post_{id}.txt' files written by `write_post_files`, which remain
+    available through `export_post_files`.
+    """
+
+    def __init__(self, db_file: str | Path = STORE_FILE) -> None:
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS posts (
+                              id INTEGER PRIMARY KEY,
+                              topic_id INTEGER,
+                              post_number INTEGER,
+                              author TEXT,
+                              created_at TEXT,
+                              clean_content TEXT)""")
+        self._conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS posts_topic_number "
+            "ON posts (topic_id, post_number)"
+        )
+        self._conn.commit()
+
+    def write(self, df: pd.DataFrame) -> None:
+        """Insert or replace processed posts.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            DataFrame containing posts with columns: id, topic_id, name,
+            created_at, post_number, and clean_cooked.
+        """
+        rows = df[
+            ["id", "topic_id", "post_number", "name", "created_at", "clean_cooked"]
+        ].itertuples(index=False, name=None)
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO posts VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def delete(self, post_ids: Iterable[int]) -> None:
+        """Remove posts.
+
+        Parameters
+        ----------
+        post_ids : Iterable[int]
+            Ids of the posts to remove.
+        """
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM posts WHERE id = ?", ((post_id,) for post_id in post_ids)
+            )
+            self._conn.commit()
+
+    def _one(self, sql: str, params: tuple[Any, ...]) -> dict[str, Any] | None:
+        with self._lock:
+            row = self._conn.execute(sql, params).fetchone()
+        return dict(row) if row is not None else None
+
+    def get(self, post_id: int) -> dict[str, Any] | None:
+        """Return a post by id.
+
+        Parameters
+        ----------
+        post_id : int
+            ID of the post.
+
+        Returns
+        -------
+        dict[str, Any] | None
+            The post with the keys of `STORE_COLUMNS`, or None if unknown.
+        """
+        return self._one("SELECT * FROM posts WHERE id = ?", (post_id,))
+
+    def get_by_number(self, topic_id: int, post_number: int) -> dict[str, Any] | None:
+        """Return a post by its position in a topic.
+
+        Parameters
+        ----------
+        topic_id : int
+            ID of the topic.
+        post_number : int
+            Number of the post in the topic.
+
+        Returns
+        -------
+        dict[str, Any] | None
+            The post with the keys of `STORE_COLUMNS`, or None if unknown.
+        """
+        return self._one(
+            "SELECT * FROM posts WHERE topic_id = ? AND post_number = ?",
+            (topic_id, post_number),
+        )
+
+    def topic_posts(self, topic_id: int) -> pd.DataFrame:
+        """Return the posts of a topic in the layout of the processed frame.
+
+        Parameters
+        ----------
+        topic_id : int
+            ID of the topic.
+
+        Returns
+        -------
+        pd.DataFrame
+            DataFrame with columns id, topic_id, post_number, name,
+            created_at and clean_cooked, ordered by post number.
+        """
+        with self._lock:
+            return pd.read_sql_query(
+                """SELECT id, topic_id, post_number, author AS name, created_at,
+                          clean_content AS clean_cooked
+                   FROM posts WHERE topic_id = ? ORDER BY post_number""",
+                self._conn,
+                params=(topic_id,),
+            )
+
+    def topic_ids(self) -> list[int]:
+        """Return the ids of the stored topics.
+
+        Returns
+        -------
+        list[int]
+            Topic ids in ascending order.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT topic_id FROM posts ORDER BY topic_id"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def export_post_files(
+        self, output_path: str | Path, topic_id: int | None = None
+    ) -> int:
+        """Write the stored posts as 'post_{id}.txt' files.
+
+        Parameters
+        ----------
+        output_path : str | Path
+            Directory where the post files should be written.
+        topic_id : int | None, optional
+            Only export this topic. Every topic is exported if None.
+
+        Returns
+        -------
+        int
+            Number of files written.
+        """
+        output_path = Path(output_path)
+        output_path.mkdir(parents=True, exist_ok=True)
+        topic_ids = self.topic_ids() if topic_id is None else [topic_id]
+        count = 0
+        for tid in topic_ids:
+            df = self.topic_posts(tid)
+            write_post_files(df, output_path)
+            count += len(df)
+        return count
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
@@ -0,0 +1,269 @@
+"""Per-post summaries, cached by content hash, and their aggregate file."""
+
+import hashlib
+import sqlite3
+import threading
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from discuss_nutshell.models import TextModel
+from discuss_nutshell.post_store import STORE_FILE
+from discuss_nutshell.posts_txt import FIELDS, PostsTxtWriter
+
+SUMMARIES_TXT_SUFFIX = "_summaries.txt"
+SUMMARY_PROMPT = (
+    "Summarize this post of a Discourse thread in one to three sentences. "
+    "Keep the author's position, proposals and questions. Only output the "
+    "summary."
+)
+SHORT_POST_CHARS = 300  # posts this short are their own summary
+CONCURRENCY = 4
+BATCH_SIZE = 500  # ids per query, below SQLite's bound parameter limit
+
+# Layout of '{topic_id}_summaries.txt': posts with the summary as content
+SUMMARY_FIELDS = [*FIELDS[:-1], ("Summary", "summary")]
+
+
+def content_hash(text: str, model: str) -> str:
+    """Return the hash identifying a post's content, model and prompt.
+
+    Parameters
+    ----------
+    text : str
+        Clean content of a post.
+    model : str
+        Name of the model summarizing the post.
+
+    Returns
+    -------
+    str
+        SHA-256 hex digest. It changes when the post is edited, or when
+        the model or `SUMMARY_PROMPT` changes.
+    """
+    digest = hashlib.sha256(f"{model}\0{SUMMARY_PROMPT}\0".encode())
+    digest.update(text.encode())
+    return digest.hexdigest()
+
+
+class SummaryCache:
+    """SQLite table of post summaries next to the post store.
+
+    Parameters
+    ----------
+    db_file : str | Path, optional
+        Path of the SQLite database, by default the post store's.
+
+    Notes
+    -----
+    One summary is kept per post id, with the hash of the content it was
+    made from. A summary is only served while the hash still matches, so
+    an edited post is summarized again.
+    """
+
+    def __init__(self, db_file: str | Path = STORE_FILE) -> None:
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS post_summaries (
+                              id INTEGER PRIMARY KEY,
+                              content_hash TEXT,
+                              summary TEXT)""")
+        self._conn.commit()
+
+    def get_many(self, hashes: dict[int, str]) -> dict[int, str]:
+        """Look up the summaries that match the current content.
+
+        Parameters
+        ----------
+        hashes : dict[int, str]
+            Content hash by post id.
+
+        Returns
+        -------
+        dict[int, str]
+            Summary of each post whose stored hash matches.
+        """
+        ids = list(hashes)
+        found: dict[int, str] = {}
+        with self._lock:
+            for i in range(0, len(ids), BATCH_SIZE):
+                batch = ids[i : i + BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    "SELECT id, content_hash, summary FROM post_summaries "
+                    f"WHERE id IN ({placeholders})",
+                    batch,
+                )
+                found.update(
+                    (post_id, summary)
+                    for post_id, digest, summary in rows
+                    if hashes[post_id] == digest
+                )
+        return found
+
+    def put_many(self, rows: Iterable[tuple[int, str, str]]) -> None:
+        """Store summaries, replacing those of the same posts.
+
+        Parameters
+        ----------
+        rows : Iterable[tuple[int, str, str]]
+            Post id, content hash and summary.
+        """
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO post_summaries VALUES (?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            cursor = self._conn.execute("SELECT COUNT(*) FROM post_summaries")
+            return cursor.fetchone()[0]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
+
+
+class PostSummarizer:
+    """Summarize each post once, reusing the summaries of unchanged posts.
+
+    Parameters
+    ----------
+    model : TextModel
+        Model writing the summaries.
+    cache : SummaryCache
+        Summaries of previously seen posts.
+    name : str
+        Name of the model, part of the key of the cached summaries.
+    concurrency : int, optional
+        Maximum number of model calls in flight.
+    short_chars : int, optional
+        Posts of at most this many characters are kept as they are,
+        without a model call.
+    """
+
+    def __init__(
+        self,
+        model: TextModel,
+        cache: SummaryCache,
+        name: str,
+        concurrency: int = CONCURRENCY,
+        short_chars: int = SHORT_POST_CHARS,
+    ) -> None:
+        self.model = model
+        self.cache = cache
+        self.name = name
+        self.concurrency = concurrency
+        self.short_chars = short_chars
+
+    def _summarize_one(self, text: str) -> str:
+        if len(text) <= self.short_chars:
+            return text
+        return self.model.generate([text, SUMMARY_PROMPT]).strip()
+
+    def summarize_posts(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Return the posts with the summary of each one.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            DataFrame with 'id' and 'clean_cooked' columns, e.g. from
+            `preprocessor.clean_cooked_posts`.
+
+        Returns
+        -------
+        pd.DataFrame
+            Copy of `df` with a new 'summary' column. `df` itself is left
+            unchanged.
+
+        Notes
+        -----
+        Only new and edited posts are sent to the model, concurrently. Their
+        summaries are stored before returning, except empty ones, which
+        are asked for again next time.
+        """
+        texts = dict(zip(df["id"].tolist(), df["clean_cooked"].tolist(), strict=True))
+        hashes = {
+            post_id: content_hash(text, self.name) for post_id, text in texts.items()
+        }
+        cached = self.cache.get_many(hashes)
+        missing = [post_id for post_id in texts if post_id not in cached]
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            summaries = list(
+                executor.map(
+                    self._summarize_one, (texts[post_id] for post_id in missing)
+                )
+            )
+        fresh = dict(zip(missing, summaries, strict=True))
+        self.cache.put_many(
+            (post_id, hashes[post_id], summary)
+            for post_id, summary in fresh.items()
+            if summary
+        )
+        return df.assign(
+            summary=[
+                cached[post_id] if post_id in cached else fresh[post_id]
+                for post_id in df["id"].tolist()
+            ]
+        )
+
+
+def summaries_txt_path(topic_id: int, output_path: str | Path) -> Path:
+    """Return the path of the summaries file of a topic.
+
+    Parameters
+    ----------
+    topic_id : int
+        ID of the topic.
+    output_path : str | Path
+        Directory holding the processed files.
+
+    Returns
+    -------
+    Path
+        Path of '{topic_id}_summaries.txt', next to '{topic_id}_posts.txt'.
+    """
+    return Path(output_path) / f"{topic_id}{SUMMARIES_TXT_SUFFIX}"
+
+
+def summaries_writer(topic_id: int, output_path: str | Path) -> PostsTxtWriter:
+    """Return a writer of the summaries file of a topic.
+
+    Parameters
+    ----------
+    topic_id : int
+        ID of the topic.
+    output_path : str | Path
+        Directory where '{topic_id}_summaries.txt' should be written.
+
+    Returns
+    -------
+    PostsTxtWriter
+        Writer of posts with a 'summary' column, in the layout of
+        '{topic_id}_posts.txt' with a 'Summary' line instead of the
+        content. The file is indexed, so it can be queried by post range
+        or top-k.
+    """
+    return PostsTxtWriter(summaries_txt_path(topic_id, output_path), SUMMARY_FIELDS)
+
+
+def write_summaries_txt(
+    df: pd.DataFrame, topic_id: int, output_path: str | Path
+) -> None:
+    """Write the summaries of all posts of a topic to a single text file.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame containing posts with columns: id, name, created_at,
+        post_number, and summary.
+    topic_id : int
+        ID of the topic.
+    output_path : str | Path
+        Directory where '{topic_id}_summaries.txt' should be written.
+    """
+    with summaries_writer(topic_id, output_path) as writer:
+        writer.write(df)
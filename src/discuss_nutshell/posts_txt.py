@@ -0,0 +1,464 @@
+"""Rendering, writing and indexed reading of the posts text files."""
+
+import contextlib
+import mmap
+import re
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from types import TracebackType
+from typing import IO, Any, Self
+
+import pandas as pd
+
+from discuss_nutshell.utils import atomic_open, atomic_write_bytes
+
+POSTS_TXT_SUFFIX = "_posts.txt"
+INDEX_SUFFIX = ".idx"
+BUFFER_SIZE = 1 << 20  # bytes buffered before a write system call
+
+# Index header: magic, version, number of posts, size of the text file
+INDEX_HEADER = struct.Struct("<4sIQQ")
+INDEX_MAGIC = b"DNPI"
+INDEX_VERSION = 1
+
+# Label and DataFrame column of each line of a post, in file order
+FIELDS = [
+    ("ID", "id"),
+    ("Author", "name"),
+    ("Created at", "created_at"),
+    ("Number", "post_number"),
+    ("Clean content", "clean_cooked"),
+]
+# Labelled lines starting a post block, capturing the post number. Contents
+# may span several lines, so a block is only recognized by all its labels.
+BLOCK_START = re.compile(
+    b"^"
+    + b"\n".join(
+        re.escape(f"{label}: ".encode())
+        + (rb"(-?\d+)" if column == "post_number" else rb"[^\n]*")
+        for label, column in FIELDS[:-1]
+    )
+    + b"\n"
+    + re.escape(f"{FIELDS[-1][0]}: ".encode()),
+    re.MULTILINE,
+)
+
+
+def render_post_blocks(
+    df: pd.DataFrame, fields: list[tuple[str, str]] = FIELDS
+) -> pd.Series:
+    """Render each post as its block of '{topic_id}_posts.txt'.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame containing posts with columns: id, name, created_at,
+        post_number, and clean_cooked.
+    fields : list[tuple[str, str]], optional
+        Label and column of each line of a block.
+
+    Returns
+    -------
+    pd.Series
+        One block of five 'Label: value' lines per post, in row order.
+
+    Notes
+    -----
+    The blocks are built with column-wise string concatenation instead of
+    a Python loop over the rows.
+    """
+    lines = [f"{label}: " + df[column].astype(str) + "\n" for label, column in fields]
+    blocks = lines[0]
+    for line in lines[1:]:
+        blocks = blocks + line
+    return blocks
+
+
+def render_posts_txt(df: pd.DataFrame) -> str:
+    """Render posts as the text of '{topic_id}_posts.txt'.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame containing posts with columns: id, name, created_at,
+        post_number, and clean_cooked.
+
+    Returns
+    -------
+    str
+        One block of five 'Label: value' lines per post, in row order.
+    """
+    return "".join(render_post_blocks(df).tolist())
+
+
+def posts_txt_path(topic_id: int, output_path: str | Path) -> Path:
+    """Return the path of the posts text file of a topic.
+
+    Parameters
+    ----------
+    topic_id : int
+        ID of the topic.
+    output_path : str | Path
+        Directory holding the processed files.
+
+    Returns
+    -------
+    Path
+        Path of '{topic_id}_posts.txt'. Each topic has its own file, so
+        topics processed into the same directory never replace each other.
+    """
+    return Path(output_path) / f"{topic_id}{POSTS_TXT_SUFFIX}"
+
+
+def index_path(file_path: str | Path) -> Path:
+    """Return the path of the offset index of a posts text file.
+
+    Parameters
+    ----------
+    file_path : str | Path
+        Path of the posts text file.
+
+    Returns
+    -------
+    Path
+        Path of the sidecar index, e.g. '104906_posts.txt.idx'.
+    """
+    path = Path(file_path)
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+def index_bytes(numbers: array[int], offsets: array[int]) -> bytes:
+    """Return the content of the offset index of a posts text file.
+
+    Parameters
+    ----------
+    numbers : array[int]
+        Post number of each block.
+    offsets : array[int]
+        Byte offset of each block, followed by the size of the file.
+
+    Returns
+    -------
+    bytes
+        Header followed by the numbers and the offsets.
+    """
+    header = INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(numbers), offsets[-1])
+    return header + numbers.tobytes() + offsets.tobytes()
+
+
+def scan_posts_txt(data: bytes) -> tuple[array[int], array[int]]:
+    """Find the posts of a posts text file written without an index.
+
+    Parameters
+    ----------
+    data : bytes
+        Content of the file, e.g. an 'all_posts.txt' of older versions.
+
+    Returns
+    -------
+    tuple[array[int], array[int]]
+        Post number of each block, and byte offset of each block followed
+        by the size of the file, as stored in the index.
+    """
+    numbers = array("q")
+    offsets = array("Q")
+    for match in BLOCK_START.finditer(data):
+        numbers.append(int(match[1]))
+        offsets.append(match.start())
+    offsets.append(len(data))
+    return numbers, offsets
+
+
+class PostsTxtWriter:
+    """Write a posts text file through one buffered handle, atomically.
+
+    Parameters
+    ----------
+    file_path : str | Path
+        Path of the file to write.
+    fields : list[tuple[str, str]], optional
+        Label and column of each line of a post.
+
+    Notes
+    -----
+    Posts are written to a temporary file in the same directory, which
+    replaces `file_path` when the context exits without an error. An
+    interrupted run leaves the previous file untouched.
+
+    A sidecar index, e.g. '104906_posts.txt.idx', records the post number
+    and the byte offset of every post, for `PostsTxtReader`.
+
+    Examples
+    --------
+    >>> with PostsTxtWriter("data/104906_posts.txt") as writer:  # doctest: +SKIP
+    ...     writer.write(df)
+    """
+
+    def __init__(
+        self, file_path: str | Path, fields: list[tuple[str, str]] = FIELDS
+    ) -> None:
+        self.path = Path(file_path)
+        self.fields = fields
+        self._stack: contextlib.ExitStack | None = None
+        self._file: IO[Any] | None = None
+        self._numbers = array("q")
+        self._offsets = array("Q", [0])
+
+    def __enter__(self) -> Self:
+        self._stack = contextlib.ExitStack()
+        self._file = self._stack.enter_context(
+            atomic_open(self.path, "wb", buffering=BUFFER_SIZE)
+        )
+        self._numbers = array("q")
+        self._offsets = array("Q", [0])
+        return self
+
+    def write(self, df: pd.DataFrame) -> None:
+        """Append posts to the file being written.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            DataFrame containing posts with columns: id, name, created_at,
+            post_number, and clean_cooked.
+        """
+        if self._file is None:
+            msg = "PostsTxtWriter must be used as a context manager"
+            raise RuntimeError(msg)
+        if df.empty:
+            return
+        blocks = render_post_blocks(df, self.fields).str.encode("utf-8")
+        end = self._offsets[-1]
+        for size in blocks.str.len().tolist():
+            end += size
+            self._offsets.append(end)
+        self._numbers.extend(df["post_number"].astype("int64").tolist())
+        self._file.write(b"".join(blocks.tolist()))
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if self._stack is None:
+            return
+        stack, self._stack, self._file = self._stack, None, None
+        if exc_type is not None:
+            stack.__exit__(exc_type, exc, traceback)
+            return
+        with stack:
+            atomic_write_bytes(
+                index_path(self.path), index_bytes(self._numbers, self._offsets)
+            )
+
+
+class PostsTxtReader:
+    """Read ranges of posts from a posts text file through its offset index.
+
+    Parameters
+    ----------
+    file_path : str | Path
+        Path of a posts text file written by `PostsTxtWriter`.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the file or its index does not exist.
+    ValueError
+        If the index is not valid for the file, e.g. after the file was
+        written by another tool.
+
+    Notes
+    -----
+    The text file is memory-mapped, so a range of posts is found with a
+    binary search on the index and returned as a slice of the mapping,
+    without reading the rest of the file. Posts are expected in ascending
+    post number order, which is how the pipeline writes them.
+
+    Examples
+    --------
+    >>> with PostsTxtReader("data/104906_posts.txt") as reader:  # doctest: +SKIP
+    ...     text = reader.text(200, 260)
+    """
+
+    def __init__(self, file_path: str | Path) -> None:
+        self.path = Path(file_path)
+        data = index_path(self.path).read_bytes()
+        magic, version, count, size = INDEX_HEADER.unpack_from(data)
+        expected = INDEX_HEADER.size + 8 * (2 * count + 1)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION or len(data) != expected:
+            msg = f"Invalid posts index: {index_path(self.path)}"
+            raise ValueError(msg)
+        if self.path.stat().st_size != size:
+            msg = f"Posts index is out of date: {index_path(self.path)}"
+            raise ValueError(msg)
+
+        start = INDEX_HEADER.size
+        self.numbers = array("q", data[start : start + 8 * count])
+        self.offsets = array("Q", data[start + 8 * count :])
+        self._file = self.path.open("rb")
+        self._mmap = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        )
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    def view(self, first: int, last: int) -> memoryview:
+        """Return the bytes of a range of posts without copying them.
+
+        Parameters
+        ----------
+        first : int
+            Number of the first post of the range.
+        last : int
+            Number of the last post of the range, included.
+
+        Returns
+        -------
+        memoryview
+            Slice of the memory-mapped file holding the posts numbered from
+            `first` to `last`. Empty if no post is in the range.
+        """
+        lo = bisect_left(self.numbers, first)
+        hi = bisect_right(self.numbers, last)
+        if self._mmap is None or lo >= hi:
+            return memoryview(b"")
+        return memoryview(self._mmap)[self.offsets[lo] : self.offsets[hi]]
+
+    def text(self, first: int, last: int) -> str:
+        """Return the text of a range of posts.
+
+        Parameters
+        ----------
+        first : int
+            Number of the first post of the range.
+        last : int
+            Number of the last post of the range, included.
+
+        Returns
+        -------
+        str
+            The blocks of the posts numbered from `first` to `last`.
+        """
+        with self.view(first, last) as view:
+            return str(view, "utf-8")
+
+    def blocks(self, first: int, last: int) -> list[str]:
+        """Return the text of each post of a range.
+
+        Parameters
+        ----------
+        first : int
+            Number of the first post of the range.
+        last : int
+            Number of the last post of the range, included.
+
+        Returns
+        -------
+        list[str]
+            One block per post numbered from `first` to `last`.
+        """
+        lo = bisect_left(self.numbers, first)
+        hi = bisect_right(self.numbers, last)
+        if self._mmap is None:
+            return []
+        return [
+            self._mmap[self.offsets[i] : self.offsets[i + 1]].decode("utf-8")
+            for i in range(lo, hi)
+        ]
+
+    def close(self) -> None:
+        """Unmap and close the file."""
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+def read_post_blocks(file_path: str | Path, first: int, last: int) -> list[str]:
+    """Return the blocks of a range of posts of any posts text file.
+
+    Parameters
+    ----------
+    file_path : str | Path
+        Path of a posts text file, with or without its index.
+    first : int
+        Number of the first post of the range.
+    last : int
+        Number of the last post of the range, included.
+
+    Returns
+    -------
+    list[str]
+        One block per post numbered from `first` to `last`, in file order.
+
+    Notes
+    -----
+    Files without a valid index, e.g. written by older versions or
+    rewritten by another tool, are scanned. The index is then written
+    next to them if they hold posts in ascending order, so that later
+    reads go through `PostsTxtReader`. Files appending several topics
+    are scanned on every read.
+    """
+    path = Path(file_path)
+    try:
+        with PostsTxtReader(path) as reader:
+            return reader.blocks(first, last)
+    except (FileNotFoundError, ValueError):
+        pass
+    data = path.read_bytes()
+    numbers, offsets = scan_posts_txt(data)
+    with contextlib.suppress(OSError):
+        if numbers and numbers.tolist() == sorted(numbers):
+            atomic_write_bytes(index_path(path), index_bytes(numbers, offsets))
+        else:
+            index_path(path).unlink(missing_ok=True)
+    return [
+        data[offsets[i] : offsets[i + 1]].decode("utf-8")
+        for i, number in enumerate(numbers)
+        if first <= number <= last
+    ]
+
+
+def parse_post_range(posts: str) -> tuple[int, int]:
+    """Parse a range of post numbers.
+
+    Parameters
+    ----------
+    posts : str
+        A post number such as '12' or an inclusive range such as '200-260'.
+
+    Returns
+    -------
+    tuple[int, int]
+        First and last post numbers of the range.
+
+    Raises
+    ------
+    ValueError
+        If `posts` is not a number or a range of numbers.
+    """
+    first, _, last = posts.partition("-")
+    try:
+        bounds = int(first), int(last or first)
+    except ValueError:
+        msg = f"Invalid post range {posts!r}, expected e.g. '200-260'"
+        raise ValueError(msg) from None
+    if bounds[0] > bounds[1]:
+        msg = f"Invalid post range {posts!r}, the first post comes after the last"
+        raise ValueError(msg)
+    return bounds
@@ -1,10 +1,44 @@
 import json
+import os
+import textwrap
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from itertools import batched, repeat
 from pathlib import Path
 from typing import Any
 
 import pandas as pd
 
-from discuss_nutshell.utils import clean_html, format_date
+from discuss_nutshell.clean_cache import get_clean_cache
+from discuss_nutshell.cleaners import DEFAULT_CLEANER
+from discuss_nutshell.posts_txt import PostsTxtWriter, posts_txt_path
+from discuss_nutshell.utils import clean_html
+
+# Columns of a Discourse post used by the pipeline
+POST_COLUMNS = [
+    "id",
+    "topic_id",
+    "post_number",
+    "name",
+    "username",
+    "created_at",
+    "updated_at",
+    "version",
+    "cooked",
+]
+# Pipeline columns of the keys of '{topic_id}_all_posts.json' records
+RECORD_COLUMNS = {
+    "id": "id",
+    "author": "name",
+    "number": "post_number",
+    "created_at": "created_at",
+    "clean_content": "clean_cooked",
+}
+DATE_FORMAT = "%Y-%m-%d %H:%M"
+# Posts sent to a worker process at once, large enough to amortize pickling
+CLEAN_CHUNK_SIZE = 256
+# Posts processed together when streaming a file
+POST_BATCH_SIZE = 2000
 
 
 def read_json(file_path):
@@ -86,12 +120,12 @@ def drop_columns(df):
     Notes
     -----
     Drops a predefined set of columns that are not needed for analysis.
-    Uses errors="ignore" to handle missing columns gracefully.
+    Uses errors="ignore" to handle missing columns gracefully. The
+    'updated_at' and 'version' columns are kept to detect edited posts.
     """
     return df.drop(
         columns=[
             "avatar_template",
-            "updated_at",
             "reply_count",
             "reply_to_post_number",
             "quote_count",
@@ -107,7 +141,6 @@ def drop_columns(df):
             "flair_color",
             "flair_group_id",
             "badges_granted",
-            "version",
             "can_edit",
             "can_delete",
             "can_recover",
@@ -142,6 +175,31 @@ def drop_columns(df):
     )
 
 
+def build_posts_frame(posts):
+    """Create a dataframe holding only the columns used by the pipeline.
+
+    Parameters
+    ----------
+    posts : Iterable[dict[str, Any]]
+        Post dictionaries from a Discourse post stream.
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame with the `POST_COLUMNS` columns. Keys missing from a post
+        become missing values.
+
+    Notes
+    -----
+    Unlike `create_dataframe` followed by `drop_columns`, the dozens of
+    unused Discourse fields are never copied into the frame.
+    """
+    return pd.DataFrame.from_records(
+        (tuple(post.get(column) for column in POST_COLUMNS) for post in posts),
+        columns=POST_COLUMNS,
+    )
+
+
 def format_created_at(df):
     """Format created at date.
 
@@ -153,29 +211,204 @@ def format_created_at(df):
     Returns
     -------
     pd.DataFrame
-        DataFrame with 'created_at' column formatted to readable date strings.
+        DataFrame with 'created_at' column formatted to readable date strings
+        in the same YYYY-MM-DD HH:MM format as `utils.format_date`.
+
+    Notes
+    -----
+    The whole column is parsed and formatted at once with pandas datetime
+    operations instead of one Python call per row.
     """
-    df["created_at"] = df["created_at"].apply(format_date)
+    created_at = pd.to_datetime(df["created_at"], utc=True, format="ISO8601")
+    df["created_at"] = created_at.dt.strftime(DATE_FORMAT)
     return df
 
 
-def clean_cooked_posts(df):
+def prepare_posts(posts):
+    """Build a lean dataframe with formatted dates from a post stream.
+
+    Parameters
+    ----------
+    posts : Iterable[dict[str, Any]]
+        Post dictionaries from a Discourse post stream.
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame with the `POST_COLUMNS` columns and a formatted
+        'created_at' column.
+    """
+    return format_created_at(build_posts_frame(posts))
+
+
+def _clean_chunk(cooked, cleaner):
+    """Clean a chunk of HTML strings in a worker process."""
+    return [clean_html(html_text, cleaner=cleaner) for html_text in cooked]
+
+
+def _clean_all(cooked, cleaner, workers, chunk_size):
+    """Clean HTML strings, in a process pool if there are enough of them."""
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    if workers <= 1 or len(cooked) <= chunk_size:
+        return [clean_html(html_text, cleaner=cleaner) for html_text in cooked]
+
+    chunks = [cooked[i : i + chunk_size] for i in range(0, len(cooked), chunk_size)]
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+        results = executor.map(_clean_chunk, chunks, repeat(cleaner))
+        return [text for chunk in results for text in chunk]
+
+
+def clean_cooked_posts(
+    df, cleaner=DEFAULT_CLEANER, workers=1, chunk_size=CLEAN_CHUNK_SIZE, cache=None
+):
     """Clean post's HTML content.
 
     Parameters
     ----------
     df : pd.DataFrame
         DataFrame with 'cooked' column containing HTML content.
+    cleaner : str, optional
+        Name of the cleaner backend, see `cleaners.CLEANERS`.
+    workers : int | None, optional
+        Number of worker processes. 1 cleans in the current process and
+        None uses every core.
+    chunk_size : int, optional
+        Number of posts sent to a worker at once.
+    cache : CleanCache | None, optional
+        Cache of cleaned text by content hash. Defaults to the process-wide
+        cache if it is enabled.
 
     Returns
     -------
     pd.DataFrame
         DataFrame with new 'clean_cooked' column containing cleaned text.
+
+    Notes
+    -----
+    With several workers the 'cooked' column is split into chunks that are
+    cleaned in a process pool. Results are gathered in chunk order, so the
+    rows keep their post order. With a cache, only posts whose HTML is not
+    in the cache yet are cleaned.
     """
-    df["clean_cooked"] = df["cooked"].apply(clean_html)
+    cooked = ["" if pd.isna(html_text) else html_text for html_text in df["cooked"]]
+    cache = get_clean_cache() if cache is None else cache
+    if cache is None:
+        df["clean_cooked"] = _clean_all(cooked, cleaner, workers, chunk_size)
+        return df
+
+    keys = [cache.key(html_text, cleaner) for html_text in cooked]
+    cached = cache.get_many(keys)
+    missing = dict(zip(keys, cooked, strict=True))
+    for key in cached:
+        del missing[key]
+    cleaned = _clean_all(list(missing.values()), cleaner, workers, chunk_size)
+    fresh = dict(zip(missing, cleaned, strict=True))
+    cache.put_many(fresh)
+    df["clean_cooked"] = [cached[key] if key in cached else fresh[key] for key in keys]
     return df
 
 
+def process_posts(posts, workers=1, chunk_size=CLEAN_CHUNK_SIZE):
+    """Run the cleaning steps on a list of posts.
+
+    Parameters
+    ----------
+    posts : list[dict[str, Any]]
+        List of post dictionaries from a Discourse post stream.
+    workers : int | None, optional
+        Number of processes cleaning the HTML, see `clean_cooked_posts`.
+    chunk_size : int, optional
+        Number of posts sent to a worker at once.
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame with the `POST_COLUMNS` columns, formatted dates and a
+        'clean_cooked' column.
+    """
+    return clean_cooked_posts(
+        prepare_posts(posts), workers=workers, chunk_size=chunk_size
+    )
+
+
+def is_post_record(post: dict[str, Any]) -> bool:
+    """Tell processed post records from raw Discourse posts.
+
+    Parameters
+    ----------
+    post : dict[str, Any]
+        A post, e.g. from `json_stream.iter_posts`.
+
+    Returns
+    -------
+    bool
+        True for a record of '{topic_id}_all_posts.json', which has clean
+        content instead of the HTML 'cooked' field.
+    """
+    return "clean_content" in post and "cooked" not in post
+
+
+def records_frame(records: Iterable[dict[str, Any]]) -> pd.DataFrame:
+    """Build processed posts from '{topic_id}_all_posts.json' records.
+
+    Parameters
+    ----------
+    records : Iterable[dict[str, Any]]
+        Records as written by `post_records`.
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame with the columns returned by `process_posts`. Fields the
+        records do not keep, such as 'cooked' or 'version', are missing
+        values.
+    """
+    df = pd.DataFrame.from_records(
+        (tuple(record.get(key) for key in RECORD_COLUMNS) for record in records),
+        columns=list(RECORD_COLUMNS.values()),
+    )
+    return df.reindex(columns=[*POST_COLUMNS, "clean_cooked"])
+
+
+def iter_processed_posts(
+    posts: Iterable[dict[str, Any]],
+    batch_size: int = POST_BATCH_SIZE,
+    workers: int | None = 1,
+    chunk_size: int = CLEAN_CHUNK_SIZE,
+) -> Iterator[pd.DataFrame]:
+    """Run the cleaning steps on a stream of posts, one batch at a time.
+
+    Parameters
+    ----------
+    posts : Iterable[dict[str, Any]]
+        Raw Discourse posts or '{topic_id}_all_posts.json' records, e.g.
+        from `json_stream.iter_posts`.
+    batch_size : int, optional
+        Number of posts processed together.
+    workers : int | None, optional
+        Number of processes cleaning the HTML, see `clean_cooked_posts`.
+    chunk_size : int, optional
+        Number of posts sent to a worker at once.
+
+    Yields
+    ------
+    pd.DataFrame
+        Processed batches, as returned by `process_posts`.
+
+    Notes
+    -----
+    Posts are pulled from `posts` only when the next batch is needed, so at
+    most one batch of raw posts is held in memory. Records that are
+    already processed are mapped back to the pipeline columns instead of
+    being cleaned again, see `is_post_record`.
+    """
+    for batch in batched(posts, batch_size):
+        if is_post_record(batch[0]):
+            yield records_frame(batch)
+        else:
+            yield process_posts(list(batch), workers=workers, chunk_size=chunk_size)
+
+
 def write_post_files(df, output_path):
     """Write post files to output directory.
 
@@ -224,63 +457,90 @@ def write_posts_json(df: pd.DataFrame, topic_id: int, output_path: Path) -> None
     Creates a single JSON file named '{topic_id}_all_posts.json' containing
     all posts as a list of dictionaries.
     """
-    # Initialize an empty list to store post dictionaries
-    posts_list = []
+    output_file = output_path / f"{topic_id}_all_posts.json"
+    with Path(output_file).open("w", encoding="utf-8") as f:
+        json.dump(post_records(df), f, indent=2)
 
-    # Iterate through DataFrame rows
-    for _index, row in df.iterrows():
-        # Extract data from each row
-        post_id = row["id"]
-        author = row["name"]
-        number = row["post_number"]
-        created_at = row["created_at"]
-        clean_content = row["clean_cooked"]
 
-        # Create a dictionary for each post
-        post_dict = {
-            "id": post_id,
-            "author": author,
-            "number": number,
-            "created_at": created_at,
-            "clean_content": clean_content,
-        }
+def post_records(df: pd.DataFrame) -> list[dict[str, Any]]:
+    """Convert processed posts to the records of '{topic_id}_all_posts.json'.
 
-        # Append each post dictionary to the list
-        posts_list.append(post_dict)
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame containing posts with columns: id, name, created_at,
+        post_number, and clean_cooked.
 
-    # Write the list to a JSON file
-    output_file = output_path / f"{topic_id}_all_posts.json"
-    with Path(output_file).open("w", encoding="utf-8") as f:
-        json.dump(posts_list, f, indent=2)
+    Returns
+    -------
+    list[dict[str, Any]]
+        One dictionary per post with keys id, author, number, created_at
+        and clean_content.
+    """
+    return (
+        df[["id", "name", "post_number", "created_at", "clean_cooked"]]
+        .rename(
+            columns={
+                "name": "author",
+                "post_number": "number",
+                "clean_cooked": "clean_content",
+            }
+        )
+        .to_dict("records")
+    )
 
 
-def write_posts_txt(df, output_path):
-    """Write post files to output directory.
+def write_json_items(f, items, first=True):
+    """Write items of a JSON list as `json.dump(..., indent=2)` would.
+
+    Parameters
+    ----------
+    f : TextIO
+        File the list is written to, after its opening '['.
+    items : Iterable[Any]
+        Items to write.
+    first : bool, optional
+        Whether no item of the list was written yet.
+
+    Returns
+    -------
+    bool
+        Whether the list is still empty, to pass as `first` for the next
+        items.
+
+    Notes
+    -----
+    Items are written one at a time, so a list of any length can be
+    written in bounded memory. Close the list with ']' if it is still
+    empty, and with '\\n]' otherwise.
+    """
+    for item in items:
+        f.write("\n" if first else ",\n")
+        f.write(textwrap.indent(json.dumps(item, indent=2), "  "))
+        first = False
+    return first
+
+
+def write_posts_txt(df, topic_id, output_path):
+    """Write all posts of a topic to a single text file.
 
     Parameters
     ----------
     df : pd.DataFrame
         DataFrame containing posts with columns: id, name, created_at,
         post_number, and clean_cooked.
+    topic_id : int
+        ID of the topic, used in the filename.
     output_path : Path
         Directory where the text file should be written.
 
     Notes
     -----
-    Appends all posts to a single file named 'all_posts.txt' in the output
-    directory. Each post includes ID, author, creation date, post number,
-    and clean content.
+    Writes all posts to a single file named '{topic_id}_posts.txt' in the
+    output directory. Each post includes ID, author, creation date, post
+    number, and clean content. The file is replaced atomically, so running
+    the pipeline again gives the same file instead of appending duplicates,
+    while the files of other topics are left alone.
     """
-    for _index, row in df.iterrows():
-        post_id = row["id"]
-        author = row["name"]
-        created_at = row["created_at"]
-        number = row["post_number"]
-        clean_content = row["clean_cooked"]
-
-        with Path(output_path / "all_posts.txt").open("a", encoding="utf-8") as f:
-            f.write(f"ID: {post_id}\n")
-            f.write(f"Author: {author}\n")
-            f.write(f"Created at: {created_at}\n")
-            f.write(f"Number: {number}\n")
-            f.write(f"Clean content: {clean_content}\n")
+    with PostsTxtWriter(posts_txt_path(topic_id, output_path)) as writer:
+        writer.write(df)
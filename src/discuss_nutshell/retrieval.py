@@ -0,0 +1,391 @@
+"""Retrieve the posts most relevant to a query."""
+
+import hashlib
+import math
+import re
+from collections import Counter
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Self
+
+import numpy as np
+
+from discuss_nutshell.models import Embedder
+from discuss_nutshell.posts_txt import FIELDS
+from discuss_nutshell.summarize import estimate_tokens
+
+TOP_K = 20
+CONTEXT_TOKENS = 8_000  # token budget of the retrieved posts
+# Okapi BM25 parameters
+K1 = 1.2
+B = 0.75
+EMBED_BATCH_SIZE = 100
+
+TOKEN = re.compile(r"\w+")
+# Field labels starting the lines of a '{topic_id}_posts.txt' block
+LABEL = re.compile(
+    "^(?:{}): ".format("|".join(re.escape(label) for label, _column in FIELDS)),
+    re.MULTILINE,
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lowercase word tokens.
+
+    Parameters
+    ----------
+    text : str
+        Text of a post or a query.
+
+    Returns
+    -------
+    list[str]
+        Word tokens.
+    """
+    return TOKEN.findall(text.lower())
+
+
+def strip_labels(block: str) -> str:
+    """Remove the field labels of a post block, keeping the values.
+
+    Parameters
+    ----------
+    block : str
+        Block of a post, as in '{topic_id}_posts.txt'.
+
+    Returns
+    -------
+    str
+        The block without the 'Label: ' prefix of its lines, so that the
+        labels do not match every query using the same words.
+    """
+    return LABEL.sub("", block)
+
+
+class BM25Index:
+    """Inverted index ranking documents with Okapi BM25.
+
+    Parameters
+    ----------
+    documents : Sequence[str]
+        Text of each document, e.g. the block of each post.
+    k1 : float, optional
+        Term frequency saturation.
+    b : float, optional
+        Document length normalization.
+
+    Notes
+    -----
+    Each term maps to the documents containing it and its count there, so
+    a query only scores the documents sharing a term with it.
+    """
+
+    def __init__(self, documents: Sequence[str], k1: float = K1, b: float = B) -> None:
+        self.k1 = k1
+        self.b = b
+        self.postings: dict[str, list[tuple[int, int]]] = {}
+        self.lengths: list[int] = []
+        for doc, text in enumerate(documents):
+            counts = Counter(tokenize(text))
+            self.lengths.append(sum(counts.values()))
+            for term, count in counts.items():
+                self.postings.setdefault(term, []).append((doc, count))
+        self.average_length = (
+            sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+        )
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def idf(self, term: str) -> float:
+        """Return the inverse document frequency of a term.
+
+        Parameters
+        ----------
+        term : str
+            A token.
+
+        Returns
+        -------
+        float
+            BM25 idf, always positive.
+        """
+        frequency = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self) - frequency + 0.5) / (frequency + 0.5))
+
+    def search(self, query: str, k: int = TOP_K) -> list[tuple[int, float]]:
+        """Return the documents that best match a query.
+
+        Parameters
+        ----------
+        query : str
+            The user's question.
+        k : int, optional
+            Number of documents returned.
+
+        Returns
+        -------
+        list[tuple[int, float]]
+            Index and score of the `k` best documents, best first.
+            Documents sharing no term with the query are left out.
+        """
+        scores: dict[int, float] = {}
+        for term in set(tokenize(query)):
+            idf = self.idf(term)
+            for doc, count in self.postings.get(term, ()):
+                norm = 1 - self.b + self.b * self.lengths[doc] / self.average_length
+                scores[doc] = scores.get(doc, 0.0) + idf * count * (self.k1 + 1) / (
+                    count + self.k1 * norm
+                )
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:k]
+
+
+def documents_digest(documents: Sequence[str]) -> str:
+    """Return a hash identifying a list of documents.
+
+    Parameters
+    ----------
+    documents : Sequence[str]
+        Text of each document.
+
+    Returns
+    -------
+    str
+        SHA-256 hex digest of the documents.
+    """
+    digest = hashlib.sha256()
+    for text in documents:
+        digest.update(hashlib.sha256(text.encode()).digest())
+    return digest.hexdigest()
+
+
+class EmbeddingIndex:
+    """Dense index of document embeddings stored as a NumPy matrix.
+
+    Parameters
+    ----------
+    vectors : np.ndarray
+        One unit-norm embedding per row.
+    embedder : Embedder
+        Model embedding the queries, the same one as the documents.
+    digest : str, optional
+        Hash of the indexed documents, see `documents_digest`.
+    """
+
+    def __init__(
+        self, vectors: np.ndarray, embedder: Embedder, digest: str = ""
+    ) -> None:
+        self.vectors = vectors
+        self.embedder = embedder
+        self.digest = digest
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    @classmethod
+    def build(
+        cls,
+        documents: Sequence[str],
+        embedder: Embedder,
+        batch_size: int = EMBED_BATCH_SIZE,
+    ) -> Self:
+        """Embed documents into a new index.
+
+        Parameters
+        ----------
+        documents : Sequence[str]
+            Text of each document.
+        embedder : Embedder
+            Model embedding the documents.
+        batch_size : int, optional
+            Number of documents embedded per call.
+
+        Returns
+        -------
+        EmbeddingIndex
+            Index with one row per document.
+        """
+        rows = [
+            vector
+            for i in range(0, len(documents), batch_size)
+            for vector in embedder.embed(list(documents[i : i + batch_size]))
+        ]
+        vectors = np.asarray(rows, dtype=np.float32).reshape(len(rows), -1)
+        return cls(cls._normalize(vectors), embedder, documents_digest(documents))
+
+    @classmethod
+    def load_or_build(
+        cls, file_path: str | Path, documents: Sequence[str], embedder: Embedder
+    ) -> Self:
+        """Load an index from disk, rebuilding it if the documents changed.
+
+        Parameters
+        ----------
+        file_path : str | Path
+            Path of the '.npz' file holding the index.
+        documents : Sequence[str]
+            Text of each document.
+        embedder : Embedder
+            Model embedding the documents and queries.
+
+        Returns
+        -------
+        EmbeddingIndex
+            Index matching `documents`.
+        """
+        path = Path(file_path)
+        digest = documents_digest(documents)
+        if path.exists():
+            with np.load(path) as stored:
+                if str(stored["digest"]) == digest:
+                    return cls(stored["vectors"], embedder, digest)
+        index = cls.build(documents, embedder)
+        index.save(path)
+        return index
+
+    def save(self, file_path: str | Path) -> None:
+        """Save the matrix and digest to a '.npz' file.
+
+        Parameters
+        ----------
+        file_path : str | Path
+            Path of the file.
+        """
+        with Path(file_path).open("wb") as f:
+            np.savez(f, vectors=self.vectors, digest=np.array(self.digest))
+
+    def search(self, query: str, k: int = TOP_K) -> list[tuple[int, float]]:
+        """Return the documents closest to a query.
+
+        Parameters
+        ----------
+        query : str
+            The user's question.
+        k : int, optional
+            Number of documents returned.
+
+        Returns
+        -------
+        list[tuple[int, float]]
+            Index and cosine similarity of the `k` best documents, best
+            first.
+        """
+        if not len(self.vectors):
+            return []
+        query_vector = self._normalize(
+            np.asarray(self.embedder.embed([query]), dtype=np.float32)
+        )[0]
+        similarities = self.vectors @ query_vector
+        k = min(k, len(similarities))
+        best = np.argpartition(-similarities, k - 1)[:k]
+        best = best[np.argsort(-similarities[best], kind="stable")]
+        return [(int(doc), float(similarities[doc])) for doc in best]
+
+
+def select_posts(
+    blocks: Sequence[str],
+    hits: Sequence[tuple[int, float]],
+    max_tokens: int = CONTEXT_TOKENS,
+) -> list[str]:
+    """Keep the retrieved posts that fit the token budget, in thread order.
+
+    Parameters
+    ----------
+    blocks : Sequence[str]
+        Text of each post.
+    hits : Sequence[tuple[int, float]]
+        Retrieved post indices and scores, best first.
+    max_tokens : int, optional
+        Token budget of the selected posts, see
+        `summarize.estimate_tokens`.
+
+    Returns
+    -------
+    list[str]
+        Blocks of the best posts within the budget, in their original
+        order, so the model reads them as a conversation. The best post
+        is kept even if it exceeds the budget alone.
+    """
+    selected: list[int] = []
+    tokens = 0
+    for doc, _score in hits:
+        size = estimate_tokens(blocks[doc])
+        if selected and tokens + size > max_tokens:
+            break
+        selected.append(doc)
+        tokens += size
+    return [blocks[doc] for doc in sorted(selected)]
+
+
+def fallback_hits(count: int, k: int) -> list[tuple[int, float]]:
+    """Rank the posts sent when none matches the query.
+
+    Parameters
+    ----------
+    count : int
+        Number of posts of the thread.
+    k : int
+        Number of posts returned.
+
+    Returns
+    -------
+    list[tuple[int, float]]
+        The first post, which usually states the topic, followed by the
+        latest posts, newest first, `k` posts at most.
+    """
+    docs = [0, *range(count - 1, 0, -1)] if count else []
+    return [(doc, 0.0) for doc in docs[:k]]
+
+
+def retrieve_posts(
+    blocks: Sequence[str],
+    query: str,
+    k: int = TOP_K,
+    embedder: Embedder | None = None,
+    index_file: str | Path | None = None,
+    max_tokens: int = CONTEXT_TOKENS,
+) -> list[str]:
+    """Return the posts of a thread most relevant to a query.
+
+    Parameters
+    ----------
+    blocks : Sequence[str]
+        Text of each post, in thread order.
+    query : str
+        The user's question.
+    k : int, optional
+        Number of posts returned.
+    embedder : Embedder | None, optional
+        Rank posts by embedding similarity with this model instead of BM25.
+    index_file : str | Path | None, optional
+        '.npz' file caching the post embeddings between queries. The posts
+        are embedded on every call if None.
+    max_tokens : int, optional
+        Token budget of the returned posts.
+
+    Returns
+    -------
+    list[str]
+        Blocks of at most `k` posts within `max_tokens`, in thread order.
+        If no post matches the query, the first post and the latest ones
+        are returned instead, so that the model still gets some context.
+
+    Raises
+    ------
+    ValueError
+        If `k` is not positive.
+    """
+    if k < 1:
+        msg = f"Invalid number of posts: {k}, expected at least 1"
+        raise ValueError(msg)
+    if embedder is None:
+        hits = BM25Index([strip_labels(block) for block in blocks]).search(query, k)
+    elif index_file is None:
+        hits = EmbeddingIndex.build(blocks, embedder).search(query, k)
+    else:
+        index = EmbeddingIndex.load_or_build(index_file, blocks, embedder)
+        hits = index.search(query, k)
+    return select_posts(blocks, hits or fallback_hits(len(blocks), k), max_tokens)
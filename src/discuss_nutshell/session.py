@@ -0,0 +1,268 @@
+"""Shared HTTP session and conditional-GET response cache."""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+from discuss_nutshell.utils import atomic_write_text
+
+POOL_SIZE = 16  # connections kept alive per host
+MEMORY_ENTRIES = 32  # parsed payloads kept in memory by the response cache
+
+current_path = Path.cwd()
+data_path = current_path / "data"
+CACHE_DIR = data_path / "http_cache"
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+_cache: "ResponseCache | None" = None
+
+
+def create_session(pool_size: int = POOL_SIZE) -> requests.Session:
+    """Create a session with a keep-alive connection pool.
+
+    Parameters
+    ----------
+    pool_size : int, optional
+        Number of connections kept alive per host.
+
+    Returns
+    -------
+    requests.Session
+        Session negotiating every compression urllib3 can decode (gzip and
+        deflate, plus brotli and zstd when their packages are installed).
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the session shared by every Discourse request of the process.
+
+    Returns
+    -------
+    requests.Session
+        The shared session, created on first use.
+    """
+    global _session  # noqa: PLW0603
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+
+class ResponseCache:
+    """On-disk cache of JSON responses validated with ETag/Last-Modified.
+
+    Parameters
+    ----------
+    directory : str | Path, optional
+        Directory holding one '{key}.json' file per URL.
+    memory_entries : int, optional
+        Number of parsed payloads kept in memory.
+
+    Notes
+    -----
+    The most recently used payloads are also kept in memory, so a 304 Not
+    Modified answer for them is served without reading or parsing
+    anything, while long runs over many topics keep a bounded footprint.
+    Payloads are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(
+        self, directory: str | Path = CACHE_DIR, memory_entries: int = MEMORY_ENTRIES
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.memory_entries = memory_entries
+        self._memory: OrderedDict[str, tuple[dict[str, str], Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, url: str) -> Path:
+        return self.directory / f"{hashlib.sha256(url.encode()).hexdigest()}.json"
+
+    def _remember(self, url: str, entry: tuple[dict[str, str], Any]) -> None:
+        with self._lock:
+            self._memory[url] = entry
+            self._memory.move_to_end(url)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _entry(self, url: str) -> tuple[dict[str, str], Any] | None:
+        with self._lock:
+            if url in self._memory:
+                self._memory.move_to_end(url)
+                return self._memory[url]
+        path = self._path(url)
+        if not path.exists():
+            return None
+        with path.open(encoding="utf-8") as f:
+            stored = json.load(f)
+        entry = (stored["validators"], stored["payload"])
+        self._remember(url, entry)
+        return entry
+
+    def validators(self, url: str) -> dict[str, str]:
+        """Return the conditional request headers for a cached URL.
+
+        Parameters
+        ----------
+        url : str
+            Full URL of the request.
+
+        Returns
+        -------
+        dict[str, str]
+            'If-None-Match' and/or 'If-Modified-Since' headers, empty if
+            the URL is not cached.
+        """
+        entry = self._entry(url)
+        if entry is None:
+            return {}
+        stored = entry[0]
+        conditional = {}
+        if "etag" in stored:
+            conditional["If-None-Match"] = stored["etag"]
+        if "last_modified" in stored:
+            conditional["If-Modified-Since"] = stored["last_modified"]
+        return conditional
+
+    def load(self, url: str) -> Any:
+        """Return the cached payload of a URL.
+
+        Parameters
+        ----------
+        url : str
+            Full URL of the request.
+
+        Returns
+        -------
+        Any
+            The parsed JSON payload.
+
+        Raises
+        ------
+        KeyError
+            If the URL is not cached.
+        """
+        entry = self._entry(url)
+        if entry is None:
+            raise KeyError(url)
+        return entry[1]
+
+    def store(self, url: str, response: requests.Response) -> Any:
+        """Cache a response if it carries validators and return its payload.
+
+        Parameters
+        ----------
+        url : str
+            Full URL of the request.
+        response : requests.Response
+            Successful response.
+
+        Returns
+        -------
+        Any
+            The parsed JSON payload.
+        """
+        payload = response.json()
+        stored = {}
+        if "ETag" in response.headers:
+            stored["etag"] = response.headers["ETag"]
+        if "Last-Modified" in response.headers:
+            stored["last_modified"] = response.headers["Last-Modified"]
+        if stored:
+            self._remember(url, (stored, payload))
+            atomic_write_text(
+                self._path(url),
+                json.dumps({"url": url, "validators": stored, "payload": payload}),
+            )
+        return payload
+
+
+def enable_cache(directory: str | Path = CACHE_DIR) -> ResponseCache:
+    """Turn on the response cache used by `get_cache`.
+
+    Parameters
+    ----------
+    directory : str | Path, optional
+        Directory of the on-disk cache.
+
+    Returns
+    -------
+    ResponseCache
+        The process-wide cache.
+    """
+    global _cache  # noqa: PLW0603
+    _cache = ResponseCache(directory)
+    return _cache
+
+
+def get_cache() -> ResponseCache | None:
+    """Return the process-wide response cache, or None if it is disabled.
+
+    Returns
+    -------
+    ResponseCache | None
+        Cache set by `enable_cache`.
+    """
+    return _cache
+
+
+def fetch_json(
+    session: requests.Session,
+    url: str,
+    params: dict[str, Any] | None = None,
+    cache: ResponseCache | None = None,
+    headers: dict[str, str] | None = None,
+    timeout: float = 30,
+) -> Any:
+    """GET a JSON document, revalidating a cached copy if there is one.
+
+    Parameters
+    ----------
+    session : requests.Session
+        Session used for the request.
+    url : str
+        URL of the endpoint.
+    params : dict[str, Any] | None, optional
+        Query string parameters.
+    cache : ResponseCache | None, optional
+        Response cache. No conditional request is made if None.
+    headers : dict[str, str] | None, optional
+        Extra request headers.
+    timeout : float, optional
+        Request timeout in seconds.
+
+    Returns
+    -------
+    Any
+        Parsed JSON response.
+
+    Raises
+    ------
+    requests.HTTPError
+        If the response has an error status code.
+    """
+    full_url = str(requests.Request("GET", url, params=params).prepare().url)
+    request_headers = dict(headers or {})
+    if cache is not None:
+        request_headers.update(cache.validators(full_url))
+    response = session.get(full_url, headers=request_headers, timeout=timeout)
+    if response.status_code == 304 and cache is not None:
+        return cache.load(full_url)
+    response.raise_for_status()
+    if cache is not None:
+        return cache.store(full_url, response)
+    return response.json()
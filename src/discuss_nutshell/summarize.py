@@ -0,0 +1,238 @@
+"""Map-reduce summarization of long topics in token-budgeted chunks."""
+
+import math
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from discuss_nutshell.columnar import PARQUET_COLUMNS, read_posts_parquet
+from discuss_nutshell.json_stream import iter_posts
+from discuss_nutshell.models import TextModel
+from discuss_nutshell.posts_txt import read_post_blocks, render_post_blocks
+
+CHARS_PER_TOKEN = 4  # rough average for English text
+CHUNK_TOKENS = 8_000
+FAN_OUT = 8
+CONCURRENCY = 4
+DEFAULT_QUERY = "Summarize the discussion: the main points, pros and cons."
+
+MAP_PROMPT = (
+    "The following are consecutive posts of a Discourse thread. {query} "
+    "Mention post numbers and authors where useful. Only use these posts."
+)
+REDUCE_PROMPT = (
+    "The following are summaries of consecutive parts of a Discourse "
+    "thread, in order. Combine them into one answer. {query}"
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens of a text.
+
+    Parameters
+    ----------
+    text : str
+        Text sent to a model.
+
+    Returns
+    -------
+    int
+        Approximate token count, assuming `CHARS_PER_TOKEN` characters per
+        token.
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def chunk_posts(
+    blocks: Iterable[str],
+    max_tokens: int = CHUNK_TOKENS,
+    max_posts: int | None = None,
+) -> list[str]:
+    """Group consecutive posts into chunks that fit a token budget.
+
+    Parameters
+    ----------
+    blocks : Iterable[str]
+        Text of each post, in thread order.
+    max_tokens : int, optional
+        Token budget of a chunk.
+    max_posts : int | None, optional
+        Maximum number of posts in a chunk, e.g. 10. Unlimited if None.
+
+    Returns
+    -------
+    list[str]
+        Chunks of whole posts. A post larger than the budget gets a chunk
+        of its own.
+
+    Raises
+    ------
+    ValueError
+        If `max_tokens` or `max_posts` is not positive.
+    """
+    if max_tokens < 1 or (max_posts is not None and max_posts < 1):
+        msg = f"Invalid chunk limits: max_tokens={max_tokens}, max_posts={max_posts}"
+        raise ValueError(msg)
+    chunks: list[str] = []
+    current: list[str] = []
+    tokens = 0
+    for block in blocks:
+        size = estimate_tokens(block)
+        full = max_posts is not None and len(current) == max_posts
+        if current and (tokens + size > max_tokens or full):
+            chunks.append("".join(current))
+            current, tokens = [], 0
+        current.append(block)
+        tokens += size
+    if current:
+        chunks.append("".join(current))
+    return chunks
+
+
+def load_post_blocks(
+    file_path: str | Path, posts: tuple[int, int] | None = None
+) -> list[str]:
+    """Read the text of each post of a processed posts file.
+
+    Parameters
+    ----------
+    file_path : str | Path
+        A '{topic_id}_posts.txt', a '{topic_id}_posts.parquet' or a
+        '{topic_id}_all_posts.json' file.
+    posts : tuple[int, int] | None, optional
+        First and last post numbers to read. Every post is read if None.
+
+    Returns
+    -------
+    list[str]
+        One block per post in the layout of '{topic_id}_posts.txt'.
+    """
+    path = Path(file_path)
+    first, last = posts if posts is not None else (0, 2**63 - 1)
+    if path.suffix == ".txt":
+        return read_post_blocks(path, first, last)
+    if path.suffix == ".parquet":
+        df = read_posts_parquet(path).rename(columns=PARQUET_COLUMNS)
+    else:
+        df = pd.DataFrame(list(iter_posts(path))).rename(columns=PARQUET_COLUMNS)
+    if df.empty:
+        return []
+    df = df[df["post_number"].between(first, last)]
+    return render_post_blocks(df).tolist()
+
+
+class Summarizer:
+    """Summarize long threads with a map-reduce over chunks of posts.
+
+    Parameters
+    ----------
+    model : TextModel
+        Model generating the summaries.
+    chunk_tokens : int, optional
+        Token budget of a chunk of posts.
+    fan_out : int, optional
+        Number of partial summaries combined by one reduce call.
+    concurrency : int, optional
+        Maximum number of model calls in flight.
+    max_posts : int | None, optional
+        Maximum number of posts in a chunk. Unlimited if None.
+
+    Notes
+    -----
+    The map step summarizes every chunk concurrently. The reduce step then
+    combines the partial summaries `fan_out` at a time, level by level,
+    until a single summary is left. A thread of n chunks costs about
+    n * fan_out / (fan_out - 1) model calls, and no call sees more than
+    one chunk or `fan_out` summaries.
+    """
+
+    def __init__(
+        self,
+        model: TextModel,
+        chunk_tokens: int = CHUNK_TOKENS,
+        fan_out: int = FAN_OUT,
+        concurrency: int = CONCURRENCY,
+        max_posts: int | None = None,
+    ) -> None:
+        if fan_out < 2 or concurrency < 1:
+            msg = f"Invalid summarizer: fan_out={fan_out}, concurrency={concurrency}"
+            raise ValueError(msg)
+        self.model = model
+        self.chunk_tokens = chunk_tokens
+        self.fan_out = fan_out
+        self.concurrency = concurrency
+        self.max_posts = max_posts
+
+    def _generate_all(self, prompts: Sequence[list[str]]) -> list[str]:
+        """Run model calls concurrently, returning responses in order."""
+        if len(prompts) == 1:
+            return [self.model.generate(prompts[0])]
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            return list(executor.map(self.model.generate, prompts))
+
+    def map(self, chunks: Sequence[str], query: str = DEFAULT_QUERY) -> list[str]:
+        """Summarize each chunk of posts.
+
+        Parameters
+        ----------
+        chunks : Sequence[str]
+            Chunks of posts, see `chunk_posts`.
+        query : str, optional
+            Question answered by each summary.
+
+        Returns
+        -------
+        list[str]
+            One partial summary per chunk, in order.
+        """
+        prompt = MAP_PROMPT.format(query=query)
+        return self._generate_all([[chunk, prompt] for chunk in chunks])
+
+    def reduce(self, summaries: Sequence[str], query: str = DEFAULT_QUERY) -> str:
+        """Combine partial summaries hierarchically into one.
+
+        Parameters
+        ----------
+        summaries : Sequence[str]
+            Partial summaries, in thread order.
+        query : str, optional
+            Question answered by the final summary.
+
+        Returns
+        -------
+        str
+            The combined summary. A single summary is returned unchanged.
+        """
+        prompt = REDUCE_PROMPT.format(query=query)
+        level = list(summaries)
+        while len(level) > 1:
+            groups = [
+                level[i : i + self.fan_out] for i in range(0, len(level), self.fan_out)
+            ]
+            # A trailing group of one summary moves up a level unchanged
+            carried = groups.pop() if len(groups[-1]) == 1 else []
+            level = self._generate_all(
+                [["\n\n".join(group), prompt] for group in groups]
+            )
+            level.extend(carried)
+        return level[0] if level else ""
+
+    def summarize(self, blocks: Iterable[str], query: str = DEFAULT_QUERY) -> str:
+        """Summarize a thread.
+
+        Parameters
+        ----------
+        blocks : Iterable[str]
+            Text of each post, in thread order.
+        query : str, optional
+            Question to answer about the thread.
+
+        Returns
+        -------
+        str
+            The final summary, empty if there are no posts.
+        """
+        chunks = chunk_posts(blocks, self.chunk_tokens, self.max_posts)
+        return self.reduce(self.map(chunks, query), query)
@@ -0,0 +1,299 @@
+"""Incrementally sync a Discourse topic with the files on disk."""
+
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+from discuss_nutshell.columnar import parquet_path, write_posts_parquet
+from discuss_nutshell.data_loader import (
+    BASE_URL,
+    fetch_post_batches,
+    get_json,
+    load_topic,
+    merge_posts,
+)
+from discuss_nutshell.post_store import PostStore
+from discuss_nutshell.post_summaries import (
+    PostSummarizer,
+    summaries_txt_path,
+    write_summaries_txt,
+)
+from discuss_nutshell.preprocessor import (
+    extract_posts,
+    process_posts,
+    read_json,
+    records_frame,
+    write_json,
+    write_post_files,
+    write_posts_json,
+    write_posts_txt,
+)
+
+RECHECK_POSTS = 50  # most recent known posts re-fetched to catch edits
+
+
+def sync_state_path(topic_id: int, output_path: Path) -> Path:
+    """Return the path of the sync state file of a topic.
+
+    Parameters
+    ----------
+    topic_id : int
+        ID of the topic.
+    output_path : Path
+        Directory holding the topic files.
+
+    Returns
+    -------
+    Path
+        Path to 'topic_{topic_id}_sync.json'.
+    """
+    return output_path / f"topic_{topic_id}_sync.json"
+
+
+def build_sync_state(topic_id: int, posts: list[dict[str, Any]]) -> dict[str, Any]:
+    """Build the sync state of a topic from its posts.
+
+    Parameters
+    ----------
+    topic_id : int
+        ID of the topic.
+    posts : list[dict[str, Any]]
+        All known posts of the topic.
+
+    Returns
+    -------
+    dict[str, Any]
+        State with, for each post id, its post number, 'updated_at' and
+        'version'.
+    """
+    return {
+        "topic_id": topic_id,
+        "posts": {
+            str(post["id"]): {
+                "post_number": post["post_number"],
+                "updated_at": post.get("updated_at"),
+                "version": post.get("version"),
+            }
+            for post in posts
+        },
+    }
+
+
+def is_changed(post: dict[str, Any], state: dict[str, Any]) -> bool:
+    """Check whether a known post was edited since the last sync.
+
+    Parameters
+    ----------
+    post : dict[str, Any]
+        Post freshly fetched from Discourse.
+    state : dict[str, Any]
+        Sync state of the topic.
+
+    Returns
+    -------
+    bool
+        True if the post's 'version' or 'updated_at' differs from the state.
+    """
+    seen = state["posts"].get(str(post["id"]))
+    if seen is None:
+        return False
+    return (
+        post.get("version") != seen["version"]
+        or post.get("updated_at") != seen["updated_at"]
+    )
+
+
+def patch_outputs(
+    df: pd.DataFrame,
+    deleted: list[int],
+    topic_id: int,
+    output_path: Path,
+    store: PostStore | None = None,
+    post_files: bool = True,
+    parquet: bool = False,
+    summarizer: PostSummarizer | None = None,
+) -> None:
+    """Patch the processed files of a topic with new and edited posts.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Processed new and edited posts.
+    deleted : list[int]
+        Ids of posts no longer in the topic.
+    topic_id : int
+        ID of the topic.
+    output_path : Path
+        Directory holding the processed files.
+    store : PostStore | None, optional
+        Also patch the posts of this store.
+    post_files : bool, optional
+        Write one 'post_{id}.txt' file per updated post.
+    parquet : bool, optional
+        Also write the posts to '{topic_id}_posts.parquet'.
+    summarizer : PostSummarizer | None, optional
+        Also summarize the posts not summarized yet and write the summaries
+        of every post to '{topic_id}_summaries.txt'.
+
+    Notes
+    -----
+    Only the 'post_{id}.txt' files of updated posts are rewritten. The
+    '{topic_id}_all_posts.json' and '{topic_id}_posts.txt' files are
+    rebuilt from the already processed posts plus the updated ones, so
+    nothing is parsed twice and nothing is appended twice.
+    '{topic_id}_posts.parquet' is rebuilt the same way if it is requested
+    or already exists.
+    """
+    if store is not None:
+        if not df.empty:
+            store.write(df)
+        store.delete(deleted)
+    if post_files:
+        write_post_files(df, output_path)
+    for post_id in deleted:
+        (output_path / f"post_{post_id}.txt").unlink(missing_ok=True)
+
+    json_file = output_path / f"{topic_id}_all_posts.json"
+    previous = records_frame(read_json(json_file) if json_file.exists() else [])
+    # Empty frames are left out so that they do not turn every column to object
+    frames = [frame for frame in (previous, df) if not frame.empty]
+    merged = pd.concat(frames) if frames else df
+    merged = (
+        merged.drop_duplicates(subset="id", keep="last")
+        .loc[lambda frame: ~frame["id"].isin(deleted)]
+        .sort_values("post_number")
+    )
+    write_posts_json(merged, topic_id, output_path)
+
+    write_posts_txt(merged, topic_id, output_path)
+    if parquet or parquet_path(topic_id, output_path).exists():
+        write_posts_parquet(merged, topic_id, output_path)
+    if summarizer is not None:
+        # Only the posts without a cached summary reach the model
+        write_summaries_txt(summarizer.summarize_posts(merged), topic_id, output_path)
+
+
+def sync_topic(
+    topic_id: int,
+    output: str | Path = "data",
+    recheck: int | None = RECHECK_POSTS,
+    base_url: str = BASE_URL,
+    verbose: bool = False,
+    store: PostStore | None = None,
+    post_files: bool = True,
+    parquet: bool = False,
+    summarizer: PostSummarizer | None = None,
+) -> dict[str, list[int]]:
+    """Fetch and reprocess only the new and edited posts of a topic.
+
+    Parameters
+    ----------
+    topic_id : int
+        The ID of the topic to sync.
+    output : str | Path, optional
+        Directory holding the topic files.
+    recheck : int | None, optional
+        Number of most recent known posts re-fetched to detect edits. None
+        re-checks every post.
+    base_url : str, optional
+        Base URL of the Discourse instance.
+    verbose : bool, optional
+        Print a summary of the sync.
+    store : PostStore | None, optional
+        Also keep the posts of this store in sync.
+    post_files : bool, optional
+        Write one 'post_{id}.txt' file per new or edited post.
+    parquet : bool, optional
+        Also write the processed posts to '{topic_id}_posts.parquet'.
+    summarizer : PostSummarizer | None, optional
+        Also summarize new and edited posts and write the summaries to
+        '{topic_id}_summaries.txt'.
+
+    Returns
+    -------
+    dict[str, list[int]]
+        Ids of the 'new', 'changed' and 'deleted' posts.
+
+    Notes
+    -----
+    The first sync of a topic does a full load. Later syncs request the
+    first page of the topic, which also lists the ids of every post, and
+    then only the posts that are new or inside the recheck window. Posts on
+    the first page and in the recheck window are compared by 'version' and
+    'updated_at' to find edits. The processed files are only rebuilt when
+    posts changed, or when Parquet or summaries are requested but not
+    written yet, so that they are created by the first sync asking for
+    them.
+    """
+    output_path = Path(output)
+    topic_file = output_path / f"topic_{topic_id}.json"
+    state_file = sync_state_path(topic_id, output_path)
+
+    if not state_file.exists() or not topic_file.exists():
+        data = load_topic(
+            topic_id,
+            output_path,
+            process=True,
+            verbose=verbose,
+            store=store,
+            post_files=post_files,
+            parquet=parquet,
+            summarizer=summarizer,
+        )
+        posts = extract_posts(data)
+        write_json(build_sync_state(topic_id, posts), state_file)
+        return {"new": [post["id"] for post in posts], "changed": [], "deleted": []}
+
+    state = read_json(state_file)
+    head = get_json(f"{base_url}/t/{topic_id}.json", params={"print": "true"})
+    stream = head["post_stream"]["stream"]
+    head_ids = {post["id"] for post in extract_posts(head)}
+
+    known = [post_id for post_id in stream if str(post_id) in state["posts"]]
+    new = [post_id for post_id in stream if str(post_id) not in state["posts"]]
+    window = known if recheck is None else known[max(len(known) - recheck, 0) :]
+    to_fetch = [post_id for post_id in new + window if post_id not in head_ids]
+    fetched = extract_posts(head) + fetch_post_batches(topic_id, to_fetch, base_url)
+
+    new_ids = set(new)
+    updated = [
+        post for post in fetched if post["id"] in new_ids or is_changed(post, state)
+    ]
+    stream_ids = set(stream)
+    deleted = [int(i) for i in state["posts"] if int(i) not in stream_ids]
+
+    data = read_json(topic_file)
+    data["post_stream"]["stream"] = stream
+    data = merge_posts(data, updated)
+    write_json(data, topic_file)
+
+    missing = (parquet and not parquet_path(topic_id, output_path).exists()) or (
+        summarizer is not None
+        and not summaries_txt_path(topic_id, output_path).exists()
+    )
+    if updated or deleted or missing:
+        df = process_posts(updated) if updated else records_frame([])
+        patch_outputs(
+            df,
+            deleted,
+            topic_id,
+            output_path,
+            store,
+            post_files,
+            parquet=parquet,
+            summarizer=summarizer,
+        )
+    write_json(build_sync_state(topic_id, extract_posts(data)), state_file)
+
+    result = {
+        "new": [post["id"] for post in updated if post["id"] in new_ids],
+        "changed": [post["id"] for post in updated if post["id"] not in new_ids],
+        "deleted": deleted,
+    }
+    if verbose:
+        print(
+            f"Topic {topic_id}: {len(result['new'])} new, "
+            f"{len(result['changed'])} changed, {len(deleted)} deleted posts"
+        )
+    return result
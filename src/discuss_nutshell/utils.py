@@ -1,10 +1,17 @@
 """Helper utilities for notebooks"""
 
+import os
+import tempfile
+from collections.abc import Iterator
+from contextlib import contextmanager
 from datetime import datetime
 from json import dumps, loads
+from pathlib import Path
+from typing import IO, Any
 
 import pandas as pd
-from bs4 import BeautifulSoup
+
+from discuss_nutshell.cleaners import DEFAULT_CLEANER, get_cleaner
 
 
 def pprint_json(jstr):
@@ -18,13 +25,17 @@ def pprint_json(jstr):
     print(dumps(loads(jstr), indent=2))
 
 
-def clean_html(html_text):
+def clean_html(html_text, cleaner=DEFAULT_CLEANER):
     """Remove HTML tags and return clean text.
 
     Parameters
     ----------
     html_text : str
         HTML text to clean. Can be NaN.
+    cleaner : str, optional
+        Name of the cleaner backend, see `cleaners.CLEANERS`. The default
+        streaming cleaner gives the same output as BeautifulSoup's
+        ``get_text(separator=" ", strip=True)`` without building a tree.
 
     Returns
     -------
@@ -34,8 +45,7 @@ def clean_html(html_text):
     """
     if pd.isna(html_text):
         return ""
-    soup = BeautifulSoup(html_text, "html.parser")
-    return soup.get_text(separator=" ", strip=True)
+    return get_cleaner(cleaner)(html_text)
 
 
 def display_dataframe(df):
@@ -77,3 +87,94 @@ def format_date(iso_date_string: str) -> str:
     date_str = iso_date_string.replace("Z", "+00:00")
     dt = datetime.fromisoformat(date_str)
     return dt.strftime("%Y-%m-%d %H:%M")
+
+
+def _file_mode() -> int:
+    """Return the mode `open` gives to new files under the current umask."""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+FILE_MODE = _file_mode()  # mode of files written atomically, as with `open`
+
+
+@contextmanager
+def atomic_open(
+    file_path: str | Path, mode: str = "w", buffering: int = -1
+) -> Iterator[IO[Any]]:
+    """Open a file for writing, replacing it atomically once closed.
+
+    Parameters
+    ----------
+    file_path : str | Path
+        Path of the file to write.
+    mode : str, optional
+        "w" to write UTF-8 text or "wb" to write bytes.
+    buffering : int, optional
+        Buffer size, as for `open`.
+
+    Yields
+    ------
+    IO[Any]
+        A temporary file in the same directory. It replaces `file_path`
+        when the block exits normally, and is deleted on errors.
+
+    Notes
+    -----
+    Unlike opening `file_path` with mode "w", the file keeps its content
+    while it is written, so it can also be the input being read. The
+    temporary file gets the permissions `open` would give, rather than the
+    owner-only ones of `tempfile.mkstemp`.
+    """
+    if mode not in ("w", "wb"):
+        msg = f"Unsupported mode {mode!r}, expected 'w' or 'wb'"
+        raise ValueError(msg)
+    path = Path(file_path)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        encoding = None if "b" in mode else "utf-8"
+        with os.fdopen(fd, mode, buffering=buffering, encoding=encoding) as f:
+            Path(tmp_name).chmod(FILE_MODE)
+            yield f
+        Path(tmp_name).replace(path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def atomic_write_text(file_path, text):
+    """Write a text file atomically.
+
+    Parameters
+    ----------
+    file_path : str | Path
+        Path of the file to write.
+    text : str
+        Content of the file.
+
+    Notes
+    -----
+    The text is written through `atomic_open`, so readers never see a
+    partial file.
+    """
+    with atomic_open(file_path) as f:
+        f.write(text)
+
+
+def atomic_write_bytes(file_path, data):
+    """Write a binary file atomically.
+
+    Parameters
+    ----------
+    file_path : str | Path
+        Path of the file to write.
+    data : bytes
+        Content of the file.
+
+    Notes
+    -----
+    Same as `atomic_write_text`, for binary content.
+    """
+    with atomic_open(file_path, "wb") as f:
+        f.write(data)
@@ -1,19 +1,74 @@
 """Visualize Discourse posts as cards."""
 
-import json
+import html
 from pathlib import Path
 from typing import Any
 
 import gradio as gr
 
+from discuss_nutshell.columnar import read_posts_parquet
+from discuss_nutshell.json_stream import iter_posts
+from discuss_nutshell.preprocessor import iter_processed_posts, post_records
+
+# Post fields shown on a card
+CARD_COLUMNS = ["id", "author", "number", "created_at", "clean_content"]
+PAGE_SIZE = 20  # posts per page of the browser
+
+# Styles shared by every card, sent once per page instead of inline per card
+CARD_CSS = """
+.dn-posts {
+    max-width: 1200px;
+    margin: 0 auto;
+    padding: 20px;
+    background-color: #f5f5f5;
+}
+.dn-title {
+    color: #1976d2;
+    margin-bottom: 24px;
+    font-size: 24px;
+    text-align: center;
+}
+.dn-pager { color: #666; font-size: 12px; text-align: center; }
+.dn-card {
+    border: 1px solid #e0e0e0;
+    border-radius: 8px;
+    padding: 16px;
+    margin: 12px 0;
+    background-color: #ffffff;
+    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+}
+.dn-card-header {
+    display: flex;
+    justify-content: space-between;
+    align-items: center;
+    margin-bottom: 12px;
+    padding-bottom: 8px;
+    border-bottom: 1px solid #f0f0f0;
+}
+.dn-number { color: #1976d2; font-size: 14px; }
+.dn-id { color: #666; font-size: 12px; margin-left: 8px; }
+.dn-byline { text-align: right; }
+.dn-author { color: #333; font-weight: 500; font-size: 14px; }
+.dn-date { color: #999; font-size: 12px; }
+.dn-content {
+    color: #333;
+    line-height: 1.6;
+    font-size: 14px;
+    max-height: 400px;
+    overflow-y: auto;
+}
+"""
+
 
 def load_posts_json(file_path: str | Path) -> list[dict[str, Any]]:
-    """Load posts from a JSON file.
+    """Load posts from a JSON or Parquet file.
 
     Parameters
     ----------
     file_path : str | Path
-        Path to the JSON file containing posts.
+        Path to the JSON file containing posts, or to a
+        '{topic_id}_posts.parquet' file.
 
     Returns
     -------
@@ -26,14 +81,27 @@ def load_posts_json(file_path: str | Path) -> list[dict[str, Any]]:
         If the file does not exist.
     json.JSONDecodeError
         If the file is not valid JSON.
+
+    Notes
+    -----
+    Posts are decoded one at a time from the file, so memory holds the
+    posts but never the whole JSON text. Raw topic files are accepted too:
+    their posts are cleaned a batch at a time into the same records as
+    '{topic_id}_all_posts.json'. Parquet files are memory-mapped and only
+    the card columns are read.
     """
     path = Path(file_path)
     if not path.exists():
         msg = f"File not found: {file_path}"
         raise FileNotFoundError(msg)
 
-    with path.open(encoding="utf-8") as f:
-        return json.load(f)
+    if path.suffix == ".parquet":
+        return read_posts_parquet(path, columns=CARD_COLUMNS).to_dict("records")
+    return [
+        record
+        for df in iter_processed_posts(iter_posts(path))
+        for record in post_records(df)
+    ]
 
 
 def create_post_card(post: dict[str, Any]) -> str:
@@ -47,113 +115,102 @@ def create_post_card(post: dict[str, Any]) -> str:
     Returns
     -------
     str
-        HTML string representing the post card.
+        HTML string representing the post card, styled by `CARD_CSS`.
     """
     post_id = post.get("id", "Unknown")
-    author = post.get("author", "Unknown")
+    author = html.escape(str(post.get("author", "Unknown")))
     number = post.get("number", "?")
     created_at = post.get("created_at", "Unknown")
     content = post.get("clean_content", "")
 
-    # Escape HTML special characters in content
-    content_escaped = (
-        content.replace("&", "&amp;")
-        .replace("<", "&lt;")
-        .replace(">", "&gt;")
-        .replace('"', "&quot;")
-        .replace("'", "&#x27;")
-    )
-
-    # Replace newlines with <br> for HTML display
-    content_formatted = content_escaped.replace("\n", "<br>")
-
-    return f"""
-    <div style="
-        border: 1px solid #e0e0e0;
-        border-radius: 8px;
-        padding: 16px;
-        margin: 12px 0;
-        background-color: #ffffff;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-    ">
-        <div style="
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 12px;
-            padding-bottom: 8px;
-            border-bottom: 1px solid #f0f0f0;
-        ">
-            <div>
-                <strong style="color: #1976d2; font-size: 14px;">Post #{number}</strong>
-                <span style="color: #666; font-size: 12px; margin-left: 8px;">ID: {post_id}</span>
-            </div>
-            <div style="text-align: right;">
-                <div style="color: #333; font-weight: 500; font-size: 14px;">{author}</div>
-                <div style="color: #999; font-size: 12px;">{created_at}</div>
-            </div>
-        </div>
-        <div style="
-            color: #333;
-            line-height: 1.6;
-            font-size: 14px;
-            max-height: 400px;
-            overflow-y: auto;
-        ">
-            {content_formatted}
-        </div>
-    </div>
-    """
+    # Escape HTML special characters, then keep the line breaks
+    content_formatted = html.escape(content).replace("\n", "<br>")
+
+    return f"""<div class="dn-card">
+  <div class="dn-card-header">
+    <div><strong class="dn-number">Post #{number}</strong>
+      <span class="dn-id">ID: {post_id}</span></div>
+    <div class="dn-byline"><div class="dn-author">{author}</div>
+      <div class="dn-date">{created_at}</div></div>
+  </div>
+  <div class="dn-content">{content_formatted}</div>
+</div>
+"""
 
 
-def display_posts(file_path: str | Path) -> str:
-    """Load and display all posts as HTML cards.
+def page_count(total_posts: int, page_size: int = PAGE_SIZE) -> int:
+    """Return the number of pages of posts.
 
     Parameters
     ----------
-    file_path : str | Path
-        Path to the JSON file containing posts.
+    total_posts : int
+        Number of posts.
+    page_size : int, optional
+        Number of posts per page.
 
     Returns
     -------
-    str
-        HTML string containing all post cards.
-    """
-    posts = load_posts_json(file_path)
-    cards = [create_post_card(post) for post in posts]
-    return f"""
-    <div style="
-        max-width: 1200px;
-        margin: 0 auto;
-        padding: 20px;
-        background-color: #f5f5f5;
-    ">
-        <h1 style="
-            color: #1976d2;
-            margin-bottom: 24px;
-            font-size: 24px;
-            text-align: center;
-        ">Discourse Posts</h1>
-        <div>
-            {"".join(cards)}
-        </div>
-    </div>
+    int
+        Number of pages, at least 1.
     """
+    return max(1, -(-total_posts // max(1, page_size)))
+
 
+def display_posts(
+    posts: list[dict[str, Any]], page: int = 1, page_size: int = PAGE_SIZE
+) -> str:
+    """Display one page of posts as HTML cards.
 
-def create_visualization_app(json_file: str | Path) -> gr.Blocks:
+    Parameters
+    ----------
+    posts : list[dict[str, Any]]
+        Posts already loaded, e.g. by `load_posts_json`.
+    page : int, optional
+        Page to display, from 1. Pages out of range show the first or last.
+    page_size : int, optional
+        Number of posts per page.
+
+    Returns
+    -------
+    str
+        HTML string with the shared styles and the cards of the page only,
+        so that its size does not grow with the thread.
+    """
+    page_size = max(1, page_size)
+    page = min(max(1, page), page_count(len(posts), page_size))
+    start = (page - 1) * page_size
+    cards = [create_post_card(post) for post in posts[start : start + page_size]]
+    last = start + len(cards)
+    return f"""<style>{CARD_CSS}</style>
+<div class="dn-posts">
+  <h1 class="dn-title">Discourse Posts</h1>
+  <p class="dn-pager">Posts {start + 1 if cards else 0}-{last} of {len(posts)}</p>
+  {"".join(cards)}
+</div>
+"""
+
+
+def create_visualization_app(
+    json_file: str | Path, page_size: int = PAGE_SIZE
+) -> gr.Blocks:
     """Create a Gradio app to visualize posts.
 
     Parameters
     ----------
     json_file : str | Path
         Path to the JSON file containing posts.
+    page_size : int, optional
+        Initial number of posts per page.
 
     Returns
     -------
     gr.Blocks
         Gradio Blocks interface for the visualization.
+
+    Notes
+    -----
+    The posts are loaded once, when the app is created, and every view is
+    rendered from them in memory.
     """
     file_path = Path(json_file)
     if not file_path.exists():
@@ -179,17 +236,61 @@ def create_visualization_app(json_file: str | Path) -> gr.Blocks:
         if post_number < 1 or post_number > total_posts:
             return "<p>Invalid post number</p>"
         post = posts[post_number - 1]
-        return create_post_card(post)
+        return f"<style>{CARD_CSS}</style>{create_post_card(post)}"
+
+    def show_page(page: float, size: float) -> tuple[str, int]:
+        """Display a page of posts.
+
+        Parameters
+        ----------
+        page : float
+            Page to display, from 1.
+        size : float
+            Number of posts per page.
+
+        Returns
+        -------
+        tuple[str, int]
+            HTML content for the page, and the page shown once clamped to
+            the pages of the thread.
+        """
+        size = max(1, int(size or PAGE_SIZE))
+        page = min(max(1, int(page or 1)), page_count(total_posts, size))
+        return display_posts(posts, page, size), page
 
-    def show_all_posts() -> str:
-        """Display all posts.
+    def previous_page(page: float, size: float) -> tuple[str, int]:
+        """Display the page before the current one.
+
+        Parameters
+        ----------
+        page : float
+            Current page.
+        size : float
+            Number of posts per page.
 
         Returns
         -------
-        str
-            HTML content for all posts.
+        tuple[str, int]
+            HTML content for the page, and the page shown.
         """
-        return display_posts(file_path)
+        return show_page(page - 1, size)
+
+    def next_page(page: float, size: float) -> tuple[str, int]:
+        """Display the page after the current one.
+
+        Parameters
+        ----------
+        page : float
+            Current page.
+        size : float
+            Number of posts per page.
+
+        Returns
+        -------
+        tuple[str, int]
+            HTML content for the page, and the page shown.
+        """
+        return show_page(page + 1, size)
 
     with gr.Blocks(
         title="Discourse Posts Visualization", theme=gr.themes.Soft()
@@ -207,7 +308,14 @@ def create_visualization_app(json_file: str | Path) -> gr.Blocks:
                     label="Post Number",
                 )
                 view_single_btn = gr.Button("View Single Post", variant="primary")
-                view_all_btn = gr.Button("View All Posts", variant="secondary")
+                page_input = gr.Number(value=1, precision=0, label="Page")
+                page_size_input = gr.Number(
+                    value=page_size, precision=0, label="Posts per page"
+                )
+                with gr.Row():
+                    previous_btn = gr.Button("Previous")
+                    next_btn = gr.Button("Next")
+                view_page_btn = gr.Button("View Page", variant="secondary")
             with gr.Column(scale=3):
                 output = gr.HTML(label="Post Content")
                 view_single_btn.click(
@@ -215,10 +323,15 @@ def create_visualization_app(json_file: str | Path) -> gr.Blocks:
                     inputs=post_slider,
                     outputs=output,
                 )
-                view_all_btn.click(
-                    fn=show_all_posts,
-                    outputs=output,
+                page_inputs = [page_input, page_size_input]
+                page_outputs = [output, page_input]
+                view_page_btn.click(
+                    fn=show_page, inputs=page_inputs, outputs=page_outputs
+                )
+                previous_btn.click(
+                    fn=previous_page, inputs=page_inputs, outputs=page_outputs
                 )
+                next_btn.click(fn=next_page, inputs=page_inputs, outputs=page_outputs)
                 # Auto-update when slider changes
                 post_slider.change(
                     fn=update_display,
@@ -0,0 +1,175 @@
+"""Tests for the batch module."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+import pytest
+
+from discuss_nutshell.batch import (
+    STANDARD_PROMPTS,
+    BatchRunner,
+    load_manifest,
+    results_table,
+)
+from discuss_nutshell.cli import batch_files
+from discuss_nutshell.data_logger import init_db
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+class RateLimitError(Exception):
+    """Error carrying an HTTP status code, like google-genai errors."""
+
+    def __init__(self, code: int) -> None:
+        super().__init__(f"status {code}")
+        self.code = code
+
+
+class FlakyModel:
+    """Local model failing a number of times per prompt before answering."""
+
+    def __init__(self, failures: int = 0, code: int = 429, delay: float = 0.0) -> None:
+        self.failures = failures
+        self.code = code
+        self.delay = delay
+        self.calls: dict[str, int] = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def generate(self, contents: list[str]) -> str:
+        """Answer with the file text and prompt, after the failures."""
+        text, prompt = contents
+        with self._lock:
+            calls = self.calls[text + prompt] = self.calls.get(text + prompt, 0) + 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        if calls <= self.failures:
+            raise RateLimitError(self.code)
+        return f"{prompt} about {text}"
+
+
+class TestLoadManifest:
+    """Tests for load_manifest."""
+
+    def test_globs_and_default_prompts(self, tmp_path: Path) -> None:
+        """Test that patterns are relative to the manifest.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        for name in ("1_all_posts.json", "2_all_posts.json", "notes.txt"):
+            (tmp_path / name).write_text("[]", encoding="utf-8")
+        manifest = tmp_path / "manifest.json"
+        manifest.write_text(
+            json.dumps({"files": ["*_all_posts.json", "1_all_posts.json"]}),
+            encoding="utf-8",
+        )
+
+        files, prompts = load_manifest(manifest)
+
+        assert [file.name for file in files] == ["1_all_posts.json", "2_all_posts.json"]
+        assert prompts == STANDARD_PROMPTS
+
+    def test_no_files(self, tmp_path: Path) -> None:
+        """Test that a manifest matching nothing is rejected.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        manifest = tmp_path / "manifest.json"
+        manifest.write_text(json.dumps({"files": ["*.parquet"]}), encoding="utf-8")
+        with pytest.raises(ValueError, match="no files or no prompts"):
+            load_manifest(manifest)
+
+
+class TestBatchRunner:
+    """Tests for BatchRunner with a local model."""
+
+    def test_retry_on_rate_limit(self) -> None:
+        """Test that rate limited requests are retried with backoff."""
+        model = FlakyModel(failures=2)
+        runner = BatchRunner(model, backoff=0.001)
+
+        results = asyncio.run(runner.run({"a": "A", "b": "B"}, ["Why?", "How?"]))
+
+        assert list(results["file"]) == ["a", "a", "b", "b"]
+        assert list(results["status"]) == ["ok"] * 4
+        assert list(results["attempts"]) == [3] * 4
+        assert results["response"].iloc[1] == "How? about A"
+
+    def test_errors(self) -> None:
+        """Test that other errors, and exhausted retries, are reported."""
+        runner = BatchRunner(FlakyModel(failures=1, code=400))
+        results = asyncio.run(runner.run({"a": "A"}, ["Why?"]))
+        assert results["status"].iloc[0] == "error"
+        assert results["attempts"].iloc[0] == 1
+
+        runner = BatchRunner(FlakyModel(failures=5), max_retries=2, backoff=0.001)
+        results = asyncio.run(runner.run({"a": "A"}, ["Why?"]))
+        assert results["response"].iloc[0] == "status 429"
+        assert results["attempts"].iloc[0] == 3
+
+    def test_concurrency_limit(self) -> None:
+        """Test that requests run concurrently up to the limit."""
+        model = FlakyModel(delay=0.02)
+        runner = BatchRunner(model, concurrency=3)
+
+        asyncio.run(runner.run({str(i): str(i) for i in range(3)}, ["a", "b", "c"]))
+
+        assert model.max_in_flight == 3
+
+
+class TestBatchFiles:
+    """Tests for batch_files."""
+
+    def test_bulk_logging(self, tmp_path: Path) -> None:
+        """Test that successful interactions are logged in bulk.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        for topic in (1, 2):
+            (tmp_path / f"{topic}_all_posts.txt").write_text(
+                f"posts {topic}", encoding="utf-8"
+            )
+        manifest = tmp_path / "manifest.json"
+        manifest.write_text(
+            json.dumps({"files": ["*_all_posts.txt"], "prompts": ["Why?", "How?"]}),
+            encoding="utf-8",
+        )
+        db_file = tmp_path / "logs.db"
+
+        with (
+            patch("discuss_nutshell.data_logger.DB_FILE", db_file),
+            patch("discuss_nutshell.cli.text_model", return_value=FlakyModel()),
+        ):
+            init_db()
+            results = batch_files(manifest)
+
+        assert len(results) == 4
+        assert "How? about posts 2" in results_table(results)
+        with sqlite3.connect(db_file) as conn:
+            rows = conn.execute(
+                "SELECT post_name, query, response FROM interactions ORDER BY response"
+            ).fetchall()
+        conn.close()
+        assert rows[0] == ("1_all_posts.txt", "How?", "How? about posts 1")
+        assert len(rows) == 4
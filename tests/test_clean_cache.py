@@ -0,0 +1,97 @@
+"""Tests for the clean_cache module."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+import pandas as pd
+
+from discuss_nutshell.clean_cache import CleanCache
+from discuss_nutshell.preprocessor import clean_cooked_posts
+from discuss_nutshell.utils import clean_html
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+class TestCleanCache:
+    """Tests for CleanCache."""
+
+    def test_get_and_put(self, tmp_path: Path) -> None:
+        """Test that stored texts are found by key.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        cache = CleanCache(tmp_path / "cache.db")
+        key = cache.key("<p>a</p>", "stream")
+        cache.put_many({key: "a"})
+
+        assert cache.get_many([key, "missing"]) == {key: "a"}
+        assert cache.key("<p>a</p>", "bs4") != key
+        cache.close()
+
+    def test_lru_eviction(self, tmp_path: Path) -> None:
+        """Test that the least recently used entries are evicted.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        cache = CleanCache(tmp_path / "cache.db", max_entries=2)
+        cache.put_many({"a": "A"})
+        cache.put_many({"b": "B"})
+        cache.get_many(["a"])
+        cache.put_many({"c": "C"})
+
+        assert len(cache) == 2
+        assert cache.get_many(["a", "b", "c"]) == {"a": "A", "c": "C"}
+        cache.close()
+
+    def test_persists_across_connections(self, tmp_path: Path) -> None:
+        """Test that entries survive reopening the database.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        first = CleanCache(tmp_path / "cache.db")
+        first.put_many({"a": "A"})
+        first.close()
+
+        cache = CleanCache(tmp_path / "cache.db")
+        try:
+            assert cache.get_many(["a"]) == {"a": "A"}
+        finally:
+            cache.close()
+
+
+class TestCleanCookedPostsWithCache:
+    """Tests for clean_cooked_posts with a cache."""
+
+    def test_only_changed_posts_are_cleaned(self, tmp_path: Path) -> None:
+        """Test that a rerun only parses HTML missing from the cache.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        cache = CleanCache(tmp_path / "cache.db")
+        cooked = ["<p>one</p>", "<p>two</p>", "", "<p>three</p>"]
+        clean_cooked_posts(pd.DataFrame({"cooked": cooked}), cache=cache)
+
+        cooked[1] = "<p>two, edited</p>"
+        with patch(
+            "discuss_nutshell.preprocessor.clean_html", wraps=clean_html
+        ) as mock_clean:
+            df = clean_cooked_posts(pd.DataFrame({"cooked": cooked}), cache=cache)
+
+        mock_clean.assert_called_once_with("<p>two, edited</p>", cleaner="stream")
+        assert df["clean_cooked"].tolist() == ["one", "two, edited", "", "three"]
+        cache.close()
@@ -0,0 +1,95 @@
+"""Tests for the cleaners module."""
+
+from __future__ import annotations
+
+import pytest
+
+from discuss_nutshell.cleaners import (
+    clean_html_bs4,
+    clean_html_lxml,
+    clean_html_stream,
+    clean_html_structured,
+    get_cleaner,
+)
+from discuss_nutshell.utils import clean_html
+
+SAMPLES = [
+    "<p>Hello <b>world</b>!</p>",
+    "<p>a &amp; b &lt;c&gt; &nbsp; d&#8217;s &#x27;q&#x27;</p>",
+    "<p>x<!-- comment -->y</p><script>var a=1;</script><style>p{}</style>z",
+    (
+        '<aside class="quote"><div class="title">Bob:</div>'
+        '<blockquote><p>quoted <a href="https://x.org">link</a></p></blockquote>'
+        "</aside><p>reply</p>"
+    ),
+    "<pre><code>def f():\n    return 1\n</code></pre><p>after <code>x</code></p>",
+    "<ul><li>one</li><li>two <em>2</em></li></ul>",
+    "plain text",
+    "",
+    "<p>  spaced\n\n text  </p><br><p> </p>",
+    "<template><p>t</p></template><ruby>漢<rp>(</rp><rt>kan</rt><rp>)</rp></ruby>",
+    "<p>unclosed <b>bold",
+    "a < b and c > d",
+]
+
+
+class TestStreamCleaner:
+    """Tests that the streaming cleaner matches BeautifulSoup."""
+
+    @pytest.mark.parametrize("html_text", SAMPLES)
+    def test_matches_bs4(self, html_text: str) -> None:
+        """Test that the output is the same as the BeautifulSoup path.
+
+        Parameters
+        ----------
+        html_text : str
+            HTML to clean.
+        """
+        assert clean_html_stream(html_text) == clean_html_bs4(html_text)
+
+    @pytest.mark.parametrize("html_text", SAMPLES)
+    def test_lxml_matches_bs4(self, html_text: str) -> None:
+        """Test that the lxml cleaner matches the BeautifulSoup path.
+
+        Parameters
+        ----------
+        html_text : str
+            HTML to clean.
+        """
+        pytest.importorskip("lxml")
+        assert clean_html_lxml(html_text) == clean_html_bs4(html_text)
+
+
+class TestStructuredCleaner:
+    """Tests for the structured cleaner."""
+
+    def test_quotes_and_links(self) -> None:
+        """Test that quotes are prefixed and links keep their URL."""
+        assert clean_html_structured(SAMPLES[3]) == (
+            "Bob:\n> quoted link (https://x.org)\nreply"
+        )
+
+    def test_code_blocks(self) -> None:
+        """Test that code blocks are fenced and keep their indentation."""
+        assert clean_html_structured(SAMPLES[4]) == (
+            "```\ndef f():\n    return 1\n```\nafter `x`"
+        )
+
+    def test_lists(self) -> None:
+        """Test that list items go on their own lines."""
+        assert clean_html_structured(SAMPLES[5]) == "- one\n- two 2"
+
+
+class TestGetCleaner:
+    """Tests for get_cleaner and utils.clean_html."""
+
+    def test_unknown_cleaner(self) -> None:
+        """Test that an unknown cleaner name is rejected."""
+        with pytest.raises(ValueError, match="Unknown cleaner"):
+            get_cleaner("nope")
+
+    def test_clean_html_backends(self) -> None:
+        """Test that clean_html dispatches to the chosen backend."""
+        assert clean_html(SAMPLES[0]) == "Hello world !"
+        assert clean_html(SAMPLES[5], cleaner="structured") == "- one\n- two 2"
+        assert clean_html(float("nan")) == ""
@@ -0,0 +1,109 @@
+"""Tests for the columnar module."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pandas as pd
+import pytest
+
+from discuss_nutshell.cli import extract_text_from_file
+from discuss_nutshell.columnar import (
+    PostsParquetWriter,
+    read_all_posts_parquet,
+    read_posts_parquet,
+    write_posts_parquet,
+)
+from discuss_nutshell.posts_txt import render_posts_txt
+from discuss_nutshell.visualize import load_posts_json
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def posts_df() -> pd.DataFrame:
+    """Three processed posts.
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame in the layout returned by `process_posts`.
+    """
+    return pd.DataFrame(
+        {
+            "id": [10, 11, 12],
+            "topic_id": 5,
+            "post_number": [1, 2, 3],
+            "name": ["Alice", "Bob", "Carol"],
+            "created_at": "2025-11-22 18:11",
+            "clean_cooked": ["One", "Two", "Three"],
+        }
+    )
+
+
+class TestParquetOutput:
+    """Tests for writing and reading Parquet files."""
+
+    def test_roundtrip_selected_columns(
+        self, posts_df: pd.DataFrame, tmp_path: Path
+    ) -> None:
+        """Test that a written topic is read back column by column.
+
+        Parameters
+        ----------
+        posts_df : pd.DataFrame
+            Processed posts.
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        path = write_posts_parquet(posts_df, 5, tmp_path)
+
+        assert path.name == "5_posts.parquet"
+        df = read_posts_parquet(path, columns=["number", "clean_content"])
+        assert df.columns.tolist() == ["number", "clean_content"]
+        assert df["clean_content"].tolist() == ["One", "Two", "Three"]
+
+    def test_batches_and_directory(
+        self, posts_df: pd.DataFrame, tmp_path: Path
+    ) -> None:
+        """Test that batches are appended and every topic can be read at once.
+
+        Parameters
+        ----------
+        posts_df : pd.DataFrame
+            Processed posts.
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        with PostsParquetWriter(5, tmp_path) as writer:
+            writer.write(posts_df.iloc[:2])
+            writer.write(posts_df.iloc[2:])
+        write_posts_parquet(posts_df.iloc[:1], 7, tmp_path)
+
+        df = read_all_posts_parquet(tmp_path, columns=["topic_id", "id"])
+        assert df.to_dict("list") == {"topic_id": [5, 5, 5, 7], "id": [10, 11, 12, 10]}
+        assert read_all_posts_parquet(tmp_path / "missing").empty
+
+    def test_readers(self, posts_df: pd.DataFrame, tmp_path: Path) -> None:
+        """Test that the visualize and query readers accept Parquet files.
+
+        Parameters
+        ----------
+        posts_df : pd.DataFrame
+            Processed posts.
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        path = write_posts_parquet(posts_df, 5, tmp_path)
+
+        assert load_posts_json(path)[1] == {
+            "id": 11,
+            "author": "Bob",
+            "number": 2,
+            "created_at": "2025-11-22 18:11",
+            "clean_content": "Two",
+        }
+        assert extract_text_from_file(path) == render_posts_txt(posts_df)
@@ -2,17 +2,111 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any, ClassVar
 from unittest.mock import MagicMock, patch
+from urllib.parse import parse_qs, urlparse
 
 import pytest
 import requests
 
-from discuss_nutshell.data_loader import get_topic
+from discuss_nutshell.data_loader import (
+    chunk_ids,
+    fetch_topic,
+    get_topic,
+    merge_posts,
+    missing_post_ids,
+    process_topic,
+    process_topic_file,
+)
 
 if TYPE_CHECKING:
+    from collections.abc import Iterator
     from pathlib import Path
 
+TOPIC_ID = 4242
+POST_IDS = list(range(1000, 1000 + 95))
+FIRST_PAGE = 20
+
+
+def make_post(post_id: int) -> dict[str, Any]:
+    """Build a minimal Discourse post for the fake server.
+
+    Parameters
+    ----------
+    post_id : int
+        ID of the post.
+
+    Returns
+    -------
+    dict[str, Any]
+        Post dictionary.
+    """
+    return {
+        "id": post_id,
+        "post_number": POST_IDS.index(post_id) + 1,
+        "name": f"Author {post_id}",
+        "created_at": "2025-11-22T18:11:23.522Z",
+        "cooked": f"<p>Post {post_id}</p>",
+    }
+
+
+class FakeDiscourseHandler(BaseHTTPRequestHandler):
+    """Serve a topic the way the Discourse API pages it."""
+
+    requests_seen: ClassVar[list[str]] = []
+
+    def do_GET(self) -> None:
+        """Answer topic and post batch requests."""
+        url = urlparse(self.path)
+        self.requests_seen.append(self.path)
+        if url.path == f"/t/{TOPIC_ID}.json":
+            body = {
+                "id": TOPIC_ID,
+                "post_stream": {
+                    "posts": [make_post(i) for i in POST_IDS[:FIRST_PAGE]],
+                    "stream": POST_IDS,
+                },
+            }
+        elif url.path == f"/t/{TOPIC_ID}/posts.json":
+            post_ids = [int(i) for i in parse_qs(url.query)["post_ids[]"]]
+            body = {"post_stream": {"posts": [make_post(i) for i in post_ids]}}
+        else:
+            self.send_error(404)
+            return
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Silence request logging."""
+
+
+@pytest.fixture
+def discourse_url() -> Iterator[str]:
+    """Run a local stand-in for the Discourse API.
+
+    Yields
+    ------
+    str
+        Base URL of the local server.
+    """
+    FakeDiscourseHandler.requests_seen = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeDiscourseHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
 
 class TestGetTopic:
     """Tests for get_topic function."""
@@ -442,3 +536,168 @@ class TestGetTopic:
         expected_url = f"https://discuss.python.org/t/{topic_id}.json?print=true"
         call_args = mock_get.call_args
         assert call_args[0][0] == expected_url
+
+
+class TestPostStreamHelpers:
+    """Tests for the post stream helper functions."""
+
+    def test_missing_post_ids(self) -> None:
+        """Test that only unloaded ids are returned, in stream order."""
+        data = {
+            "post_stream": {
+                "posts": [{"id": 1}, {"id": 3}],
+                "stream": [1, 2, 3, 4, 5],
+            }
+        }
+        assert missing_post_ids(data) == [2, 4, 5]
+
+    def test_chunk_ids(self) -> None:
+        """Test that ids are split into consecutive chunks."""
+        assert chunk_ids([1, 2, 3, 4, 5], 2) == [[1, 2], [3, 4], [5]]
+        assert chunk_ids([], 2) == []
+        with pytest.raises(ValueError, match="Chunk size must be positive"):
+            chunk_ids([1], 0)
+
+    def test_merge_posts_follows_stream_order(self) -> None:
+        """Test that merged posts are ordered like the stream."""
+        data = {
+            "post_stream": {
+                "posts": [{"id": 1, "post_number": 1}],
+                "stream": [1, 3, 2],
+            }
+        }
+        merged = merge_posts(
+            data, [{"id": 2, "post_number": 3}, {"id": 3, "post_number": 2}]
+        )
+        assert [post["id"] for post in merged["post_stream"]["posts"]] == [1, 3, 2]
+
+
+class TestFetchTopic:
+    """Tests for fetch_topic against a local HTTP server."""
+
+    def test_fetch_topic_returns_every_post(self, discourse_url: str) -> None:
+        """Test that all posts in the stream are fetched in order.
+
+        Parameters
+        ----------
+        discourse_url : str
+            Base URL of the fake Discourse server.
+        """
+        data = fetch_topic(TOPIC_ID, base_url=discourse_url)
+
+        posts = data["post_stream"]["posts"]
+        assert [post["id"] for post in posts] == POST_IDS
+        assert [post["post_number"] for post in posts] == list(
+            range(1, len(POST_IDS) + 1)
+        )
+
+    def test_fetch_topic_batches_requests(self, discourse_url: str) -> None:
+        """Test that missing posts are requested in chunks.
+
+        Parameters
+        ----------
+        discourse_url : str
+            Base URL of the fake Discourse server.
+        """
+        fetch_topic(TOPIC_ID, base_url=discourse_url, chunk_size=30, max_workers=2)
+
+        batch_requests = [
+            path
+            for path in FakeDiscourseHandler.requests_seen
+            if path.startswith(f"/t/{TOPIC_ID}/posts.json")
+        ]
+        # 75 missing posts in chunks of 30
+        assert len(batch_requests) == 3
+        assert len(FakeDiscourseHandler.requests_seen) == 4
+
+
+class TestProcessTopicFile:
+    """Tests for process_topic_file."""
+
+    def test_matches_in_memory_pipeline(self, tmp_path: Path) -> None:
+        """Test that streaming a topic file gives the same outputs.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        data = {
+            "post_stream": {
+                "stream": POST_IDS,
+                "posts": [make_post(post_id) for post_id in POST_IDS],
+            }
+        }
+        topic_file = tmp_path / "topic.json"
+        topic_file.write_text(json.dumps(data), encoding="utf-8")
+        (tmp_path / "memory").mkdir()
+        process_topic(data, TOPIC_ID, tmp_path / "memory")
+
+        count = process_topic_file(
+            topic_file, TOPIC_ID, tmp_path / "stream", batch_size=10
+        )
+
+        assert count == len(POST_IDS)
+        for name in [
+            f"{TOPIC_ID}_all_posts.json",
+            f"{TOPIC_ID}_posts.txt",
+            "post_1094.txt",
+        ]:
+            assert (tmp_path / "stream" / name).read_bytes() == (
+                tmp_path / "memory" / name
+            ).read_bytes()
+
+    def test_processed_records(self, tmp_path: Path) -> None:
+        """Test that an '_all_posts.json' file is processed like its topic.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        data = {"post_stream": {"posts": [make_post(post_id) for post_id in POST_IDS]}}
+        topic_file = tmp_path / "topic.json"
+        topic_file.write_text(json.dumps(data), encoding="utf-8")
+        process_topic_file(topic_file, TOPIC_ID, tmp_path / "raw")
+
+        count = process_topic_file(
+            tmp_path / "raw" / f"{TOPIC_ID}_all_posts.json",
+            TOPIC_ID,
+            tmp_path / "records",
+            batch_size=10,
+        )
+
+        assert count == len(POST_IDS)
+        for name in [
+            f"{TOPIC_ID}_all_posts.json",
+            f"{TOPIC_ID}_posts.txt",
+            "post_1094.txt",
+        ]:
+            assert (tmp_path / "records" / name).read_bytes() == (
+                tmp_path / "raw" / name
+            ).read_bytes()
+        assert "Author: Author 1094" in (
+            tmp_path / "records" / "post_1094.txt"
+        ).read_text(encoding="utf-8")
+
+    def test_process_own_output(self, tmp_path: Path) -> None:
+        """Test that processing the '_all_posts.json' output in place keeps it.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        data = {"post_stream": {"posts": [make_post(post_id) for post_id in POST_IDS]}}
+        topic_file = tmp_path / "topic.json"
+        topic_file.write_text(json.dumps(data), encoding="utf-8")
+        process_topic_file(topic_file, TOPIC_ID, tmp_path)
+        json_file = tmp_path / f"{TOPIC_ID}_all_posts.json"
+        before = json_file.read_bytes()
+
+        count = process_topic_file(json_file, TOPIC_ID, tmp_path, batch_size=10)
+
+        assert count == len(POST_IDS)
+        assert json_file.read_bytes() == before
+        assert len(json.loads(before)) == len(POST_IDS)
+        assert not list(tmp_path.glob(f".{json_file.name}.*"))
@@ -0,0 +1,356 @@
+"""Tests for the data_logger module."""
+
+from __future__ import annotations
+
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+import pytest
+
+from discuss_nutshell import data_logger
+from discuss_nutshell.data_logger import (
+    InteractionLogger,
+    context_hash,
+    decode_context,
+    enable_interaction_logger,
+    encode_context,
+    get_interaction_logger,
+    interaction_row,
+    log_interaction,
+    migrate_db,
+    read_context,
+    search_interactions,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def read_rows(db_file: Path) -> list[tuple[str, str]]:
+    """Read the logged queries and responses.
+
+    Parameters
+    ----------
+    db_file : Path
+        Path of the SQLite database.
+
+    Returns
+    -------
+    list[tuple[str, str]]
+        Query and response of each interaction, sorted.
+    """
+    conn = sqlite3.connect(db_file)
+    rows = conn.execute("SELECT query, response FROM interactions").fetchall()
+    conn.close()
+    return sorted(rows)
+
+
+class TestInteractionLogger:
+    """Tests for InteractionLogger."""
+
+    def test_concurrent_logging(self, tmp_path: Path) -> None:
+        """Test that rows logged from many threads are all written.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        db_file = tmp_path / "logs.db"
+        logger = InteractionLogger(db_file, batch_size=7)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for i in range(100):
+                executor.submit(logger.log, "all_posts.txt", f"q{i:03}", "ctx", "r")
+        logger.flush()
+
+        rows = read_rows(db_file)
+        assert len(rows) == 100
+        assert rows[0] == ("q000", "r")
+        conn = sqlite3.connect(db_file)
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        conn.close()
+        logger.close()
+
+    def test_close_flushes(self, tmp_path: Path) -> None:
+        """Test that closing writes the queued rows and stops logging.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        db_file = tmp_path / "logs.db"
+        logger = InteractionLogger(db_file)
+        logger.log("all_posts.txt", "Why?", "ctx", "Because.")
+        logger.close()
+        logger.close()
+
+        assert read_rows(db_file) == [("Why?", "Because.")]
+        with pytest.raises(RuntimeError, match="closed"):
+            logger.log("all_posts.txt", "Why?", "ctx", "Because.")
+
+    def test_bad_row_keeps_batch(
+        self, tmp_path: Path, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        """Test that a row failing to write loses neither its batch nor flush.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        caplog : pytest.LogCaptureFixture
+            Log capture provided by pytest.
+        """
+        db_file = tmp_path / "logs.db"
+        writer = InteractionLogger(db_file)
+        rows = [interaction_row("all_posts.txt", f"q{i}", "ctx", "r") for i in range(3)]
+        writer.log_rows([rows[0], ("not", "an", "interaction"), rows[2]])
+        writer.log_rows([("bad",)], "metrics")
+        writer.flush()
+        writer.log("all_posts.txt", "q3", "ctx", "r")
+        writer.close()
+
+        assert read_rows(db_file) == [("q0", "r"), ("q2", "r"), ("q3", "r")]
+        failures = [r.getMessage() for r in caplog.records if r.levelname == "ERROR"]
+        assert failures == [
+            "Failed to log a row of interactions",
+            "Failed to log a row of metrics",
+        ]
+
+    def test_missing_codec(self, tmp_path: Path) -> None:
+        """Test that a codec that cannot be used is rejected up front.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        with (
+            patch("discuss_nutshell.data_logger.zstandard", None),
+            pytest.raises(ImportError, match="zstandard"),
+        ):
+            InteractionLogger(tmp_path / "logs.db", codec="zstd")
+
+
+class TestLogInteraction:
+    """Tests for log_interaction with and without the background logger."""
+
+    def test_direct_and_background(self, tmp_path: Path) -> None:
+        """Test both ways of writing an interaction.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        db_file = tmp_path / "logs.db"
+        with patch("discuss_nutshell.data_logger.DB_FILE", db_file):
+            data_logger.init_db()
+            log_interaction("all_posts.txt", "direct", "ctx", "r1")
+            assert read_rows(db_file) == [("direct", "r1")]
+
+            logger = enable_interaction_logger(db_file)
+            try:
+                assert get_interaction_logger() is logger
+                log_interaction("all_posts.txt", "queued", "ctx", "r2")
+                logger.flush()
+            finally:
+                logger.close()
+                data_logger._logger = None
+
+        assert read_rows(db_file) == [("direct", "r1"), ("queued", "r2")]
+
+    def test_direct_creates_tables(self, tmp_path: Path) -> None:
+        """Test that writing directly to a new database creates its tables.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        db_file = tmp_path / "logs.db"
+        with patch("discuss_nutshell.data_logger.DB_FILE", db_file):
+            log_interaction("all_posts.txt", "direct", "ctx", "r1")
+
+        assert read_rows(db_file) == [("direct", "r1")]
+
+
+class TestContexts:
+    """Tests for the deduplicated, compressed contexts."""
+
+    def test_one_row_per_context(self, tmp_path: Path) -> None:
+        """Test that many questions about one file share one context.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        db_file = tmp_path / "logs.db"
+        context = "Author: Alice\nContent: hello\n" * 200
+        writer = InteractionLogger(db_file)
+        for i in range(10):
+            writer.log("all_posts.txt", f"q{i}", context, "r")
+        writer.log("other.txt", "q", "other", "r")
+        writer.close()
+
+        conn = sqlite3.connect(db_file)
+        codecs = conn.execute(
+            "SELECT codec, size, length(data) FROM contexts ORDER BY size"
+        ).fetchall()
+        hashes = conn.execute(
+            "SELECT DISTINCT context_hash FROM interactions"
+        ).fetchall()
+        conn.close()
+        assert codecs[0] == ("none", 5, 5)
+        assert codecs[1][:2] == ("zlib", len(context))
+        assert codecs[1][2] < len(context) / 10
+        assert len(hashes) == 2
+        assert read_context(db_file, context_hash(context)) == context
+        assert read_context(db_file, "missing") is None
+
+    @pytest.mark.parametrize("codec", ["none", "zlib", "zstd"])
+    def test_round_trip(self, codec: str) -> None:
+        """Test that contexts decode to the original text.
+
+        Parameters
+        ----------
+        codec : str
+            Codec to store the context with.
+        """
+        if codec == "zstd":
+            pytest.importorskip("zstandard")
+        context = "Ünïcode context. " * 50
+        assert decode_context(*encode_context(context, codec)) == context
+
+    def test_unknown_codec(self) -> None:
+        """Test that unknown codecs are rejected."""
+        with pytest.raises(ValueError, match="Unknown codec"):
+            encode_context("text", "lz4")
+
+    def test_migrate_old_database(self, tmp_path: Path) -> None:
+        """Test that logs with full contexts are converted.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        db_file = tmp_path / "logs.db"
+        conn = sqlite3.connect(db_file)
+        conn.execute(
+            "CREATE TABLE interactions (id TEXT PRIMARY KEY, timestamp TEXT, "
+            "post_name TEXT, query TEXT, full_context TEXT, response TEXT)"
+        )
+        conn.executemany(
+            "INSERT INTO interactions VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (str(i), "2025-01-01", "all_posts.txt", f"q{i}", f"posts q{i}", "r")
+                for i in range(5)
+            ],
+        )
+        conn.commit()
+        conn.close()
+
+        assert migrate_db(db_file) == 5
+        assert migrate_db(db_file) == 0
+
+        conn = sqlite3.connect(db_file)
+        hashes = conn.execute("SELECT context_hash FROM interactions").fetchall()
+        conn.close()
+        assert set(hashes) == {(context_hash("posts "),)}
+        assert read_context(db_file, context_hash("posts ")) == "posts "
+        assert read_rows(db_file)[0] == ("q0", "r")
+
+
+class TestSearch:
+    """Tests for the indexes and full-text search of interactions."""
+
+    def test_search(self, tmp_path: Path) -> None:
+        """Test that searches match queries and responses and filter.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        db_file = tmp_path / "logs.db"
+        writer = InteractionLogger(db_file)
+        writer.log("pep765.txt", "What does PEP 765 change?", "ctx", "It bans return.")
+        writer.log("all_posts.txt", "Who replied?", "ctx", "Alice, about PEP 765.")
+        writer.log("all_posts.txt", "Summarize.", "ctx", "Nothing.")
+        writer.close()
+
+        results = search_interactions(db_file, "pep 765?")
+        assert set(results["post_name"]) == {"pep765.txt", "all_posts.txt"}
+        results = search_interactions(db_file, "765", post_name="all_posts.txt")
+        assert list(results["query"]) == ["Who replied?"]
+        assert search_interactions(db_file, "765", since="2999-01-01").empty
+
+        conn = sqlite3.connect(db_file)
+        conn.execute("DELETE FROM interactions WHERE post_name = 'pep765.txt'")
+        conn.commit()
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM interactions WHERE post_name = ?",
+            ("all_posts.txt",),
+        ).fetchall()
+        conn.close()
+        assert "interactions_post_name" in plan[0][-1]
+        assert list(search_interactions(db_file, "bans")["query"]) == []
+
+    def test_index_existing_logs(self, tmp_path: Path) -> None:
+        """Test that logs written before the search index are indexed.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        db_file = tmp_path / "logs.db"
+        conn = sqlite3.connect(db_file)
+        conn.execute(
+            "CREATE TABLE interactions (id TEXT PRIMARY KEY, timestamp TEXT, "
+            "post_name TEXT, query TEXT, context_hash TEXT, response TEXT)"
+        )
+        conn.execute(
+            "INSERT INTO interactions VALUES "
+            "('1', '2025-01-01', 'all_posts.txt', 'Old question', 'h', 'Old answer')"
+        )
+        conn.commit()
+        conn.close()
+
+        results = search_interactions(db_file, "answer")
+        assert list(results["query"]) == ["Old question"]
+
+    def test_migrate_keeps_index(self, tmp_path: Path) -> None:
+        """Test that the search index matches the logs after a migration.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        db_file = tmp_path / "logs.db"
+        writer = InteractionLogger(db_file)
+        for i in range(10):
+            writer.log("all_posts.txt", f"Question {i}", "ctx", f"Answer {i}")
+        writer.close()
+        conn = sqlite3.connect(db_file)
+        conn.execute("DELETE FROM interactions WHERE query < 'Question 5'")
+        conn.commit()
+        conn.close()
+
+        migrate_db(db_file)
+
+        conn = sqlite3.connect(db_file)
+        conn.execute(
+            "INSERT INTO interactions_fts (interactions_fts, rank) "
+            "VALUES ('integrity-check', 1)"
+        )
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        conn.close()
+        assert version == data_logger.SCHEMA_VERSION
+        assert list(search_interactions(db_file, "answer 7")["query"]) == ["Question 7"]
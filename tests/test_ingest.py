@@ -0,0 +1,241 @@
+"""Tests for the ingest module."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from typing import TYPE_CHECKING, Any
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+from discuss_nutshell.ingest import (
+    Ingestor,
+    RateLimiter,
+    TokenBucket,
+    ingest_topics,
+    retry_after,
+)
+from discuss_nutshell.posts_txt import PostsTxtReader
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+BASE_URL = "https://discourse.test"
+
+
+def make_response(
+    status_code: int, body: Any = None, headers: dict[str, str] | None = None
+) -> requests.Response:
+    """Build a requests.Response.
+
+    Parameters
+    ----------
+    status_code : int
+        HTTP status code.
+    body : Any, optional
+        JSON body.
+    headers : dict[str, str] | None, optional
+        Response headers.
+
+    Returns
+    -------
+    requests.Response
+        Response with a JSON body.
+    """
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response._content = json.dumps(body).encode()
+    response.url = BASE_URL
+    return response
+
+
+class FakeSession:
+    """Session serving topics of three posts, rate limiting the first call."""
+
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:  # noqa: ARG002
+        """Answer a GET request."""
+        self.calls.append(url)
+        if len(self.calls) == 1:
+            return make_response(429, headers={"Retry-After": "0"})
+        path = urlparse(url).path
+        query = parse_qs(urlparse(url).query)
+        topic = int(path.split("/")[2].removesuffix(".json"))
+        posts = [
+            {
+                "id": topic * 10 + i,
+                "name": "Alice",
+                "post_number": i + 1,
+                "created_at": "2025-11-22T18:11:23.522Z",
+                "cooked": f"<p>Post {topic * 10 + i}</p>",
+            }
+            for i in range(3)
+        ]
+        if path.endswith("/posts.json"):
+            wanted = [int(i) for i in query["post_ids[]"]]
+            return make_response(
+                200, {"post_stream": {"posts": [p for p in posts if p["id"] in wanted]}}
+            )
+        return make_response(
+            200,
+            {
+                "post_stream": {
+                    "posts": posts[:1],
+                    "stream": [post["id"] for post in posts],
+                }
+            },
+        )
+
+
+class BrokenSession(FakeSession):
+    """Session failing with a non-HTTP error for topic 2."""
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        """Answer a GET request, raising for topic 2."""
+        if "/t/2" in url:
+            msg = "malformed topic"
+            raise ValueError(msg)
+        return super().get(url, **kwargs)
+
+
+class TestRetryAfter:
+    """Tests for retry_after."""
+
+    def test_seconds_header(self) -> None:
+        """Test that a delay in seconds is read from the header."""
+        assert retry_after(make_response(429, headers={"Retry-After": "7"}), 1) == 7
+
+    def test_discourse_body(self) -> None:
+        """Test that Discourse's wait_seconds is used without a header."""
+        response = make_response(429, {"extras": {"wait_seconds": 3}})
+        assert retry_after(response, 1) == 3
+
+    def test_default(self) -> None:
+        """Test that the default is used when the response does not say."""
+        assert retry_after(make_response(429, {}), 1.5) == 1.5
+
+
+class TestTokenBucket:
+    """Tests for the token bucket rate limiter."""
+
+    def test_invalid_bucket(self) -> None:
+        """Test that a bucket needs a positive rate and capacity."""
+        with pytest.raises(ValueError, match="Invalid token bucket"):
+            TokenBucket(0, 1)
+
+    def test_acquire_waits_once_burst_is_spent(self) -> None:
+        """Test that requests beyond the burst are spaced by the rate."""
+        bucket = TokenBucket(rate=50, capacity=2)
+
+        async def acquire_four() -> float:
+            start = time.monotonic()
+            for _ in range(4):
+                await bucket.acquire()
+            return time.monotonic() - start
+
+        # Two tokens are available at once, the next two take 1/50 s each
+        assert asyncio.run(acquire_four()) >= 0.035
+
+    def test_buckets_are_per_host(self) -> None:
+        """Test that each host gets its own bucket."""
+        limiter = RateLimiter()
+        assert limiter.bucket("https://a.test/t/1.json") is limiter.bucket(
+            "https://a.test/t/2.json"
+        )
+        assert limiter.bucket("https://a.test/x") is not limiter.bucket(
+            "https://b.test/x"
+        )
+
+
+class TestIngestTopics:
+    """Tests for ingest_topics."""
+
+    def test_ingest_topics(self, tmp_path: Path) -> None:
+        """Test that every topic is fetched completely after a 429.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        session = FakeSession()
+        ingestor = Ingestor(
+            session=session,  # type: ignore[arg-type]
+            limiter=RateLimiter(rate=1000, burst=10),
+            base_url=BASE_URL,
+        )
+
+        results = asyncio.run(
+            ingest_topics([1, 2], tmp_path, process=False, ingestor=ingestor)
+        )
+
+        assert results == {1: 3, 2: 3}
+        data = json.loads((tmp_path / "topic_2.json").read_text())
+        assert [post["id"] for post in data["post_stream"]["posts"]] == [20, 21, 22]
+        # The rate limited request is retried
+        assert len(session.calls) == 5
+
+    def test_process_keeps_every_topic(self, tmp_path: Path) -> None:
+        """Test that processing several topics keeps a posts file per topic.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        ingestor = Ingestor(
+            session=FakeSession(),  # type: ignore[arg-type]
+            limiter=RateLimiter(rate=1000, burst=10),
+            base_url=BASE_URL,
+        )
+
+        asyncio.run(
+            ingest_topics(
+                [1, 2], tmp_path, process=True, post_files=False, ingestor=ingestor
+            )
+        )
+
+        for topic_id in (1, 2):
+            with PostsTxtReader(tmp_path / f"{topic_id}_posts.txt") as reader:
+                text = reader.text(1, 3)
+            assert len(reader) == 3
+            assert all(f"Post {topic_id * 10 + i}" in text for i in range(3))
+
+    def test_failing_topics_are_skipped(self, tmp_path: Path) -> None:
+        """Test that a topic failing to download or process spares the others.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        ingestor = Ingestor(
+            session=BrokenSession(),  # type: ignore[arg-type]
+            limiter=RateLimiter(rate=1000, burst=10),
+            base_url=BASE_URL,
+        )
+
+        def process_topic(
+            data: dict[str, Any],  # noqa: ARG001
+            topic_id: int,
+            *args: Any,  # noqa: ARG001
+            **kwargs: Any,  # noqa: ARG001
+        ) -> None:
+            """Fail to process topic 3."""
+            if topic_id == 3:
+                msg = "cannot process"
+                raise RuntimeError(msg)
+
+        with patch("discuss_nutshell.ingest.process_topic", process_topic):
+            results = asyncio.run(
+                ingest_topics([1, 2, 3, 4], tmp_path, ingestor=ingestor)
+            )
+
+        assert results == {1: 3, 4: 3}
@@ -0,0 +1,117 @@
+"""Tests for the json_stream module."""
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from discuss_nutshell.json_stream import iter_array, iter_posts
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+POSTS = [
+    {"id": 1, "cooked": '<p>"quoted" \\ back</p>', "reads": 1.5e3},
+    {"id": 2, "cooked": "<p>café ☃</p>", "actions": [{"id": 2}, []]},
+    {"id": 3, "cooked": "", "hidden": False, "raw": None},
+]
+
+
+def write(tmp_path: Path, data: Any, indent: int | None = None) -> Path:
+    """Write JSON data to a file.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Directory of the file.
+    data : Any
+        Data to write.
+    indent : int | None, optional
+        Indentation passed to json.dump.
+
+    Returns
+    -------
+    Path
+        Path of the written file.
+    """
+    file_path = tmp_path / "data.json"
+    with file_path.open("w", encoding="utf-8") as f:
+        json.dump(data, f, indent=indent, ensure_ascii=False)
+    return file_path
+
+
+class TestIterPosts:
+    """Tests for iter_posts and iter_array."""
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+    @pytest.mark.parametrize("indent", [None, 2])
+    def test_topic_format(
+        self, tmp_path: Path, chunk_size: int, indent: int | None
+    ) -> None:
+        """Test that posts are read from post_stream.posts of a topic.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        chunk_size : int
+            Characters read at once, small sizes split every token.
+        indent : int | None
+            Indentation of the file.
+        """
+        topic = {
+            "title": 'A {tricky} "title" with ] and \'',
+            "post_stream": {"stream": [1, 2, 3], "posts": POSTS, "extra": -12},
+            "details": {"participants": [{"id": 1}]},
+        }
+        file_path = write(tmp_path, topic, indent)
+
+        assert list(iter_posts(file_path, chunk_size=chunk_size)) == POSTS
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+    def test_list_format(self, tmp_path: Path, chunk_size: int) -> None:
+        """Test that posts are read from a list of posts.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        chunk_size : int
+            Characters read at once.
+        """
+        file_path = write(tmp_path, POSTS, indent=2)
+
+        assert list(iter_posts(file_path, chunk_size=chunk_size)) == POSTS
+        assert list(iter_posts(write(tmp_path, []))) == []
+
+    def test_iter_array_keys(self, tmp_path: Path) -> None:
+        """Test that arrays are found by key path, numbers included.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        file_path = write(tmp_path, {"a": {"skip": 123, "b": [10, 200, 3000]}})
+
+        assert list(iter_array(file_path, ("a", "b"), chunk_size=2)) == [10, 200, 3000]
+        with pytest.raises(KeyError, match="c"):
+            list(iter_array(file_path, ("a", "c")))
+
+    def test_invalid_json(self, tmp_path: Path) -> None:
+        """Test that a truncated file raises a JSONDecodeError.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        file_path = tmp_path / "data.json"
+        file_path.write_text('[{"id": 1}, {"id": ', encoding="utf-8")
+
+        posts = iter_posts(file_path)
+        assert next(posts) == {"id": 1}
+        with pytest.raises(json.JSONDecodeError):
+            next(posts)
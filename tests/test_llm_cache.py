@@ -0,0 +1,180 @@
+"""Tests for the llm_cache module."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+from discuss_nutshell.cli import stream_query_file
+from discuss_nutshell.llm_cache import CachedModel, LLMCache, normalize_query
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+
+class CountingModel:
+    """Local model counting its calls."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def generate(self, contents: list[str]) -> str:
+        """Return a numbered answer."""
+        self.calls += 1
+        return f"answer {self.calls} to {contents[-1]}"
+
+    def stream(self, contents: list[str]) -> Iterator[str]:
+        """Yield a numbered answer word by word."""
+        words = self.generate(contents).split(" ")
+        yield words[0]
+        for word in words[1:]:
+            yield " " + word
+
+
+class EmptyModel:
+    """Local model answering with nothing."""
+
+    def generate(self, contents: list[str]) -> str:  # noqa: ARG002
+        """Return an empty answer."""
+        return ""
+
+    def stream(self, contents: list[str]) -> Iterator[str]:  # noqa: ARG002
+        """Yield an empty answer."""
+        yield ""
+
+
+class TestLLMCache:
+    """Tests for LLMCache and CachedModel."""
+
+    def test_normalize_query(self) -> None:
+        """Test that case and whitespace do not matter."""
+        assert normalize_query("  What is  PEP 8?\n") == "what is pep 8?"
+
+    def test_key(self) -> None:
+        """Test that the key depends on the model, context and query."""
+        key = LLMCache.key("m", "text", "Why?")
+        assert LLMCache.key("m", "text", " why? ") == key
+        assert LLMCache.key("other", "text", "Why?") != key
+        assert LLMCache.key("m", "edited text", "Why?") != key
+
+    def test_cached_model(self, tmp_path: Path) -> None:
+        """Test that repeated questions skip the model unless bypassed.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        cache = LLMCache(tmp_path / "cache.db")
+        model = CountingModel()
+        cached = CachedModel(model, cache, "m")
+
+        assert cached.generate(["text", "Why?"]) == "answer 1 to Why?"
+        assert cached.generate(["text", "why?"]) == "answer 1 to Why?"
+        assert cached.generate(["edited", "Why?"]) == "answer 2 to Why?"
+
+        refresh = CachedModel(model, cache, "m", bypass=True)
+        assert refresh.generate(["text", "Why?"]) == "answer 3 to Why?"
+        assert cached.generate(["text", "Why?"]) == "answer 3 to Why?"
+        assert model.calls == 3
+        cache.close()
+
+    def test_empty_response_not_cached(self, tmp_path: Path) -> None:
+        """Test that empty responses are asked for again.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        cache = LLMCache(tmp_path / "cache.db")
+        cached = CachedModel(EmptyModel(), cache, "m")
+
+        assert cached.generate(["text", "Why?"]) == ""
+        assert list(cached.stream(["text", "How?"])) == [""]
+
+        assert cache.get("m", "text", "Why?") is None
+        assert cache.get("m", "text", "How?") is None
+        assert len(cache) == 0
+        cache.close()
+
+    def test_ttl_and_size_eviction(self, tmp_path: Path) -> None:
+        """Test that stale and least recently used entries are dropped.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        cache = LLMCache(tmp_path / "cache.db", ttl=60, max_entries=2)
+        with patch("discuss_nutshell.llm_cache.time.time", return_value=1000.0):
+            cache.put("m", "a", "q", "A")
+            cache.put("m", "b", "q", "B")
+        with patch("discuss_nutshell.llm_cache.time.time", return_value=1030.0):
+            assert cache.get("m", "a", "q") == "A"
+            cache.put("m", "c", "q", "C")
+            assert len(cache) == 2
+            assert cache.get("m", "b", "q") is None
+        with patch("discuss_nutshell.llm_cache.time.time", return_value=1070.0):
+            assert cache.get("m", "a", "q") is None
+            assert cache.get("m", "c", "q") == "C"
+        cache.close()
+
+
+class TestStreaming:
+    """Tests for streamed responses."""
+
+    def test_cached_stream(self, tmp_path: Path) -> None:
+        """Test that streamed responses are cached once complete.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        cache = LLMCache(tmp_path / "cache.db")
+        model = CountingModel()
+        cached = CachedModel(model, cache, "m")
+
+        assert list(cached.stream(["text", "Why?"])) == ["answer", " 1", " to", " Why?"]
+        assert list(cached.stream(["text", "why?"])) == ["answer 1 to Why?"]
+
+        partial = cached.stream(["edited", "Why?"])
+        next(partial)
+        partial.close()
+        assert cache.get("m", "edited", "Why?") is None
+        assert model.calls == 2
+        cache.close()
+
+    def test_stream_query_file(self, tmp_path: Path) -> None:
+        """Test that a streamed query is logged once, with the whole answer.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        file_path = tmp_path / "all_posts.txt"
+        file_path.write_text("posts", encoding="utf-8")
+
+        with (
+            patch("discuss_nutshell.cli.text_model", return_value=CountingModel()),
+            patch("discuss_nutshell.cli.log_interaction") as mock_log,
+            patch("discuss_nutshell.cli.log_metrics") as mock_metrics,
+        ):
+            pieces = stream_query_file(file_path, "Why?")
+            assert next(pieces) == "answer"
+            mock_log.assert_not_called()
+            assert "".join(pieces) == " 1 to Why?"
+
+        mock_log.assert_called_once_with(
+            filename="all_posts.txt",
+            query="Why?",
+            context="posts",
+            response="answer 1 to Why?",
+        )
+        interaction_id, metrics = mock_metrics.call_args.args
+        assert interaction_id is mock_log.return_value
+        assert metrics.first_token is not None
+        assert metrics.seconds["model"] <= metrics.elapsed()
@@ -0,0 +1,102 @@
+"""Tests for the metrics module."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from discuss_nutshell.data_logger import (
+    InteractionLogger,
+    interaction_row,
+    metrics_row,
+    read_metrics,
+)
+from discuss_nutshell.llm_cache import CachedModel, LLMCache
+from discuss_nutshell.metrics import CallMetrics, metrics_stats, record_usage
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+
+class UsageModel:
+    """Local model reporting 100 prompt and 5 response tokens."""
+
+    def generate(self, contents: list[str]) -> str:
+        """Return the question."""
+        record_usage(100, 5)
+        return contents[-1]
+
+    def stream(self, contents: list[str]) -> Iterator[str]:
+        """Yield the question."""
+        record_usage(100, 5)
+        yield contents[-1]
+
+
+class TestCallMetrics:
+    """Tests for CallMetrics."""
+
+    def test_usage_and_cache_hits(self, tmp_path: Path) -> None:
+        """Test that usage and hits are only recorded inside a stage.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        cache = LLMCache(tmp_path / "cache.db")
+        model = CachedModel(UsageModel(), cache, "local")
+        metrics = CallMetrics("local", "all_posts.txt")
+
+        with metrics.stage("model"):
+            model.generate(["posts", "Why?"])
+        assert (metrics.input_tokens, metrics.output_tokens, metrics.cached) == (
+            100,
+            5,
+            False,
+        )
+        model.generate(["posts", "How?"])
+        assert metrics.input_tokens == 100
+
+        metrics = CallMetrics("local", "all_posts.txt")
+        assert list(metrics.stream(model.stream(["posts", "Why?"]))) == ["Why?"]
+        assert metrics.cached
+        assert metrics.input_tokens is None
+        assert metrics.first_token is not None
+        assert 0 < metrics.seconds["model"] <= metrics.first_token <= metrics.elapsed()
+        cache.close()
+
+
+class TestMetricsStats:
+    """Tests for recording metrics and their percentiles."""
+
+    def test_stats(self, tmp_path: Path) -> None:
+        """Test the percentiles of metrics written by the logger.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        db_file = tmp_path / "logs.db"
+        writer = InteractionLogger(db_file)
+        for i in range(100):
+            row = interaction_row(f"file{i % 2}.txt", "q", "ctx", "r")
+            metrics = CallMetrics("gemini-2.5-flash", row[2])
+            metrics.add_usage(1000 + i, i)
+            writer.log_rows([row])
+            writer.log_rows([metrics_row(row[0], metrics)], "metrics")
+        writer.close()
+
+        table = read_metrics(db_file)
+        assert len(table) == 100
+        assert read_metrics(db_file, since="2999-01-01").empty
+
+        stats = metrics_stats(table, "model").loc["gemini-2.5-flash"]
+        assert stats["queries"] == 100
+        assert stats["tokens_in_p50"] == pytest.approx(1049.5)
+        assert stats["tokens_out_p99"] == pytest.approx(98.01)
+        assert stats["total_p95"] >= stats["total_p50"] > 0
+        by_file = metrics_stats(table, "post_name")
+        assert list(by_file.index) == ["file0.txt", "file1.txt"]
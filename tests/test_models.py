@@ -0,0 +1,223 @@
+"""Tests for the models module."""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from discuss_nutshell.metrics import CallMetrics
+from discuss_nutshell.models import (
+    AnthropicModel,
+    ClientPool,
+    GeminiModel,
+    OpenAIModel,
+    get_model,
+    model_backend,
+)
+
+
+def gemini_usage(output_tokens: int) -> Any:
+    """Return Gemini usage metadata with 10 prompt tokens.
+
+    Parameters
+    ----------
+    output_tokens : int
+        Tokens of the response so far.
+
+    Returns
+    -------
+    Any
+        Stand-in for the usage metadata of a response.
+    """
+    return SimpleNamespace(prompt_token_count=10, candidates_token_count=output_tokens)
+
+
+class FakeGeminiClient:
+    """Local stand-in for google-genai's client."""
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self.models = self
+
+    def generate_content(self, model: str, contents: list[str]) -> Any:
+        """Answer with the model name and question."""
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        return SimpleNamespace(
+            text=f"{model}: {contents[-1]}", usage_metadata=gemini_usage(2)
+        )
+
+    def generate_content_stream(self, model: str, contents: list[str]) -> Any:
+        """Answer in chunks, one of them empty."""
+        return [
+            SimpleNamespace(text=model, usage_metadata=gemini_usage(1)),
+            SimpleNamespace(text=None, usage_metadata=None),
+            SimpleNamespace(text=contents[-1], usage_metadata=gemini_usage(2)),
+        ]
+
+
+class FakeOpenAIClient:
+    """Local stand-in for the openai client."""
+
+    def __init__(self) -> None:
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, model: str, messages: list[dict[str, str]], **kwargs: Any) -> Any:
+        """Answer with the model name and the joined prompt."""
+        content = f"{model}: {messages[0]['content']}"
+        usage = SimpleNamespace(prompt_tokens=5, completion_tokens=3)
+        if kwargs.get("stream"):
+            return [
+                SimpleNamespace(
+                    choices=[SimpleNamespace(delta=SimpleNamespace(content=c))],
+                    usage=None,
+                )
+                for c in (content[:3], content[3:])
+            ] + [SimpleNamespace(choices=[], usage=usage)]
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+class FakeAnthropicClient:
+    """Local stand-in for the anthropic client."""
+
+    def __init__(self) -> None:
+        self.messages = self
+
+    def create(self, **request: Any) -> Any:
+        """Answer with text and non-text content blocks."""
+        return SimpleNamespace(
+            content=[
+                SimpleNamespace(type="text", text=request["model"]),
+                SimpleNamespace(type="tool_use", text="ignored"),
+            ],
+            usage=SimpleNamespace(input_tokens=7, output_tokens=1),
+        )
+
+
+def make_pool(
+    limits: dict[str, int] | None = None, delay: float = 0.0
+) -> tuple[ClientPool, list[str]]:
+    """Build a pool of local clients recording their creation.
+
+    Parameters
+    ----------
+    limits : dict[str, int] | None, optional
+        Connection limits per backend.
+    delay : float, optional
+        Seconds each Gemini request takes.
+
+    Returns
+    -------
+    tuple[ClientPool, list[str]]
+        The pool and the backends whose client was created, in order.
+    """
+    created: list[str] = []
+
+    def factory(backend: str, client_class: Any) -> Any:
+        def create() -> Any:
+            created.append(backend)
+            if backend == "gemini":
+                return client_class(delay)
+            return client_class()
+
+        return create
+
+    pool = ClientPool(
+        limits,
+        factories={
+            "gemini": factory("gemini", FakeGeminiClient),
+            "openai": factory("openai", FakeOpenAIClient),
+            "anthropic": factory("anthropic", FakeAnthropicClient),
+        },
+    )
+    return pool, created
+
+
+class TestModelBackend:
+    """Tests for model_backend."""
+
+    def test_prefixes(self) -> None:
+        """Test that the backend is told from the name or its prefix."""
+        assert model_backend("gemini-2.5-flash") == ("gemini", "gemini-2.5-flash")
+        assert model_backend("gpt-4.1-mini") == ("openai", "gpt-4.1-mini")
+        assert model_backend("anthropic:claude-x") == ("anthropic", "claude-x")
+
+    def test_unknown(self) -> None:
+        """Test that unknown names and backends are rejected."""
+        with pytest.raises(ValueError, match="Cannot tell the backend"):
+            model_backend("llama-3")
+        with pytest.raises(ValueError, match="Unknown model backend"):
+            model_backend("ollama:llama-3")
+
+
+class TestClientPool:
+    """Tests for ClientPool and the models using it."""
+
+    def test_one_client_per_backend(self) -> None:
+        """Test that clients are created lazily, once per backend."""
+        pool, created = make_pool()
+        assert created == []
+
+        for question in ("a", "b"):
+            assert get_model("gemini-2.5-flash", pool).generate(["ctx", question]) == (
+                f"gemini-2.5-flash: {question}"
+            )
+        assert get_model("gpt-4.1-mini", pool).generate(["ctx", "q"]) == (
+            "gpt-4.1-mini: ctx\n\nq"
+        )
+
+        assert created == ["gemini", "openai"]
+
+    def test_connection_limit(self) -> None:
+        """Test that a backend never has more requests than its limit."""
+        pool, _created = make_pool({"gemini": 2}, delay=0.02)
+        model = GeminiModel(pool=pool)
+
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            list(executor.map(model.generate, [["q"]] * 6))
+
+        assert pool.client("gemini").max_in_flight == 2
+
+    def test_invalid_limit(self) -> None:
+        """Test that limits must be positive."""
+        with pytest.raises(ValueError, match="Invalid connection limit"):
+            ClientPool({"openai": 0})
+
+    def test_backends(self) -> None:
+        """Test the responses and streams of every backend."""
+        pool, _created = make_pool()
+        assert list(GeminiModel("g", pool).stream(["q"])) == ["g", "q"]
+        assert "".join(OpenAIModel("o", pool).stream(["q"])) == "o: q"
+        assert AnthropicModel("c", pool).generate(["q"]) == "c"
+
+    def test_usage(self) -> None:
+        """Test that every backend reports its token usage to the metrics."""
+        pool, _created = make_pool()
+        metrics = CallMetrics("g", "all_posts.txt")
+        assert list(metrics.stream(GeminiModel("g", pool).stream(["q"]))) == ["g", "q"]
+        assert (metrics.input_tokens, metrics.output_tokens) == (10, 2)
+        assert metrics.first_token is not None
+
+        metrics = CallMetrics("o", "all_posts.txt")
+        with metrics.stage("model"):
+            OpenAIModel("o", pool).generate(["q"])
+            AnthropicModel("c", pool).generate(["q"])
+        assert (metrics.input_tokens, metrics.output_tokens) == (12, 4)
+        assert "".join(metrics.stream(OpenAIModel("o", pool).stream(["q"]))) == "o: q"
+        assert metrics.input_tokens == 17
+
+        GeminiModel("g", pool).generate(["q"])
+        assert metrics.input_tokens == 17
@@ -0,0 +1,129 @@
+"""Tests for the post_store module."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pandas as pd
+import pytest
+
+from discuss_nutshell.post_store import PostStore
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+
+def make_posts(topic_id: int, count: int, text: str = "Post") -> pd.DataFrame:
+    """Build processed posts of a topic.
+
+    Parameters
+    ----------
+    topic_id : int
+        ID of the topic.
+    count : int
+        Number of posts.
+    text : str, optional
+        Prefix of the clean content.
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame in the layout returned by `process_posts`.
+    """
+    numbers = list(range(1, count + 1))
+    return pd.DataFrame(
+        {
+            "id": [topic_id * 100 + number for number in numbers],
+            "topic_id": topic_id,
+            "post_number": numbers,
+            "name": "Alice",
+            "created_at": "2025-11-22 18:11",
+            "clean_cooked": [f"{text} {number}" for number in numbers],
+        }
+    )
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> Iterator[PostStore]:
+    """Post store holding two topics.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory path provided by pytest.
+
+    Yields
+    ------
+    PostStore
+        Store with three posts of topic 1 and two posts of topic 2.
+    """
+    post_store = PostStore(tmp_path / "posts.db")
+    post_store.write(make_posts(1, 3))
+    post_store.write(make_posts(2, 2))
+    yield post_store
+    post_store.close()
+
+
+class TestPostStore:
+    """Tests for PostStore."""
+
+    def test_get(self, store: PostStore) -> None:
+        """Test lookups by id and by topic and number.
+
+        Parameters
+        ----------
+        store : PostStore
+            Store holding two topics.
+        """
+        assert store.get(102) == {
+            "id": 102,
+            "topic_id": 1,
+            "post_number": 2,
+            "author": "Alice",
+            "created_at": "2025-11-22 18:11",
+            "clean_content": "Post 2",
+        }
+        assert store.get_by_number(2, 1)["id"] == 201  # type: ignore[index]
+        assert store.get(999) is None
+        assert store.get_by_number(1, 9) is None
+
+    def test_rewrite_replaces_posts(self, store: PostStore) -> None:
+        """Test that writing a topic again replaces its posts.
+
+        Parameters
+        ----------
+        store : PostStore
+            Store holding two topics.
+        """
+        store.write(make_posts(1, 3, text="Edited"))
+        store.delete([103])
+
+        assert len(store) == 4
+        assert store.topic_posts(1)["clean_cooked"].tolist() == [
+            "Edited 1",
+            "Edited 2",
+        ]
+        assert store.topic_ids() == [1, 2]
+
+    def test_export_post_files(self, store: PostStore, tmp_path: Path) -> None:
+        """Test that the per-file layout can be exported.
+
+        Parameters
+        ----------
+        store : PostStore
+            Store holding two topics.
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        assert store.export_post_files(tmp_path / "posts", topic_id=2) == 2
+        assert sorted(path.name for path in (tmp_path / "posts").iterdir()) == [
+            "post_201.txt",
+            "post_202.txt",
+        ]
+        assert (tmp_path / "posts" / "post_201.txt").read_text(encoding="utf-8") == (
+            "Author: Alice\n"
+            "Created at: 2025-11-22 18:11\n"
+            "Number: 1\n"
+            "Clean content: Post 1\n"
+        )
@@ -0,0 +1,179 @@
+"""Tests for the post_summaries module."""
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+from unittest.mock import MagicMock
+
+import pandas as pd
+
+from discuss_nutshell.data_loader import process_topic_file
+from discuss_nutshell.post_summaries import (
+    PostSummarizer,
+    SummaryCache,
+    write_summaries_txt,
+)
+from discuss_nutshell.posts_txt import PostsTxtReader
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+LONG = "word " * 100
+
+
+class CountingModel:
+    """Local model summarizing a post as its first word and a counter."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def generate(self, contents: list[str]) -> str:
+        """Return a numbered summary."""
+        self.calls += 1
+        return f"{contents[0].split()[0]} summary {self.calls}\n"
+
+
+def make_frame(contents: list[str]) -> pd.DataFrame:
+    """Build processed posts with the given contents.
+
+    Parameters
+    ----------
+    contents : list[str]
+        Clean content of each post.
+
+    Returns
+    -------
+    pd.DataFrame
+        Posts numbered from 1, with ids from 10.
+    """
+    return pd.DataFrame(
+        {
+            "id": range(10, 10 + len(contents)),
+            "name": "Alice",
+            "created_at": "2025-11-22 18:11",
+            "post_number": range(1, len(contents) + 1),
+            "clean_cooked": contents,
+        }
+    )
+
+
+class TestPostSummarizer:
+    """Tests for PostSummarizer and SummaryCache."""
+
+    def test_only_new_and_edited_posts(self, tmp_path: Path) -> None:
+        """Test that unchanged posts reuse their stored summary.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        model = CountingModel()
+        cache = SummaryCache(tmp_path / "posts.db")
+        summarizer = PostSummarizer(model, cache, "local")
+
+        df = summarizer.summarize_posts(make_frame([LONG, "Short post.", LONG]))
+        assert list(df["summary"]) == [
+            "word summary 1",
+            "Short post.",
+            "word summary 2",
+        ]
+        assert model.calls == 2
+
+        edited = make_frame([LONG, "Short post.", "edited " + LONG, LONG])
+        df = summarizer.summarize_posts(edited)
+        assert "summary" not in edited
+        assert df["summary"].iloc[0] == "word summary 1"
+        assert df["summary"].iloc[2].startswith("edited summary")
+        assert model.calls == 4
+        assert len(cache) == 4
+        cache.close()
+
+    def test_cache_key(self, tmp_path: Path) -> None:
+        """Test that summaries are cached per model and never empty.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        model = CountingModel()
+        cache = SummaryCache(tmp_path / "posts.db")
+
+        PostSummarizer(model, cache, "local").summarize_posts(make_frame([LONG]))
+        PostSummarizer(model, cache, "other").summarize_posts(make_frame([LONG]))
+        assert model.calls == 2
+
+        silent = MagicMock()
+        silent.generate.return_value = " "
+        summarizer = PostSummarizer(silent, cache, "silent")
+        for _run in range(2):
+            df = summarizer.summarize_posts(make_frame([LONG]))
+        assert df["summary"].tolist() == [""]
+        assert silent.generate.call_count == 2
+        cache.close()
+
+    def test_aggregate_file(self, tmp_path: Path) -> None:
+        """Test that the summaries file is indexed like the posts file.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        df = make_frame([LONG, LONG]).assign(summary=["First.", "Second."])
+
+        write_summaries_txt(df, 1, tmp_path)
+
+        with PostsTxtReader(tmp_path / "1_summaries.txt") as reader:
+            assert len(reader) == 2
+            text = reader.text(2, 2)
+        assert text == (
+            "ID: 11\nAuthor: Alice\nCreated at: 2025-11-22 18:11\n"
+            "Number: 2\nSummary: Second.\n"
+        )
+
+    def test_process_topic_file(self, tmp_path: Path) -> None:
+        """Test the summaries stage of the streaming pipeline.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        posts = [
+            {
+                "id": post_id,
+                "name": "Alice",
+                "username": "alice",
+                "created_at": "2025-11-22T18:11:00.000Z",
+                "cooked": f"<p>{LONG}</p>",
+                "post_number": post_id,
+            }
+            for post_id in (1, 2, 3)
+        ]
+        topic_file = tmp_path / "posts.json"
+        topic_file.write_text(json.dumps(posts), encoding="utf-8")
+        model = CountingModel()
+        cache = SummaryCache(tmp_path / "posts.db")
+        output = tmp_path / "out"
+
+        for _run in range(2):
+            process_topic_file(
+                topic_file,
+                1,
+                output,
+                batch_size=2,
+                post_files=False,
+                summarizer=PostSummarizer(model, cache, "local"),
+            )
+
+        assert model.calls == 3
+        summaries = (output / "1_summaries.txt").read_text(encoding="utf-8")
+        assert summaries.count("Summary: word summary") == 3
+        assert (
+            len(summaries)
+            < len((output / "1_posts.txt").read_text(encoding="utf-8")) / 2
+        )
+        cache.close()
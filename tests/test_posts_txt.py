@@ -0,0 +1,292 @@
+"""Tests for the posts_txt module."""
+
+from __future__ import annotations
+
+import stat
+from typing import TYPE_CHECKING
+
+import pandas as pd
+import pytest
+
+from discuss_nutshell.posts_txt import (
+    PostsTxtReader,
+    PostsTxtWriter,
+    parse_post_range,
+    read_post_blocks,
+    render_post_blocks,
+    render_posts_txt,
+)
+from discuss_nutshell.preprocessor import write_posts_txt
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+@pytest.fixture
+def posts_df() -> pd.DataFrame:
+    """Two processed posts.
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame with the columns written to '{topic_id}_posts.txt'.
+    """
+    return pd.DataFrame(
+        {
+            "id": [10, 11],
+            "name": ["Alice", "Bob"],
+            "created_at": ["2025-11-22 18:11", "2025-11-23 09:00"],
+            "post_number": [1, 2],
+            "clean_cooked": ["Hello", "World"],
+        }
+    )
+
+
+class TestRenderPostsTxt:
+    """Tests for render_posts_txt."""
+
+    def test_render(self, posts_df: pd.DataFrame) -> None:
+        """Test that each post is rendered as five labelled lines.
+
+        Parameters
+        ----------
+        posts_df : pd.DataFrame
+            Processed posts.
+        """
+        assert render_posts_txt(posts_df.iloc[:1]) == (
+            "ID: 10\n"
+            "Author: Alice\n"
+            "Created at: 2025-11-22 18:11\n"
+            "Number: 1\n"
+            "Clean content: Hello\n"
+        )
+
+    def test_render_empty(self, posts_df: pd.DataFrame) -> None:
+        """Test that no posts render to an empty string.
+
+        Parameters
+        ----------
+        posts_df : pd.DataFrame
+            Processed posts.
+        """
+        assert render_posts_txt(posts_df.iloc[:0]) == ""
+
+
+class TestPostsTxtWriter:
+    """Tests for PostsTxtWriter and write_posts_txt."""
+
+    def test_rerun_is_idempotent(self, posts_df: pd.DataFrame, tmp_path: Path) -> None:
+        """Test that writing twice does not duplicate posts.
+
+        Parameters
+        ----------
+        posts_df : pd.DataFrame
+            Processed posts.
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        write_posts_txt(posts_df, 5, tmp_path)
+        first = (tmp_path / "5_posts.txt").read_text(encoding="utf-8")
+        write_posts_txt(posts_df, 5, tmp_path)
+
+        assert (tmp_path / "5_posts.txt").read_text(encoding="utf-8") == first
+        assert first.count("ID: ") == 2
+        assert sorted(path.name for path in tmp_path.iterdir()) == [
+            "5_posts.txt",
+            "5_posts.txt.idx",
+        ]
+
+    def test_error_keeps_previous_file(
+        self, posts_df: pd.DataFrame, tmp_path: Path
+    ) -> None:
+        """Test that a failed write leaves the previous file in place.
+
+        Parameters
+        ----------
+        posts_df : pd.DataFrame
+            Processed posts.
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        file_path = tmp_path / "all_posts.txt"
+        file_path.write_text("previous", encoding="utf-8")
+
+        def write_broken() -> None:
+            with PostsTxtWriter(file_path) as writer:
+                writer.write(posts_df)
+                writer.write(posts_df.drop(columns="name"))
+
+        with pytest.raises(KeyError):
+            write_broken()
+
+        assert file_path.read_text(encoding="utf-8") == "previous"
+        assert [path.name for path in tmp_path.iterdir()] == ["all_posts.txt"]
+
+    def test_file_mode(self, posts_df: pd.DataFrame, tmp_path: Path) -> None:
+        """Test that the files get the permissions of a file created by open.
+
+        Parameters
+        ----------
+        posts_df : pd.DataFrame
+            Processed posts.
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        reference = tmp_path / "reference.txt"
+        reference.write_text("", encoding="utf-8")
+        write_posts_txt(posts_df, 5, tmp_path)
+
+        expected = stat.S_IMODE(reference.stat().st_mode)
+        for name in ("5_posts.txt", "5_posts.txt.idx"):
+            assert stat.S_IMODE((tmp_path / name).stat().st_mode) == expected
+
+
+class TestPostsTxtReader:
+    """Tests for PostsTxtReader."""
+
+    def test_ranges(self, tmp_path: Path) -> None:
+        """Test that ranges of posts are read through the index.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        df = pd.DataFrame(
+            {
+                "id": range(100, 110),
+                "name": ["Zoë"] * 10,
+                "created_at": "2025-11-22 18:11",
+                "post_number": [1, 2, 3, 5, 6, 7, 8, 9, 10, 11],
+                "clean_cooked": [f"Post ☃ {i}" for i in range(10)],
+            }
+        )
+        file_path = tmp_path / "all_posts.txt"
+        with PostsTxtWriter(file_path) as writer:
+            writer.write(df.iloc[:4])
+            writer.write(df.iloc[4:])
+
+        with PostsTxtReader(file_path) as reader:
+            assert len(reader) == 10
+            assert reader.text(3, 6) == render_posts_txt(df.iloc[2:5])
+            assert reader.text(4, 4) == ""
+            assert reader.text(11, 50) == render_posts_txt(df.iloc[9:])
+            assert bytes(reader.view(1, 11)) == file_path.read_bytes()
+
+    def test_stale_index(self, posts_df: pd.DataFrame, tmp_path: Path) -> None:
+        """Test that an index not matching its file is rejected.
+
+        Parameters
+        ----------
+        posts_df : pd.DataFrame
+            Processed posts.
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        write_posts_txt(posts_df, 5, tmp_path)
+        with (tmp_path / "5_posts.txt").open("a", encoding="utf-8") as f:
+            f.write("ID: 12\n")
+
+        with pytest.raises(ValueError, match="out of date"):
+            PostsTxtReader(tmp_path / "5_posts.txt")
+
+
+class TestReadPostBlocks:
+    """Tests for read_post_blocks on files without an index."""
+
+    def test_builds_missing_index(self, tmp_path: Path) -> None:
+        """Test that a file written without an index gets one.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        df = pd.DataFrame(
+            {
+                "id": range(100, 104),
+                "name": "Alice",
+                "created_at": "2025-11-22 18:11",
+                "post_number": [1, 2, 3, 4],
+                "clean_cooked": ["One", "Two\nID: 5\nlines", "Three", "Four"],
+            }
+        )
+        file_path = tmp_path / "all_posts.txt"
+        file_path.write_text(render_posts_txt(df), encoding="utf-8")
+
+        blocks = render_post_blocks(df).tolist()
+        assert read_post_blocks(file_path, 2, 3) == blocks[1:3]
+        with PostsTxtReader(file_path) as reader:
+            assert reader.blocks(1, 4) == blocks
+
+    def test_several_topics(self, posts_df: pd.DataFrame, tmp_path: Path) -> None:
+        """Test that posts of topics appended to one file are scanned.
+
+        Parameters
+        ----------
+        posts_df : pd.DataFrame
+            Processed posts.
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        file_path = tmp_path / "all_posts.txt"
+        file_path.write_text(render_posts_txt(posts_df) * 2, encoding="utf-8")
+
+        blocks = render_post_blocks(posts_df).tolist()
+        assert read_post_blocks(file_path, 2, 2) == [blocks[1], blocks[1]]
+        assert [path.name for path in tmp_path.iterdir()] == ["all_posts.txt"]
+
+    def test_stale_index(self, posts_df: pd.DataFrame, tmp_path: Path) -> None:
+        """Test that a file rewritten without its index is scanned again.
+
+        Parameters
+        ----------
+        posts_df : pd.DataFrame
+            Processed posts.
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        write_posts_txt(posts_df.iloc[:1], 5, tmp_path)
+        file_path = tmp_path / "5_posts.txt"
+        file_path.write_text(render_posts_txt(posts_df), encoding="utf-8")
+
+        assert read_post_blocks(file_path, 2, 2) == [
+            render_posts_txt(posts_df.iloc[1:])
+        ]
+        with PostsTxtReader(file_path) as reader:
+            assert len(reader) == 2
+
+    def test_no_posts(self, tmp_path: Path) -> None:
+        """Test that files without posts get no index.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        file_path = tmp_path / "notes.txt"
+        file_path.write_text("Not a posts file\n", encoding="utf-8")
+
+        assert read_post_blocks(file_path, 1, 10) == []
+        assert [path.name for path in tmp_path.iterdir()] == ["notes.txt"]
+
+
+class TestParsePostRange:
+    """Tests for parse_post_range."""
+
+    def test_parse(self) -> None:
+        """Test ranges and single post numbers."""
+        assert parse_post_range("200-260") == (200, 260)
+        assert parse_post_range("7") == (7, 7)
+
+    @pytest.mark.parametrize("posts", ["a-b", "10-2", ""])
+    def test_invalid(self, posts: str) -> None:
+        """Test that invalid ranges raise ValueError.
+
+        Parameters
+        ----------
+        posts : str
+            Invalid range.
+        """
+        with pytest.raises(ValueError, match="Invalid post range"):
+            parse_post_range(posts)
@@ -0,0 +1,86 @@
+"""Tests for the preprocessor module."""
+
+from __future__ import annotations
+
+import pandas as pd
+
+from discuss_nutshell.preprocessor import (
+    POST_COLUMNS,
+    build_posts_frame,
+    clean_cooked_posts,
+    format_created_at,
+    process_posts,
+)
+from discuss_nutshell.utils import format_date
+
+POSTS = [
+    {
+        "id": 1,
+        "topic_id": 9,
+        "post_number": 1,
+        "name": "Ada",
+        "username": "ada",
+        "created_at": "2025-11-22T18:11:23.522Z",
+        "updated_at": "2025-11-23T08:00:00.000Z",
+        "version": 2,
+        "cooked": "<p>Hello <b>world</b></p>",
+        "avatar_template": "/a.png",
+        "reads": 10,
+    },
+    {
+        "id": 2,
+        "post_number": 2,
+        "name": "Grace",
+        "created_at": "2025-01-02T03:04:59Z",
+        "cooked": "<p>Second</p>",
+    },
+]
+
+
+class TestBuildPostsFrame:
+    """Tests for build_posts_frame."""
+
+    def test_keeps_only_pipeline_columns(self) -> None:
+        """Test that unused Discourse fields are not copied."""
+        df = build_posts_frame(iter(POSTS))
+
+        assert list(df.columns) == POST_COLUMNS
+        assert df["id"].tolist() == [1, 2]
+        assert pd.isna(df.loc[1, "username"])
+
+
+class TestFormatCreatedAt:
+    """Tests for format_created_at."""
+
+    def test_matches_format_date(self) -> None:
+        """Test that the vectorized format matches utils.format_date."""
+        dates = [post["created_at"] for post in POSTS]
+        df = format_created_at(pd.DataFrame({"created_at": dates}))
+
+        assert df["created_at"].tolist() == [format_date(date) for date in dates]
+
+
+class TestProcessPosts:
+    """Tests for process_posts."""
+
+    def test_process_posts(self) -> None:
+        """Test that posts come out with formatted dates and clean text."""
+        df = process_posts(POSTS)
+
+        assert df["created_at"].tolist() == ["2025-11-22 18:11", "2025-01-02 03:04"]
+        assert df["clean_cooked"].tolist() == ["Hello world", "Second"]
+        assert df.loc[0, "version"] == 2
+
+
+class TestCleanCookedPosts:
+    """Tests for clean_cooked_posts."""
+
+    def test_parallel_keeps_post_order(self) -> None:
+        """Test that chunks cleaned in worker processes stay in order."""
+        cooked = [f"<p>Post <b>{i}</b></p>" for i in range(25)]
+
+        df = clean_cooked_posts(
+            pd.DataFrame({"cooked": cooked}), workers=3, chunk_size=4
+        )
+
+        assert df["clean_cooked"].tolist() == [f"Post {i}" for i in range(25)]
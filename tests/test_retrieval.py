@@ -0,0 +1,192 @@
+"""Tests for the retrieval module."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+
+from discuss_nutshell.cli import query_file
+from discuss_nutshell.posts_txt import render_post_blocks
+from discuss_nutshell.preprocessor import write_posts_txt
+from discuss_nutshell.retrieval import (
+    BM25Index,
+    EmbeddingIndex,
+    retrieve_posts,
+    strip_labels,
+    tokenize,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+CONTENTS = [
+    "Welcome to the discussion about the new release.",
+    "The build fails on Windows with a linker error.",
+    "I like the new logo.",
+    "The linker error on Windows goes away with the latest compiler.",
+    "Thanks everyone, see you at the next release.",
+]
+
+
+def make_frame(contents: list[str]) -> pd.DataFrame:
+    """Build processed posts with the given contents.
+
+    Parameters
+    ----------
+    contents : list[str]
+        Clean content of each post.
+
+    Returns
+    -------
+    pd.DataFrame
+        Posts numbered from 1.
+    """
+    return pd.DataFrame(
+        {
+            "id": range(len(contents)),
+            "name": "Alice",
+            "created_at": "2025-11-22 18:11",
+            "post_number": range(1, len(contents) + 1),
+            "clean_cooked": contents,
+        }
+    )
+
+
+class KeywordEmbedder:
+    """Local embedder counting a few keywords."""
+
+    KEYWORDS = ("windows", "linker", "logo", "release")
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        """Return the keyword counts of each text."""
+        self.calls += 1
+        return [
+            [float(tokenize(text).count(word)) for word in self.KEYWORDS]
+            for text in texts
+        ]
+
+
+class TestBM25Index:
+    """Tests for BM25Index."""
+
+    def test_ranks_matching_posts(self) -> None:
+        """Test that posts sharing rare query terms rank first."""
+        index = BM25Index(render_post_blocks(make_frame(CONTENTS)).tolist())
+
+        hits = index.search("Why does the linker fail on Windows?", k=2)
+
+        assert sorted(doc for doc, _score in hits) == [1, 3]
+        assert hits[0][1] >= hits[1][1] > 0
+
+    def test_no_match(self) -> None:
+        """Test that unrelated queries and empty indices return nothing."""
+        assert BM25Index(CONTENTS).search("kubernetes") == []
+        assert BM25Index([]).search("linker") == []
+
+    def test_labels_not_indexed(self) -> None:
+        """Test that only the field labels of post blocks are not searchable."""
+        contents = [*CONTENTS, "Which number has the author of the content?"]
+        blocks = render_post_blocks(make_frame(contents)).tolist()
+        index = BM25Index([strip_labels(block) for block in blocks])
+        assert [doc for doc, _score in index.search("author number")] == [5]
+        assert strip_labels(blocks[2]).splitlines() == [
+            "2",
+            "Alice",
+            "2025-11-22 18:11",
+            "3",
+            "I like the new logo.",
+        ]
+
+
+class TestEmbeddingIndex:
+    """Tests for EmbeddingIndex with a local embedder."""
+
+    def test_search(self) -> None:
+        """Test that the closest posts are returned, best first."""
+        index = EmbeddingIndex.build(CONTENTS, KeywordEmbedder(), batch_size=2)
+
+        assert index.vectors.shape == (5, 4)
+        assert [doc for doc, _score in index.search("logo", k=1)] == [2]
+
+    def test_load_or_build(self, tmp_path: Path) -> None:
+        """Test that saved embeddings are reused until the posts change.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        embedder = KeywordEmbedder()
+        index_file = tmp_path / "all_posts.emb.npz"
+
+        EmbeddingIndex.load_or_build(index_file, CONTENTS, embedder)
+        calls = embedder.calls
+        index = EmbeddingIndex.load_or_build(index_file, CONTENTS, embedder)
+        assert embedder.calls == calls
+        assert [doc for doc, _score in index.search("linker windows", k=2)] == [1, 3]
+
+        EmbeddingIndex.load_or_build(index_file, CONTENTS[:3], embedder)
+        assert embedder.calls > calls
+
+
+class TestRetrievePosts:
+    """Tests for retrieve_posts and query_file with --top-k."""
+
+    def test_thread_order(self) -> None:
+        """Test that retrieved posts keep their thread order."""
+        blocks = render_post_blocks(make_frame(CONTENTS)).tolist()
+        selected = retrieve_posts(blocks, "linker error windows", k=2)
+        assert selected == [blocks[1], blocks[3]]
+
+    def test_no_match(self) -> None:
+        """Test that the first and latest posts are sent when none matches."""
+        blocks = render_post_blocks(make_frame(CONTENTS * 40)).tolist()
+        assert retrieve_posts(blocks, "kubernetes", k=3) == [
+            blocks[0],
+            blocks[198],
+            blocks[199],
+        ]
+        assert retrieve_posts(blocks[:1], "kubernetes", k=3) == blocks[:1]
+        with pytest.raises(ValueError, match="Invalid number of posts"):
+            retrieve_posts(blocks, "linker", k=0)
+
+    def test_token_budget(self) -> None:
+        """Test that the best posts are kept until the budget is spent."""
+        blocks = render_post_blocks(make_frame(CONTENTS * 40)).tolist()
+        selected = retrieve_posts(blocks, "linker windows", k=40, max_tokens=100)
+        assert 1 < len(selected) <= 100 * 4 // len(blocks[1])
+        assert all("linker" in block for block in selected)
+        assert retrieve_posts(blocks, "kubernetes", max_tokens=1) == blocks[:1]
+
+    def test_query_file_top_k(self, tmp_path: Path) -> None:
+        """Test that only the top-k posts are sent to the model.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        write_posts_txt(make_frame(CONTENTS), 5, tmp_path)
+        model = MagicMock()
+        model.generate.return_value = "answer"
+
+        with (
+            patch("discuss_nutshell.cli.text_model", return_value=model),
+            patch("discuss_nutshell.cli.log_interaction"),
+            patch("discuss_nutshell.cli.log_metrics"),
+        ):
+            response = query_file(
+                tmp_path / "5_posts.txt", "What about the logo?", top_k=1
+            )
+
+        assert response == "answer"
+        context, question = model.generate.call_args.args[0]
+        assert "Number: 3\n" in context
+        assert "linker" not in context
+        assert question == "What about the logo?"
@@ -0,0 +1,167 @@
+"""Tests for the session module."""
+
+from __future__ import annotations
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any, ClassVar
+
+import pytest
+import requests
+
+from discuss_nutshell.session import ResponseCache, create_session, fetch_json
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+ETAG = '"v1"'
+
+
+class ETagHandler(BaseHTTPRequestHandler):
+    """Serve one JSON document with an ETag."""
+
+    statuses: ClassVar[list[int]] = []
+
+    def do_GET(self) -> None:
+        """Answer 304 when the client already has the current version."""
+        if self.headers.get("If-None-Match") == ETAG:
+            self.statuses.append(304)
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            return
+        payload = json.dumps({"path": self.path}).encode()
+        self.statuses.append(200)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("ETag", ETAG)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Silence request logging."""
+
+
+@pytest.fixture
+def server_url() -> Iterator[str]:
+    """Run a local HTTP server answering conditional requests.
+
+    Yields
+    ------
+    str
+        Base URL of the local server.
+    """
+    ETagHandler.statuses = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ETagHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+class TestFetchJson:
+    """Tests for fetch_json with a response cache."""
+
+    def test_not_modified_is_served_from_cache(
+        self, server_url: str, tmp_path: Path
+    ) -> None:
+        """Test that a second request is conditional and answered by the cache.
+
+        Parameters
+        ----------
+        server_url : str
+            Base URL of the local server.
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        cache = ResponseCache(tmp_path)
+        with create_session() as session:
+            first = fetch_json(session, f"{server_url}/t/1.json", {"a": 1}, cache)
+            second = fetch_json(session, f"{server_url}/t/1.json", {"a": 1}, cache)
+
+        assert ETagHandler.statuses == [200, 304]
+        assert second is first
+        assert first == {"path": "/t/1.json?a=1"}
+
+    def test_cache_persists_on_disk(self, server_url: str, tmp_path: Path) -> None:
+        """Test that a new cache instance revalidates from the stored entry.
+
+        Parameters
+        ----------
+        server_url : str
+            Base URL of the local server.
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        with create_session() as session:
+            fetch_json(session, f"{server_url}/t/2.json", cache=ResponseCache(tmp_path))
+            payload = fetch_json(
+                session, f"{server_url}/t/2.json", cache=ResponseCache(tmp_path)
+            )
+
+        assert ETagHandler.statuses == [200, 304]
+        assert payload == {"path": "/t/2.json"}
+
+    def test_without_cache(self, server_url: str) -> None:
+        """Test that requests are unconditional without a cache.
+
+        Parameters
+        ----------
+        server_url : str
+            Base URL of the local server.
+        """
+        with create_session() as session:
+            fetch_json(session, f"{server_url}/t/3.json")
+            fetch_json(session, f"{server_url}/t/3.json")
+
+        assert ETagHandler.statuses == [200, 200]
+
+    def test_memory_is_bounded(self, server_url: str, tmp_path: Path) -> None:
+        """Test that only the latest payloads stay in memory.
+
+        Parameters
+        ----------
+        server_url : str
+            Base URL of the local server.
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        cache = ResponseCache(tmp_path, memory_entries=2)
+        with create_session() as session:
+            first = fetch_json(session, f"{server_url}/t/1.json", cache=cache)
+            for topic in (2, 3):
+                fetch_json(session, f"{server_url}/t/{topic}.json", cache=cache)
+            again = fetch_json(session, f"{server_url}/t/1.json", cache=cache)
+
+        assert len(cache._memory) == 2
+        assert ETagHandler.statuses == [200, 200, 200, 304]
+        # Evicted payloads are read back from disk
+        assert again == first
+        assert again is not first
+
+    def test_load_missing_entry(self, tmp_path: Path) -> None:
+        """Test that loading an uncached URL raises KeyError.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        cache = ResponseCache(tmp_path)
+        assert cache.validators("http://example.test/") == {}
+        with pytest.raises(KeyError):
+            cache.load("http://example.test/")
+
+
+def test_session_negotiates_compression() -> None:
+    """Test that the shared session asks for compressed responses."""
+    with create_session() as session:
+        assert isinstance(session, requests.Session)
+        assert "gzip" in session.headers["Accept-Encoding"]
@@ -0,0 +1,204 @@
+"""Tests for the summarize module."""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from discuss_nutshell.cli import extract_text_from_file, summarize_file
+from discuss_nutshell.posts_txt import render_post_blocks, render_posts_txt
+from discuss_nutshell.preprocessor import write_posts_txt
+from discuss_nutshell.summarize import (
+    MAP_PROMPT,
+    Summarizer,
+    chunk_posts,
+    estimate_tokens,
+    load_post_blocks,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+class FakeModel:
+    """Local model answering with a short label of its input."""
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.calls: list[list[str]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def generate(self, contents: list[str]) -> str:
+        """Return 'map(first-last)' for chunks and 'reduce(...)' otherwise."""
+        with self._lock:
+            self.calls.append(contents)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        text, prompt = contents
+        if prompt.startswith(MAP_PROMPT[:20]):
+            numbers = [
+                line.removeprefix("Number: ")
+                for line in text.splitlines()
+                if line.startswith("Number: ")
+            ]
+            return f"map({numbers[0]}-{numbers[-1]})"
+        return "reduce(" + ",".join(text.split("\n\n")) + ")"
+
+
+def make_blocks(count: int, size: int = 100) -> list[str]:
+    """Render posts of about `size` characters each.
+
+    Parameters
+    ----------
+    count : int
+        Number of posts.
+    size : int, optional
+        Length of the content of each post.
+
+    Returns
+    -------
+    list[str]
+        Blocks in the layout of '{topic_id}_posts.txt'.
+    """
+    df = pd.DataFrame(
+        {
+            "id": range(count),
+            "name": "Alice",
+            "created_at": "2025-11-22 18:11",
+            "post_number": range(1, count + 1),
+            "clean_cooked": "x" * size,
+        }
+    )
+    return render_post_blocks(df).tolist()
+
+
+class TestChunkPosts:
+    """Tests for chunk_posts."""
+
+    def test_token_budget(self) -> None:
+        """Test that chunks keep whole posts within the budget."""
+        blocks = make_blocks(10)
+        budget = 3 * estimate_tokens(blocks[0])
+
+        chunks = chunk_posts(blocks, max_tokens=budget)
+
+        assert len(chunks) == 4
+        assert "".join(chunks) == "".join(blocks)
+        assert all(estimate_tokens(chunk) <= budget for chunk in chunks)
+
+    def test_max_posts_and_large_post(self) -> None:
+        """Test the post limit and that a huge post is kept whole."""
+        blocks = make_blocks(5)
+        assert len(chunk_posts(blocks, max_tokens=10**6, max_posts=2)) == 3
+        assert chunk_posts(make_blocks(1, size=1000), max_tokens=10) == make_blocks(
+            1, size=1000
+        )
+
+    def test_invalid_limits(self) -> None:
+        """Test that limits must be positive."""
+        with pytest.raises(ValueError, match="Invalid chunk limits"):
+            chunk_posts([], max_posts=0)
+
+
+class TestSummarizer:
+    """Tests for Summarizer with a fake model."""
+
+    def test_hierarchical_reduce(self) -> None:
+        """Test that partial summaries are combined fan_out at a time."""
+        model = FakeModel()
+        summarizer = Summarizer(model, chunk_tokens=10**6, fan_out=2, max_posts=2)
+
+        summary = summarizer.summarize(make_blocks(10))
+
+        # 5 map calls, then 2 + 1 + 1 reduce calls; map(9-10) is carried up
+        assert len(model.calls) == 9
+        assert summary == (
+            "reduce(reduce(reduce(map(1-2),map(3-4)),reduce(map(5-6),map(7-8))),"
+            "map(9-10))"
+        )
+
+    def test_concurrency_limit(self) -> None:
+        """Test that model calls run concurrently up to the limit."""
+        model = FakeModel(delay=0.02)
+        summarizer = Summarizer(model, fan_out=8, concurrency=3, max_posts=1)
+
+        summarizer.summarize(make_blocks(9))
+
+        assert model.max_in_flight == 3
+
+    def test_empty_thread(self) -> None:
+        """Test that no posts give an empty summary without model calls."""
+        model = FakeModel()
+        assert Summarizer(model).summarize([]) == ""
+        assert model.calls == []
+
+    def test_invalid_fan_out(self) -> None:
+        """Test that the fan-out must combine at least two summaries."""
+        with pytest.raises(ValueError, match="Invalid summarizer"):
+            Summarizer(FakeModel(), fan_out=1)
+
+
+class TestSummarizeFile:
+    """Tests for load_post_blocks and summarize_file."""
+
+    def test_summarize_post_range(self, tmp_path: Path) -> None:
+        """Test summarizing a range of an indexed posts text file.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        df = pd.DataFrame(
+            {
+                "id": range(20),
+                "name": "Alice",
+                "created_at": "2025-11-22 18:11",
+                "post_number": range(1, 21),
+                "clean_cooked": "text",
+            }
+        )
+        write_posts_txt(df, 5, tmp_path)
+        file_path = tmp_path / "5_posts.txt"
+        assert len(load_post_blocks(file_path, (5, 8))) == 4
+
+        with patch("discuss_nutshell.cli.log_interaction") as mock_log:
+            summary = summarize_file(
+                file_path, posts="5-8", summarizer=Summarizer(FakeModel(), max_posts=2)
+            )
+
+        assert summary == "reduce(map(5-6),map(7-8))"
+        mock_log.assert_called_once()
+
+    def test_unindexed_posts_txt(self, tmp_path: Path) -> None:
+        """Test that a posts text file without its index can be read.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        df = pd.DataFrame(
+            {
+                "id": range(3),
+                "name": "Alice",
+                "created_at": "2025-11-22 18:11",
+                "post_number": range(1, 4),
+                "clean_cooked": "text",
+            }
+        )
+        file_path = tmp_path / "all_posts.txt"
+        file_path.write_text(render_posts_txt(df), encoding="utf-8")
+
+        assert load_post_blocks(file_path) == render_post_blocks(df).tolist()
+        assert extract_text_from_file(file_path, "2-3") == render_posts_txt(df[1:])
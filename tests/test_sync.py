@@ -0,0 +1,256 @@
+"""Tests for the sync module."""
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING, Any
+from unittest.mock import patch
+
+import pytest
+
+from discuss_nutshell.columnar import read_posts_parquet
+from discuss_nutshell.post_store import PostStore
+from discuss_nutshell.post_summaries import PostSummarizer, SummaryCache
+from discuss_nutshell.sync import build_sync_state, is_changed, sync_topic
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+TOPIC_ID = 777
+FIRST_PAGE = 5
+
+
+class FakeTopic:
+    """In-memory Discourse topic answering the data_loader calls."""
+
+    def __init__(self, count: int) -> None:
+        self.posts = {i: self.make_post(i) for i in range(1, count + 1)}
+        self.fetched: list[int] = []
+
+    @staticmethod
+    def make_post(post_id: int, version: int = 1) -> dict[str, Any]:
+        """Build a post whose number is its id."""
+        return {
+            "id": post_id,
+            "topic_id": TOPIC_ID,
+            "post_number": post_id,
+            "name": f"Author {post_id}",
+            "created_at": "2025-11-22T18:11:23.522Z",
+            "updated_at": f"2025-11-22T18:11:{version:02d}.000Z",
+            "version": version,
+            "cooked": f"<p>Post {post_id} v{version}</p>",
+        }
+
+    def get_json(self, url: str, params: Any = None) -> dict[str, Any]:  # noqa: ARG002
+        """Return the first page of the topic."""
+        stream = sorted(self.posts)
+        return {
+            "post_stream": {
+                "posts": [self.posts[i] for i in stream[:FIRST_PAGE]],
+                "stream": stream,
+            }
+        }
+
+    def fetch_post_batches(
+        self,
+        topic: int,  # noqa: ARG002
+        post_ids: list[int],
+        *args: Any,  # noqa: ARG002
+    ) -> list[dict[str, Any]]:
+        """Return the requested posts and remember their ids."""
+        self.fetched.extend(post_ids)
+        return [self.posts[i] for i in post_ids]
+
+
+def run_sync(
+    topic: FakeTopic, output: Path, recheck: int = 3, **kwargs: Any
+) -> dict[str, list[int]]:
+    """Sync the fake topic into the output directory.
+
+    Parameters
+    ----------
+    topic : FakeTopic
+        The fake topic to sync.
+    output : Path
+        Output directory.
+    recheck : int, optional
+        Size of the recheck window.
+    **kwargs : Any
+        Extra keyword arguments of sync_topic.
+
+    Returns
+    -------
+    dict[str, list[int]]
+        Result of sync_topic.
+    """
+    with (
+        patch("discuss_nutshell.data_loader.get_json", topic.get_json),
+        patch(
+            "discuss_nutshell.data_loader.fetch_post_batches", topic.fetch_post_batches
+        ),
+        patch("discuss_nutshell.sync.get_json", topic.get_json),
+        patch("discuss_nutshell.sync.fetch_post_batches", topic.fetch_post_batches),
+    ):
+        return sync_topic(TOPIC_ID, output, recheck=recheck, **kwargs)
+
+
+class SummaryModel:
+    """Local model summarizing a post as its text, counting its calls."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def generate(self, contents: list[str]) -> str:
+        """Return the post text."""
+        self.calls += 1
+        return f"Summary of {contents[0]}"
+
+
+class TestSyncState:
+    """Tests for the sync state helpers."""
+
+    def test_build_sync_state(self) -> None:
+        """Test that the state records numbers, versions and edit times."""
+        posts = [FakeTopic.make_post(1), FakeTopic.make_post(2, version=3)]
+        state = build_sync_state(TOPIC_ID, posts)
+
+        assert set(state["posts"]) == {"1", "2"}
+        assert state["posts"]["2"] == {
+            "post_number": 2,
+            "updated_at": "2025-11-22T18:11:03.000Z",
+            "version": 3,
+        }
+
+    def test_is_changed(self) -> None:
+        """Test that edits are detected and unknown posts are not."""
+        state = build_sync_state(TOPIC_ID, [FakeTopic.make_post(1)])
+
+        assert not is_changed(FakeTopic.make_post(1), state)
+        assert is_changed(FakeTopic.make_post(1, version=2), state)
+        assert not is_changed(FakeTopic.make_post(9), state)
+
+
+class TestSyncTopic:
+    """Tests for sync_topic."""
+
+    def test_first_sync_loads_everything(self, tmp_path: Path) -> None:
+        """Test that the first sync is a full load.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        topic = FakeTopic(12)
+        result = run_sync(topic, tmp_path)
+
+        assert result["new"] == list(range(1, 13))
+        assert (tmp_path / f"topic_{TOPIC_ID}_sync.json").exists()
+
+    def test_resync_fetches_only_new_and_recent_posts(self, tmp_path: Path) -> None:
+        """Test that a resync patches the outputs with new and edited posts.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        topic = FakeTopic(12)
+        run_sync(topic, tmp_path)
+        topic.fetched.clear()
+
+        topic.posts[2] = FakeTopic.make_post(2, version=2)  # on the first page
+        topic.posts[11] = FakeTopic.make_post(11, version=2)  # in the window
+        topic.posts[13] = FakeTopic.make_post(13)
+        del topic.posts[8]
+        result = run_sync(topic, tmp_path)
+
+        assert result == {"new": [13], "changed": [2, 11], "deleted": [8]}
+        # Posts 10-12 form the recheck window; 1-5 came with the first page
+        assert topic.fetched == [13, 10, 11, 12]
+
+        records = json.loads((tmp_path / f"{TOPIC_ID}_all_posts.json").read_text())
+        assert [record["number"] for record in records] == [
+            1, 2, 3, 4, 5, 6, 7, 9, 10, 11, 12, 13,
+        ]  # fmt: skip
+        assert records[1]["clean_content"] == "Post 2 v2"
+        assert not (tmp_path / "post_8.txt").exists()
+        assert "Post 11 v2" in (tmp_path / "post_11.txt").read_text()
+
+        all_posts = (tmp_path / f"{TOPIC_ID}_posts.txt").read_text(encoding="utf-8")
+        assert all_posts.count("ID: ") == 12
+
+    def test_resync_patches_post_store(self, tmp_path: Path) -> None:
+        """Test that the post store can replace the per-post files.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        store = PostStore(tmp_path / "posts.db")
+        topic = FakeTopic(12)
+        run_sync(topic, tmp_path, store=store, post_files=False)
+
+        topic.posts[11] = FakeTopic.make_post(11, version=2)
+        del topic.posts[8]
+        run_sync(topic, tmp_path, store=store, post_files=False)
+
+        assert len(store) == 11
+        assert store.get(8) is None
+        assert store.get_by_number(TOPIC_ID, 11)["clean_content"] == "Post 11 v2"  # type: ignore[index]
+        assert not list(tmp_path.glob("post_*.txt"))
+        store.close()
+
+    def test_resync_without_changes_is_noop(self, tmp_path: Path) -> None:
+        """Test that an unchanged topic only costs the first page request.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        topic = FakeTopic(12)
+        run_sync(topic, tmp_path)
+        topic.fetched.clear()
+
+        result = run_sync(topic, tmp_path, recheck=0)
+
+        assert result == {"new": [], "changed": [], "deleted": []}
+        assert topic.fetched == []
+
+    def test_resync_adds_parquet_and_summaries(self, tmp_path: Path) -> None:
+        """Test that outputs requested after the first sync are kept up to date.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        pytest.importorskip("pyarrow")
+        topic = FakeTopic(12)
+        run_sync(topic, tmp_path)
+        model = SummaryModel()
+        cache = SummaryCache(tmp_path / "posts.db")
+        summarizer = PostSummarizer(model, cache, "local", short_chars=0)
+
+        try:
+            run_sync(topic, tmp_path, parquet=True, summarizer=summarizer)
+            parquet_file = tmp_path / f"{TOPIC_ID}_posts.parquet"
+            assert len(read_posts_parquet(parquet_file)) == 12
+            assert model.calls == 12
+
+            # Once written, the outputs are not rebuilt while nothing changes
+            with patch("discuss_nutshell.sync.patch_outputs") as patch_outputs:
+                run_sync(topic, tmp_path, parquet=True, summarizer=summarizer)
+            patch_outputs.assert_not_called()
+
+            topic.posts[13] = FakeTopic.make_post(13)
+            run_sync(topic, tmp_path, parquet=True, summarizer=summarizer)
+        finally:
+            cache.close()
+
+        assert len(read_posts_parquet(parquet_file)) == 13
+        assert model.calls == 13
+        summaries = (tmp_path / f"{TOPIC_ID}_summaries.txt").read_text("utf-8")
+        assert summaries.count("Summary: Summary of Post") == 13
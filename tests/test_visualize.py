@@ -0,0 +1,109 @@
+"""Tests for the visualize module."""
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+
+from discuss_nutshell.visualize import (
+    CARD_CSS,
+    create_post_card,
+    display_posts,
+    load_posts_json,
+    page_count,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def make_posts(count: int) -> list[dict[str, object]]:
+    """Build posts as loaded by load_posts_json.
+
+    Parameters
+    ----------
+    count : int
+        Number of posts.
+
+    Returns
+    -------
+    list[dict[str, object]]
+        Posts numbered from 1.
+    """
+    return [
+        {
+            "id": 100 + number,
+            "author": "Alice",
+            "number": number,
+            "created_at": "2025-11-22 18:11",
+            "clean_content": f"Post {number} <b>text</b>\nsecond line",
+        }
+        for number in range(1, count + 1)
+    ]
+
+
+class TestDisplayPosts:
+    """Tests for the paged post browser."""
+
+    def test_card(self) -> None:
+        """Test that cards escape their content and have no inline styles."""
+        card = create_post_card(make_posts(1)[0])
+        assert "Post 1 &lt;b&gt;text&lt;/b&gt;<br>second line" in card
+        assert "style=" not in card
+
+    def test_pages(self) -> None:
+        """Test that only the cards of the page are rendered."""
+        posts = make_posts(45)
+        assert page_count(45, 20) == 3
+        assert page_count(0, 20) == 1
+
+        page = display_posts(posts, 2, 20)
+        assert page.count('class="dn-card"') == 20
+        assert "Post #21<" in page
+        assert "Post #40<" in page
+        assert "Post #41<" not in page
+        assert "Posts 21-40 of 45" in page
+        assert page.count(CARD_CSS) == 1
+
+        last = display_posts(posts, 99, 20)
+        assert last.count('class="dn-card"') == 5
+        assert "Posts 41-45 of 45" in last
+        assert len(display_posts(make_posts(2000), 1, 20)) < len(page) * 1.1
+        assert "Posts 0-0 of 0" in display_posts([], 1)
+
+
+class TestLoadPostsJson:
+    """Tests for load_posts_json."""
+
+    def test_raw_topic(self, tmp_path: Path) -> None:
+        """Test that raw posts are cleaned into card records.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            Temporary directory path provided by pytest.
+        """
+        post = {
+            "id": 7,
+            "name": "Alice",
+            "post_number": 1,
+            "created_at": "2025-11-22T18:11:23.522Z",
+            "cooked": "<p>Hello <b>world</b></p>",
+        }
+        topic_file = tmp_path / "topic.json"
+        topic_file.write_text(
+            json.dumps({"post_stream": {"posts": [post]}}), encoding="utf-8"
+        )
+        records_file = tmp_path / "7_all_posts.json"
+        records_file.write_text(json.dumps(load_posts_json(topic_file)), "utf-8")
+
+        for path in (topic_file, records_file):
+            assert load_posts_json(path) == [
+                {
+                    "id": 7,
+                    "author": "Alice",
+                    "number": 1,
+                    "created_at": "2025-11-22 18:11",
+                    "clean_content": "Hello world",
+                }
+            ]